@@ -0,0 +1,63 @@
+"""
+충전방식(시리즈) 그룹 병렬 윈도우 생성 벤치마크 (워커 수별 스케일링)
+
+사용법: python scripts/benchmark_parallel_windowing.py --series 512 --workers 1 2 4 8 16 32
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.utils.paths import DATASET_PATH
+from src.data.processing import preprocess_data, add_daily_features
+from src.dataset.windowing import build_train_df
+
+
+def replicate_series(df, n_series):
+    """충전방식 그룹을 복제해 지역/충전소 단위처럼 n_series개의 독립 시리즈를 만듦"""
+    n_types = df['충전방식'].nunique()
+    copies = []
+    for k in range(-(-n_series // n_types)):
+        copy = df.copy()
+        copy['충전방식'] = copy['충전방식'] + f'_{k:04d}'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def run(n_series, workers, executor, lookback=28, horizon=7, top_k=3):
+    base = add_daily_features(preprocess_data(pd.read_csv(DATASET_PATH)))
+    df = replicate_series(base, n_series)
+    print(f"series={df['충전방식'].nunique()}, rows={len(df)}, executor={executor}, cpu={os.cpu_count()}")
+    print(f"{'workers':>8} {'sec':>8} {'speedup':>8} {'efficiency':>10}")
+
+    baseline_sec, reference = None, None
+    for n_jobs in workers:
+        start = time.perf_counter()
+        train_df = build_train_df(df, lookback, horizon, top_k, n_jobs=n_jobs, executor=executor, verbose=False)
+        elapsed = time.perf_counter() - start
+
+        # 워커 수와 무관하게 결과가 동일해야 함
+        if reference is None:
+            baseline_sec, reference = elapsed, train_df
+        else:
+            pd.testing.assert_frame_equal(reference, train_df, check_exact=True)
+
+        speedup = baseline_sec / elapsed
+        print(f"{n_jobs:>8} {elapsed:>8.3f} {speedup:>7.2f}x {speedup / n_jobs:>9.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="그룹 병렬 윈도우 생성 벤치마크")
+    parser.add_argument('--series', type=int, default=512)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process')
+    args = parser.parse_args()
+
+    run(args.series, args.workers, args.executor)
@@ -0,0 +1,271 @@
+"""
+합성 충전부하 데이터로 전체 파이프라인 단계별 성능 측정 및 실행 간 비교
+
+측정 단계: 전처리, 윈도우 생성, 배치 FFT, CatBoost 학습/예측, LSTM 학습/예측,
+RAG 서빙 저장소 변환/로드와 하이브리드 검색(faiss와 RAG-document-qna 의존성이 설치된 경우)
+결과는 outputs/reports/benchmarks/<run_id>.json에 저장하고 history.csv에 누적하며,
+같은 설정의 직전 실행과 단계별 시간 비율을 출력.
+
+사용법:
+    python scripts/benchmark_suite.py --series 20 --days 1825
+    python scripts/benchmark_suite.py --series 1000 --days 3650 --stages processing windowing fft
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.utils.paths import REPORTS_DIR, ensure_dir
+from src.utils.resources import peak_rss_mb
+from src.data.synthetic import generate_ev_load
+from src.data.processing import prepare_daily_frame
+from src.dataset.windowing import build_train_df
+from src.features.fourier_transform import fft_features_batch
+
+BENCHMARK_DIR = REPORTS_DIR / "benchmarks"
+ALL_STAGES = ['processing', 'windowing', 'fft', 'catboost', 'lstm', 'vector_store']
+# 직전 실행과 비교할 때 같은 설정으로 보는 키
+CONFIG_KEYS = ['series', 'days', 'lookback', 'horizon', 'top_k', 'threads', 'iterations', 'lstm_epochs', 'vectors', 'index_type']
+
+
+def time_repeated(func, repeat):
+    """func를 repeat회 실행해 (시간 리스트, 마지막 결과) 반환"""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def bench_processing(ctx, config):
+    times, ctx['df'] = time_repeated(lambda: prepare_daily_frame(ctx['raw']), config['repeat'])
+    return times, len(ctx['raw'])
+
+
+def bench_windowing(ctx, config):
+    build = lambda: build_train_df(ctx['df'], config['lookback'], config['horizon'], config['top_k'], verbose=False)
+    times, ctx['train_df'] = time_repeated(build, config['repeat'])
+    return times, len(ctx['train_df'])
+
+
+def bench_fft(ctx, config):
+    # 충전방식별 일 부하 행렬 (n_series, n_days) -> 전체 윈도우 (n_windows, lookback)
+    daily = ctx['df'].pivot(index='충전방식', columns='일자', values='daily_total').to_numpy(dtype=np.float64)
+    windows = sliding_window_view(daily, config['lookback'], axis=1).reshape(-1, config['lookback'])
+    times, _ = time_repeated(lambda: fft_features_batch(windows, config['top_k']), config['repeat'])
+    return times, len(windows)
+
+
+def bench_catboost(ctx, config):
+    from src.models.catboost import train_catboost, feature_frame
+
+    params = {'iterations': config['iterations'], 'train_dir': None, 'allow_writing_files': False}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fit = lambda: train_catboost(ctx['train_df'], params, config['threads'], pool_cache_dir=cache_dir)
+        fit_times, model = time_repeated(fit, config['repeat'])
+    X = feature_frame(ctx['train_df'], list(model.feature_names_))
+    predict_times, _ = time_repeated(lambda: model.predict(X, thread_count=config['threads']), config['repeat'])
+    return {'catboost_fit': (fit_times, len(X)), 'catboost_predict': (predict_times, len(X))}
+
+
+def bench_lstm(ctx, config):
+    import torch
+    from src.models.lstm import build_series_dataset, fit_lstm, predict
+
+    torch.set_num_threads(config['threads'])
+    dataset, _, _ = build_series_dataset(ctx['df'], config['lookback'], config['horizon'])
+    indices = np.arange(len(dataset))
+    fit = lambda: fit_lstm(dataset, indices, num_epochs=config['lstm_epochs'], verbose=False)[0]
+    fit_times, model = time_repeated(fit, config['repeat'])
+    predict_times, _ = time_repeated(lambda: predict(model, dataset), config['repeat'])
+    return {'lstm_fit': (fit_times, len(dataset) * config['lstm_epochs']), 'lstm_predict': (predict_times, len(dataset))}
+
+
+RAG_DIR = project_root.parent / "RAG-document-qna"
+VECTOR_WORDS = 2000  # 합성 청크 본문의 어휘 수
+
+
+def bench_vector_store(ctx, config):
+    """RAG 검색 경로 측정: ingest.py 형식의 원본 DB -> index_store 서빙 저장소 변환/로드 -> HybridRetriever 배치 검색
+
+    bge-m3 대신 청크/질문 본문을 미리 만든 벡터로 바꿔 주는 스텁 임베딩 사용 (모델 추론 시간 제외).
+    """
+    if str(RAG_DIR) not in sys.path:
+        sys.path.append(str(RAG_DIR))
+    try:
+        import faiss  # noqa: F401
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import Embeddings
+        from ingest import build_faiss_store
+        from index_store import export_store, load_store, synthetic_vectors
+        from lexical_index import HybridRetriever, LexicalIndex
+    except ImportError as e:
+        print(f"RAG 의존성({e.name})이 설치되어 있지 않아 vector_store 단계를 건너뜁니다.")
+        return {}
+
+    class StubEmbeddings(Embeddings):
+        """본문 -> 미리 만든 벡터 조회"""
+
+        def __init__(self, table):
+            self.table = table
+
+        def embed_documents(self, texts):
+            return [self.table[text] for text in texts]
+
+        def embed_query(self, text):
+            return self.table[text]
+
+    # bge-m3 임베딩과 같은 1024차원 정규화 벡터, 본문은 합성 어휘에서 뽑은 단어열
+    rng = np.random.default_rng(config['seed'])
+    n = config['vectors']
+    vectors = synthetic_vectors(n, seed=config['seed'])
+    words = np.array([f"용어{i}" for i in range(VECTOR_WORDS)])
+    texts = [' '.join(row) for row in words[rng.integers(VECTOR_WORDS, size=(n, 30))]]
+    rows = rng.choice(n, min(100, n), replace=False)
+    queries = [' '.join(texts[i].split()[:5]) + ' 질문' for i in rows]
+    noisy = vectors[rows] + 0.05 * rng.standard_normal((len(rows), vectors.shape[1]), dtype=np.float32) / np.sqrt(vectors.shape[1])
+    noisy /= np.linalg.norm(noisy, axis=1, keepdims=True)
+    embeddings = StubEmbeddings(dict(zip(queries, noisy.tolist())))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, 'db_faiss'), os.path.join(tmp, 'db_faiss_ann')
+        ids = [f"chunk-{i}" for i in range(n)]
+        build_faiss_store(embeddings, [Document(page_content=text) for text in texts], vectors, ids).save_local(src)
+        lexical = LexicalIndex.build(ids, texts)
+
+        export = lambda: export_store(src, dst, index_type=config['index_type'])
+        ingest_times, _ = time_repeated(export, config['repeat'])
+        load_times, store = time_repeated(lambda: load_store(embeddings, dst), config['repeat'])
+        retriever = HybridRetriever(vectorstore=store, lexical=lexical, k=5, mode='hybrid')
+        search_times, _ = time_repeated(lambda: retriever.search_batch(queries), config['repeat'])
+        store.docstore.close()
+    return {'vector_ingest': (ingest_times, n), 'vector_load': (load_times, n),
+            'vector_search': (search_times, len(queries))}
+
+
+BENCHMARKS = {
+    'processing': bench_processing,
+    'windowing': bench_windowing,
+    'fft': bench_fft,
+    'catboost': bench_catboost,
+    'lstm': bench_lstm,
+    'vector_store': bench_vector_store,
+}
+# 각 단계가 필요로 하는 선행 단계
+REQUIRES = {'windowing': ['processing'], 'fft': ['processing'], 'catboost': ['windowing'], 'lstm': ['processing']}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def resolve_stages(stages):
+    """선행 단계를 포함한 실행 단계 집합"""
+    needed = set(stages)
+    for stage in stages:
+        for dep in REQUIRES.get(stage, []):
+            needed |= resolve_stages([dep])
+    return needed
+
+
+def run(config):
+    ctx = {}
+    start = time.perf_counter()
+    ctx['raw'] = generate_ev_load(config['series'], config['days'], seed=config['seed'])
+    print(f"Generated {len(ctx['raw']):,} rows ({config['series']} series x {config['days']} days) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    results = []
+    requested = set(config['stages'])
+    for stage in [s for s in ALL_STAGES if s in resolve_stages(config['stages'])]:
+        measured = BENCHMARKS[stage](ctx, config)
+        if isinstance(measured, tuple):
+            measured = {stage: measured}
+        if stage not in requested:
+            continue
+        for name, (times, rows) in measured.items():
+            best, median = min(times), float(np.median(times))
+            results.append({'stage': name, 'rows': rows, 'min_sec': best, 'median_sec': median,
+                            'rows_per_sec': rows / best if best > 0 else None, 'peak_rss_mb': peak_rss_mb()})
+            print(f"{name:<18} {rows:>12,} rows  min {best:>9.4f}s  median {median:>9.4f}s  "
+                  f"{rows / best:>14,.0f} rows/sec")
+    return results
+
+
+def save_and_compare(results, config):
+    """결과 저장 후 같은 설정의 직전 실행 대비 비율(현재/이전, 1 미만이면 개선) 출력"""
+    run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+    meta = {
+        'run_id': run_id,
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+    ensure_dir(BENCHMARK_DIR)
+    (BENCHMARK_DIR / f"{run_id}.json").write_text(
+        json.dumps({'meta': meta, 'config': config, 'results': results}, ensure_ascii=False, indent=2),
+        encoding='utf-8'
+    )
+
+    current = pd.DataFrame(results).assign(**{k: config[k] for k in CONFIG_KEYS}, run_id=run_id,
+                                           git_revision=meta['git_revision'])
+    history_path = BENCHMARK_DIR / "history.csv"
+    if history_path.exists():
+        history = pd.read_csv(history_path)
+        same = history
+        for key in CONFIG_KEYS:
+            # 이전 버전 history.csv에 없는 설정 키는 비교 대상 없음으로 처리
+            same = same[same[key] == config[key]] if key in same else same.iloc[:0]
+        if len(same):
+            previous = same[same['run_id'] == same['run_id'].iloc[-1]].set_index('stage')['min_sec']
+            ratio = current.set_index('stage')['min_sec'] / previous
+            print(f"\nvs run {same['run_id'].iloc[-1]} (current/previous min_sec):")
+            print(ratio.dropna().round(3).to_string())
+        history = pd.concat([history, current], ignore_index=True)
+    else:
+        history = current
+    history.to_csv(history_path, index=False)
+    print(f"\nResults saved to {BENCHMARK_DIR / f'{run_id}.json'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="파이프라인 벤치마크")
+    parser.add_argument('--series', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365 * 5)
+    parser.add_argument('--stages', nargs='+', choices=ALL_STAGES, default=ALL_STAGES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--lookback', type=int, default=28)
+    parser.add_argument('--horizon', type=int, default=7)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--lstm-epochs', type=int, default=1)
+    parser.add_argument('--vectors', type=int, default=100_000)
+    parser.add_argument('--index-type', choices=['flat', 'ivfpq', 'hnsw'], default='ivfpq')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    config = vars(args)
+    save_and_compare(run(config), config)
@@ -0,0 +1,71 @@
+"""
+슬라이딩 윈도우 생성 벤치마크 (iloc 루프 vs 배열 연산)
+
+사용법: python scripts/benchmark_windowing.py --scales 1 10 100
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.utils.paths import DATASET_PATH
+from src.data.processing import preprocess_data, add_daily_features
+from src.dataset.windowing import build_sliding_window_samples, build_sliding_window_frame
+
+
+def scale_dataset(df, factor):
+    """충전방식별 이력을 날짜를 이어 붙여 factor배로 늘림"""
+    span = df['일자'].max() - df['일자'].min() + pd.Timedelta(days=1)
+    copies = []
+    for k in range(factor):
+        copy = df.copy()
+        copy['일자'] = copy['일자'] + span * k
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_call(func, *args, **kwargs):
+    """함수 1회 실행 시간(초)과 결과 반환"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run(scales, lookback=28, horizon=7, top_k=3):
+    base = add_daily_features(preprocess_data(pd.read_csv(DATASET_PATH)))
+    print(f"{'scale':>6} {'rows':>9} {'windows':>9} {'loop(s)':>9} {'vector(s)':>10} {'speedup':>8}")
+
+    for factor in scales:
+        df = scale_dataset(base, factor)
+        loop_sec, vec_sec, n_windows = 0.0, 0.0, 0
+
+        for c_type in df['충전방식'].unique():
+            type_df = df[df['충전방식'] == c_type]
+            t_loop, samples = time_call(build_sliding_window_samples, type_df, lookback, horizon, top_k)
+            t_vec, frame = time_call(build_sliding_window_frame, type_df, lookback, horizon, top_k)
+
+            # 두 경로의 결과가 동일한지 확인
+            pd.testing.assert_frame_equal(pd.DataFrame(samples), frame, check_exact=True)
+
+            loop_sec += t_loop
+            vec_sec += t_vec
+            n_windows += len(frame)
+
+        print(f"{factor:>6} {len(df):>9} {n_windows:>9} {loop_sec:>9.3f} {vec_sec:>10.3f} {loop_sec / vec_sec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="슬라이딩 윈도우 생성 벤치마크")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--lookback', type=int, default=28)
+    parser.add_argument('--horizon', type=int, default=7)
+    parser.add_argument('--top-k', type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.scales, args.lookback, args.horizon, args.top_k)
@@ -0,0 +1,101 @@
+"""
+저장된 CatBoost FFT 모델로 충전부하 예측 (대량 예측 / 단일 요청 지연시간 측정)
+
+사용법:
+    python scripts/evaluate.py bulk --model scripts/outputs/models/catboost_fft_model.cbm
+    python scripts/evaluate.py bulk --latest-only --output forecasts_latest.csv
+    python scripts/evaluate.py latency --requests 1000
+"""
+import sys
+import time
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.utils.paths import DATASET_PATH, get_report_path
+from src.data.processing import prepare_daily_frame
+from src.serving.forecaster import CatBoostForecaster, measure_latency
+
+
+def attach_actuals(forecaster, df, forecasts):
+    """예측에 실제 타깃 컬럼을 붙임 (예측 컬럼과 이름이 같으면 '<타깃>_actual'). 반환: (DataFrame, 실제값 컬럼)"""
+    actual = forecaster.actuals(df)
+    if actual is None or not len(actual) or not len(forecasts):
+        return forecasts, []
+    keys = ['window_end_date', 'charging_type']
+    actual['charging_type'] = actual['charging_type'].astype(str)
+    forecasts['charging_type'] = forecasts['charging_type'].astype(str)
+    forecasts = forecasts.merge(actual, on=keys, how='left', suffixes=('', '_actual'))
+    actual_cols = [f'{col}_actual' if col in forecaster.prediction_cols else col for col in forecaster.target_cols]
+    return forecasts, actual_cols
+
+
+def run_bulk(forecaster, raw, latest_only, output):
+    start = time.perf_counter()
+    df = forecaster.prepare(raw)
+    forecasts = forecaster.predict_bulk(df, latest_only=latest_only)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(forecasts)} windows in {elapsed:.3f}s ({len(forecasts) / elapsed:,.0f} windows/sec)")
+
+    # 실제 타깃이 있는 윈도우는 오차도 함께 기록 (전처리된 프레임 재사용, 특징 재계산 없음)
+    forecasts, actual_cols = attach_actuals(forecaster, df, forecasts)
+    known = forecasts[actual_cols].notna().all(axis=1) if actual_cols else pd.Series(False, index=forecasts.index)
+    if known.any():
+        errors = forecasts.loc[known, forecaster.prediction_cols].to_numpy() - forecasts.loc[known, actual_cols].to_numpy()
+        print(f"MAE on {known.sum()} windows with known targets: {np.mean(np.abs(errors)):,.1f}")
+
+    path = get_report_path(output)
+    forecasts.to_csv(path, index=False)
+    print(f"Forecasts saved to {path}")
+
+
+def run_latency(forecaster, raw, n_requests, seed=42):
+    df = prepare_daily_frame(raw)
+    rng = np.random.default_rng(seed)
+    groups = [g.sort_values('일자').reset_index(drop=True) for _, g in df.groupby('충전방식', sort=False)]
+
+    # 임의의 (충전방식, 기준일)에 대해 최근 lookback일 배열을 요청으로 구성
+    payloads = []
+    for _ in range(n_requests):
+        g = groups[rng.integers(len(groups))]
+        end = rng.integers(forecaster.lookback, len(g) + 1)
+        window = g.iloc[end - forecaster.lookback : end]
+        payloads.append((
+            window['충전방식'].iloc[-1], window['일자'].iloc[-1],
+            window['daily_total'].to_numpy(), window['peak_ratio'].to_numpy()
+        ))
+
+    stats = measure_latency(lambda p: forecaster.predict_window(*p), payloads)
+    print(json.dumps(stats, indent=2))
+    path = get_report_path('serving_latency.json')
+    path.write_text(json.dumps(stats, indent=2), encoding='utf-8')
+    print(f"Latency report saved to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CatBoost FFT 모델 예측")
+    parser.add_argument('mode', choices=['bulk', 'latency'])
+    parser.add_argument('--model', type=Path, default=None)
+    parser.add_argument('--input', type=Path, default=DATASET_PATH)
+    parser.add_argument('--lookback', type=int, default=28)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--latest-only', action='store_true')
+    parser.add_argument('--output', default='forecasts.csv')
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    kwargs = {'thread_count': args.threads} if args.threads else {}
+    forecaster = CatBoostForecaster(args.model, lookback=args.lookback, **kwargs)
+    raw = pd.read_csv(args.input)
+
+    if args.mode == 'bulk':
+        run_bulk(forecaster, raw, args.latest_only, args.output)
+    else:
+        run_latency(forecaster, raw, args.requests)
@@ -0,0 +1,55 @@
+"""
+CatBoost FFT 모델 walk-forward 교차검증 및 최종 모델 학습
+
+사용법: python scripts/train_catboost.py --folds 5 --threads 8 [--profile [--cprofile]]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.utils.paths import DATASET_PATH
+from src.utils.profiling import enable_profiling, write_profile_report
+from src.data.processing import preprocess_data, add_daily_features
+from src.dataset.windowing import build_train_df
+from src.models.catboost import (
+    DEFAULT_THREAD_COUNT, cross_validate_catboost, train_catboost, save_model, save_feature_importance
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CatBoost FFT 모델 학습")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--gap', type=int, default=7, help="학습/검증 사이 제외 일수 (horizon 이상)")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREAD_COUNT)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--lookback', type=int, default=28)
+    parser.add_argument('--horizon', type=int, default=7)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--profile', action='store_true', help="단계별 시간/메모리를 reports/train_catboost_profile.*에 기록")
+    parser.add_argument('--cprofile', action='store_true', help="--profile과 함께 cProfile 통계도 저장")
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(cprofile=args.cprofile)
+
+    df = add_daily_features(preprocess_data(pd.read_csv(DATASET_PATH)))
+    train_df = build_train_df(df, lookback=args.lookback, horizon=args.horizon, top_k=args.top_k)
+
+    params = {'iterations': args.iterations}
+    folds, _ = cross_validate_catboost(train_df, n_splits=args.folds, gap=args.gap, params=params,
+                                       thread_count=args.threads)
+    print(folds[['fold', 'n_train', 'n_val', 'mae', 'rmse', 'r2', 'wall_sec', 'rss_end_mb']].to_string(index=False))
+
+    model = train_catboost(train_df, params=params, thread_count=args.threads)
+    print(f"Model saved to {save_model(model)}")
+    print(f"Feature importance saved to {save_feature_importance(model)}")
+
+    if args.profile:
+        for path in write_profile_report('train_catboost_profile'):
+            print(f"Profile saved to {path}")
@@ -0,0 +1,162 @@
+"""
+한국전력공사 원본 충전부하 파일(CSV/XLSX) 수집 및 Parquet 저장소 관리
+
+- 인코딩 자동 판별 (UTF-8 BOM / EUC-KR(CP949))
+- 컬럼 스키마 통일: 일자, 충전방식, 0시~23시 ('01시' -> '1시', '일시'/'년월' -> '일자' 등)
+- 타입 고정: 일자 datetime64, 충전방식 category, 0시~23시 int32
+- 원본 파일 내용 해시 기반 캐시: 바뀌지 않은 파일은 다시 파싱하지 않음
+"""
+import io
+import re
+import json
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.paths import RAW_DATA_DIR, PROCESSED_DATA_DIR, ensure_dir
+
+# 기본 수집 대상 (scripts/load.ipynb에서 사용하던 파일 + 2021~2022 월별 xlsx)
+RAW_SOURCES = [
+    "한국전력공사_일자별_충전방식별_시간대별_충전부하_2020_2022.csv",
+    "한국전력공사_EV시간대별 충전부하_202101_202206.xlsx",
+    "한국전력공사_전기차 시간대별 충전부하_20231231.csv",
+    "한국전력공사_전기차 시간대별 충전부하_20240930.csv",
+]
+
+STORE_DIR = PROCESSED_DATA_DIR / "kepco_load"
+MANIFEST_NAME = "manifest.json"
+
+HOURLY_COLS = [f'{i}시' for i in range(24)]
+ENCODINGS = ('utf-8-sig', 'cp949')
+
+# 원본별 컬럼명 차이 -> 통일 컬럼명
+DATE_ALIASES = {'일자': 'daily', '일시': 'daily', '기준일': 'daily', '년월': 'monthly'}
+TYPE_ALIASES = ('충전방식', '급속/완속')
+HOUR_PATTERN = re.compile(r'^0?(\d{1,2})시(\(kW\))?$')
+
+
+def file_hash(raw_bytes):
+    """파일 내용의 SHA-256 해시"""
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+
+def detect_encoding(raw_bytes, candidates=ENCODINGS):
+    """후보 인코딩 중 오류 없이 디코딩되는 첫 번째 인코딩 반환"""
+    for encoding in candidates:
+        try:
+            raw_bytes.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"지원하지 않는 인코딩입니다 (시도: {', '.join(candidates)})")
+
+
+def normalize_schema(frame):
+    """컬럼명/타입을 통일하고 (DataFrame, 'daily' | 'monthly') 반환"""
+    rename = {}
+    granularity = None
+    for col in frame.columns:
+        name = str(col).strip()
+        hour = HOUR_PATTERN.match(name)
+        if name in DATE_ALIASES:
+            rename[col] = '일자'
+            granularity = DATE_ALIASES[name]
+        elif name in TYPE_ALIASES:
+            rename[col] = '충전방식'
+        elif hour and int(hour.group(1)) < 24:
+            rename[col] = f'{int(hour.group(1))}시'
+
+    if granularity is None or '충전방식' not in rename.values():
+        raise ValueError(f"일자/충전방식 컬럼을 찾을 수 없습니다: {list(frame.columns)}")
+
+    frame = frame.rename(columns=rename)
+    out = pd.DataFrame({
+        '일자': pd.to_datetime(frame['일자'].astype(str).str.strip()),
+        '충전방식': frame['충전방식'].astype(str).str.strip(),
+    })
+    # 누락된 시간대 컬럼은 0으로 채움 (preprocess_data와 동일한 결측 처리)
+    for col in HOURLY_COLS:
+        values = pd.to_numeric(frame[col], errors='coerce') if col in frame else 0
+        out[col] = pd.Series(values, index=out.index).fillna(0).astype('int32')
+    out['충전방식'] = out['충전방식'].astype('category')
+    return out, granularity
+
+
+def read_raw_file(path):
+    """원본 파일 1개를 읽어 (정규화된 DataFrame, 단위, 내용 해시) 반환"""
+    path = Path(path)
+    raw_bytes = path.read_bytes()
+    if path.suffix.lower() in ('.xlsx', '.xls'):
+        frame = pd.read_excel(io.BytesIO(raw_bytes))
+    else:
+        frame = pd.read_csv(io.BytesIO(raw_bytes), encoding=detect_encoding(raw_bytes))
+    frame, granularity = normalize_schema(frame)
+    return frame, granularity, file_hash(raw_bytes)
+
+
+def _load_manifest(store_dir):
+    manifest_path = Path(store_dir) / MANIFEST_NAME
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text(encoding='utf-8'))
+    return {}
+
+
+def ingest_raw_data(sources=None, store_dir=STORE_DIR, force=False):
+    """원본 파일들을 Parquet 저장소(store_dir/<단위>/<해시>.parquet)에 반영
+
+    manifest.json에 파일별 해시를 기록하며, 해시가 같으면 파싱을 건너뜀.
+    반환값: {파일명: {'hash', 'granularity', 'rows', 'path', 'cached'}}
+    """
+    store_dir = ensure_dir(Path(store_dir))
+    sources = [Path(s) if Path(s).is_absolute() else RAW_DATA_DIR / s for s in (sources or RAW_SOURCES)]
+    manifest = _load_manifest(store_dir)
+    result = {}
+
+    for path in sources:
+        entry = manifest.get(path.name)
+        digest = file_hash(path.read_bytes())
+        if not force and entry and entry['hash'] == digest and (store_dir / entry['path']).exists():
+            result[path.name] = dict(entry, cached=True)
+            continue
+
+        frame, granularity, digest = read_raw_file(path)
+        part_path = Path(granularity) / f"{digest[:16]}.parquet"
+        ensure_dir(store_dir / granularity)
+        frame.to_parquet(store_dir / part_path, index=False)
+
+        # 내용이 바뀐 파일의 이전 파티션 제거
+        if entry and entry['path'] != str(part_path.as_posix()):
+            (store_dir / entry['path']).unlink(missing_ok=True)
+
+        manifest[path.name] = {
+            'hash': digest,
+            'granularity': granularity,
+            'rows': len(frame),
+            'path': part_path.as_posix(),
+        }
+        result[path.name] = dict(manifest[path.name], cached=False)
+        print(f"Ingested {path.name}: {len(frame)} rows ({granularity})")
+
+    (store_dir / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    return result
+
+
+def load_dataset(granularity='daily', store_dir=STORE_DIR):
+    """저장소에서 해당 단위의 데이터를 읽어 (일자, 충전방식) 중복 제거 후 정렬하여 반환
+
+    같은 일자가 여러 파일에 있으면 manifest 순서상 나중 파일의 값을 사용.
+    """
+    store_dir = Path(store_dir)
+    manifest = _load_manifest(store_dir)
+    parts = [
+        pd.read_parquet(store_dir / entry['path'])
+        for entry in manifest.values() if entry['granularity'] == granularity
+    ]
+    if not parts:
+        raise FileNotFoundError(f"{store_dir}에 '{granularity}' 데이터가 없습니다. ingest_raw_data()를 먼저 실행하세요.")
+
+    df = pd.concat(parts, ignore_index=True)
+    df['충전방식'] = df['충전방식'].astype(str).astype('category')
+    df = df.drop_duplicates(['일자', '충전방식'], keep='last')
+    return df.sort_values(['일자', '충전방식']).reset_index(drop=True)
@@ -1,26 +1,95 @@
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
 
-def preprocess_data(data):
-    """데이터 기본 정제 및 타입 변환"""
-    df = data.copy()
+from src.utils.profiling import profiled
+
+HOURLY_COLS = [f'{i}시' for i in range(24)]
+PEAK_HOURS = slice(8, 20) # Peak 시간대(08-20시)
+
+def hourly_matrix(df, compact=False):
+    """0시~23시 컬럼을 (n_days, 24) 연속 NumPy 블록으로 변환 (결측치는 0)
+
+    compact=True이면 정수 데이터는 int32, 실수 데이터는 float32로 축소.
+    """
+    block = df[HOURLY_COLS].to_numpy()
+    if block.dtype == object:
+        block = block.astype(np.float64)
+    if np.issubdtype(block.dtype, np.floating) and np.isnan(block).any():
+        block = np.nan_to_num(block, nan=0.0)
+    if compact:
+        block = block.astype(_compact_dtype(block), copy=False)
+    return np.ascontiguousarray(block)
+
+def _compact_dtype(block):
+    """축소 dtype 선택: 정수는 값 범위가 맞으면 int32(무손실), 실수는 float32(정밀도 손실 가능)"""
+    if np.issubdtype(block.dtype, np.integer):
+        info = np.iinfo(np.int32)
+        if block.size == 0 or (block.min() >= info.min and block.max() <= info.max):
+            return np.int32
+        return block.dtype
+    return np.float32
+
+def _accumulator(block):
+    """축소 연산 시 오버플로/정밀도 손실을 막기 위한 누적 dtype"""
+    return np.int64 if np.issubdtype(block.dtype, np.integer) else np.float64
+
+def _clean_hourly(df, compact):
+    """시간대 컬럼을 수치형으로 정리하고 (n_days, 24) 블록 반환
+
+    결측치가 있던 컬럼만 0으로 채워 다시 쓰므로 나머지 컬럼의 dtype은 그대로 유지.
+    compact=True이면 축소된 블록 전체를 프레임에 씀.
+    """
+    for col in HOURLY_COLS:
+        if not is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    missing = df[HOURLY_COLS].isna().any()
+    for col in missing.index[missing.to_numpy()]:
+        df[col] = df[col].fillna(0)
+    block = hourly_matrix(df, compact=compact)
+    if compact:
+        df[HOURLY_COLS] = block
+    return block
+
+@profiled()
+def preprocess_data(data, inplace=False, compact=False):
+    """데이터 기본 정제 및 타입 변환
+
+    inplace=True이면 전체 프레임 복사를 생략하고 data를 직접 수정.
+    compact=True이면 0시~23시 컬럼을 int32/float32로 축소.
+    """
+    df = data if inplace else data.copy()
     df['일자'] = pd.to_datetime(df['일자'])
-    
+
     # 0시~23시 컬럼 수치형 변환 및 결측치 처리
-    hourly_cols = [f'{i}시' for i in range(24)]
-    for col in hourly_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
+    _clean_hourly(df, compact)
+
     return df
 
-def add_daily_features(df):
-    """일 단위 집계 및 시간대별 특성 추가"""
-    hourly_cols = [f'{i}시' for i in range(24)]
-    
-    # 일일 총 사용량
-    df['daily_total'] = df[hourly_cols].sum(axis=1)
-    
+@profiled()
+def add_daily_features(df, hourly=None):
+    """일 단위 집계 및 시간대별 특성 추가
+
+    hourly에 hourly_matrix() 결과를 넘기면 블록 재추출을 생략.
+    """
+    block = hourly_matrix(df) if hourly is None else hourly
+    acc = _accumulator(block)
+
+    # 일일 총 사용량 (연속 블록의 행 단위 합계 1회)
+    daily_total = block.sum(axis=1, dtype=acc)
+    df['daily_total'] = daily_total
+
     # Peak 시간대(08-20시) 비중 계산
-    peak_cols = [f'{i}시' for i in range(8, 20)]
-    df['peak_ratio'] = df[peak_cols].sum(axis=1) / (df['daily_total'] + 1e-9)
-    
-    return df
\ No newline at end of file
+    df['peak_ratio'] = block[:, PEAK_HOURS].sum(axis=1, dtype=acc) / (daily_total + 1e-9)
+
+    return df
+
+@profiled()
+def prepare_daily_frame(data, inplace=False, compact=False):
+    """preprocess_data + add_daily_features를 시간대 블록 1회 추출로 수행
+
+    compact=True이면 0시~23시 컬럼을 int32/float32로 축소 (실수 데이터는 집계값에 오차가 생길 수 있음).
+    """
+    df = data if inplace else data.copy()
+    df['일자'] = pd.to_datetime(df['일자'])
+    return add_daily_features(df, hourly=_clean_hourly(df, compact))
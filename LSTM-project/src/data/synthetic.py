@@ -0,0 +1,80 @@
+"""
+합성 전기차 충전부하 데이터 생성 (벤치마크/부하 테스트용)
+
+dataset.csv와 같은 스키마(일자, 충전방식, 0시..23시)로 생성:
+- 시간대 패턴: 실제 급속/완속 평균 시간대 분포 (급속은 낮 시간, 완속은 저녁 시간 집중)
+- 요일 패턴: 금요일 최대, 주말 감소
+- 연간 계절성(겨울 증가) + 보급 확대에 따른 로지스틱 증가 추세
+- 시리즈별 규모(로그정규), 일별/시간별 곱셈 잡음
+"""
+import numpy as np
+import pandas as pd
+
+HOURLY_COLS = [f'{i}시' for i in range(24)]
+CHARGING_KINDS = ['급속', '완속']
+
+# dataset.csv의 충전방식별 시간대 평균 부하 (상대 비율로 사용)
+HOURLY_PROFILES = {
+    '급속': [3255, 2527, 1945, 1709, 2265, 3480, 6013, 8662, 12013, 14060, 15608, 17588,
+           19338, 18594, 18913, 19346, 19544, 18481, 16960, 14786, 12268, 9589, 7375, 5251],
+    '완속': [696, 584, 334, 186, 124, 137, 242, 412, 716, 809, 901, 1010,
+           1058, 1112, 1276, 1591, 1919, 2409, 2786, 2626, 2273, 2104, 1957, 1853],
+}
+# 요일(월~일)별 일 부하 배율
+WEEKLY_FACTORS = {
+    '급속': [0.97, 0.99, 1.00, 1.02, 1.06, 0.93, 0.84],
+    '완속': [0.98, 1.00, 1.00, 1.01, 1.02, 0.93, 0.95],
+}
+# 충전방식별 일 평균 부하 (dataset.csv 기준)
+DAILY_LEVELS = {'급속': 280_000, '완속': 30_000}
+
+
+def series_names(n_series):
+    """충전방식 라벨 (2개 이하면 '급속'/'완속', 그 이상이면 '급속_00001' 형식)"""
+    if n_series <= len(CHARGING_KINDS):
+        return CHARGING_KINDS[:n_series]
+    return [f'{CHARGING_KINDS[i % 2]}_{i:05d}' for i in range(n_series)]
+
+
+def _series_block(kinds, dates, rng, noise):
+    """시리즈 묶음의 (n_series, n_days, 24) 부하 배열"""
+    n_days = len(dates)
+    t = np.arange(n_days) / 365.25
+    dayofweek = dates.dayofweek.to_numpy()
+    seasonal = 1 + 0.08 * np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 15) / 365.25)
+
+    profiles = np.array([HOURLY_PROFILES[k] for k in kinds], dtype=np.float64)
+    profiles /= profiles.sum(axis=1, keepdims=True)
+    weekly = np.array([WEEKLY_FACTORS[k] for k in kinds])[:, dayofweek]
+    level = np.array([DAILY_LEVELS[k] for k in kinds]) * rng.lognormal(0, 0.5, len(kinds))
+
+    # 시리즈별로 다른 시점/속도의 로지스틱 보급 증가
+    midpoint = rng.uniform(0.5, 3.0, (len(kinds), 1))
+    rate = rng.uniform(0.8, 2.0, (len(kinds), 1))
+    growth = 0.3 + 0.7 / (1 + np.exp(-rate * (t - midpoint)))
+
+    daily = level[:, None] * weekly * seasonal * growth * rng.lognormal(0, noise, (len(kinds), n_days))
+    hourly = daily[:, :, None] * profiles[:, None, :] * rng.lognormal(0, noise, (len(kinds), n_days, 24))
+    return np.rint(hourly)
+
+
+def generate_ev_load(n_series=2, n_days=365 * 5, start='2020-01-01', seed=42, noise=0.1,
+                     dtype=np.int64, chunk_series=256):
+    """합성 충전부하 DataFrame 생성 (충전방식, 일자 순 정렬, 행 수 = n_series * n_days)
+
+    chunk_series개 시리즈씩 생성하여 중간 배열 크기를 제한.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=n_days, freq='D')
+    names = series_names(n_series)
+
+    frames = []
+    for offset in range(0, n_series, chunk_series):
+        block_names = names[offset : offset + chunk_series]
+        kinds = [name.split('_')[0] for name in block_names]
+        hourly = _series_block(kinds, dates, rng, noise).astype(dtype)
+        frame = pd.DataFrame(hourly.reshape(-1, 24), columns=HOURLY_COLS)
+        frame.insert(0, '충전방식', np.repeat(block_names, n_days))
+        frame.insert(0, '일자', np.tile(dates.strftime('%Y-%m-%d').to_numpy(), len(block_names)))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
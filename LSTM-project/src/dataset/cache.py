@@ -0,0 +1,83 @@
+"""
+윈도우/FFT 특징 행렬 캐시
+
+build_train_df 결과를 (입력 데이터 해시, lookback, horizon, top_k, 특징 코드 버전) 키로
+PROCESSED_DATA_DIR/feature_cache/<키>.parquet에 저장하고, 같은 조건이면 다시 계산하지 않음.
+전체 용량이 max_bytes를 넘으면 가장 오래 사용하지 않은 파일부터 삭제 (LRU, 파일 mtime 기준).
+"""
+import os
+import inspect
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import PROCESSED_DATA_DIR, ensure_dir
+from src.dataset import windowing
+from src.features import fourier_transform
+from src.dataset.windowing import build_train_df, WINDOW_INPUT_COLUMNS
+
+CACHE_DIR = PROCESSED_DATA_DIR / "feature_cache"
+MAX_CACHE_BYTES = 2 * 1024**3
+
+# 특징 생성 코드가 바뀌면 캐시 키도 바뀌도록 소스 코드 자체를 해시
+FEATURE_MODULES = (windowing, fourier_transform)
+
+
+def feature_code_version():
+    """특징 생성 모듈 소스 코드의 해시"""
+    digest = hashlib.sha256()
+    for module in FEATURE_MODULES:
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def data_hash(df):
+    """윈도우 생성에 쓰이는 컬럼 내용의 해시 (행 순서 포함)"""
+    hashed = pd.util.hash_pandas_object(df[WINDOW_INPUT_COLUMNS], index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def feature_cache_key(df, lookback=28, horizon=7, top_k=3):
+    """(데이터 해시, 파라미터, 코드 버전)으로 캐시 키 생성"""
+    parts = [data_hash(df), f'lb{lookback}', f'h{horizon}', f'k{top_k}', feature_code_version()]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def cached_build_train_df(df, lookback=28, horizon=7, top_k=3, cache_dir=CACHE_DIR,
+                          max_bytes=MAX_CACHE_BYTES, **build_kwargs):
+    """캐시를 거쳐 build_train_df 결과 반환 (n_jobs, executor 등은 build_train_df에 그대로 전달)"""
+    cache_dir = ensure_dir(Path(cache_dir))
+    path = cache_dir / f"{feature_cache_key(df, lookback, horizon, top_k)}.parquet"
+
+    if path.exists():
+        os.utime(path) # LRU: 마지막 사용 시각 갱신
+        return pd.read_parquet(path)
+
+    train_df = build_train_df(df, lookback, horizon, top_k, **build_kwargs)
+    tmp_path = path.with_suffix('.tmp')
+    train_df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    evict_feature_cache(cache_dir, max_bytes)
+    return train_df
+
+
+def evict_feature_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """총 용량이 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 캐시 파일 삭제"""
+    files = sorted(Path(cache_dir).glob('*.parquet'), key=lambda p: p.stat().st_mtime)
+    sizes = np.array([p.stat().st_size for p in files], dtype=np.int64)
+    total = int(sizes.sum())
+    removed = []
+    for path, size in zip(files, sizes):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= int(size)
+        removed.append(path.name)
+    return removed
+
+
+def clear_feature_cache(cache_dir=CACHE_DIR):
+    """캐시 파일 전체 삭제"""
+    return evict_feature_cache(cache_dir, max_bytes=0)
@@ -0,0 +1,158 @@
+"""
+일 단위로 도착하는 충전부하 데이터에 대한 증분(스트리밍) 윈도우 특징 생성
+
+build_sliding_window_samples와 동일한 스키마의 샘플을 만들되, 충전방식별로
+최근 lookback일만 유지하고 새 일자가 들어올 때마다 새 윈도우만 계산한다.
+- 평균/표준편차/peak_ratio 평균: 누적합(running sum) 갱신
+- FFT: Sliding DFT 갱신 (누적 오차 방지를 위해 resync_every 스텝마다 rfft로 재계산)
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.features.fourier_transform import spectral_features
+
+
+class _TypeState:
+    """충전방식 하나의 윈도우 상태"""
+
+    def __init__(self, lookback, horizon):
+        self.daily = deque(maxlen=lookback)
+        self.peak = deque(maxlen=lookback)
+        self.recent = deque(maxlen=horizon)   # 타깃 계산용 최근 horizon일
+        self.pending = deque()                # 타깃이 아직 채워지지 않은 윈도우 특징
+        self.last_date = None
+        self.daily_sum = 0.0
+        self.daily_sq_sum = 0.0
+        self.peak_sum = 0.0
+        self.recent_sum = 0
+        self.spectrum = None                  # 현재 윈도우의 rfft 계수 (n_bins,)
+        self.steps_since_sync = 0
+        self.latest = None                    # 가장 최근 윈도우 특징 (타깃 미포함)
+
+
+class IncrementalWindowBuilder:
+    """충전방식별 최근 lookback일을 유지하며 새 일자마다 새 윈도우만 생성"""
+
+    def __init__(self, lookback=28, horizon=7, top_k=3, resync_every=None):
+        self.lookback = lookback
+        self.horizon = horizon
+        self.top_k = top_k
+        self.resync_every = resync_every or lookback
+        self.freqs = np.fft.rfftfreq(lookback)
+        # Sliding DFT 회전 인자: X'_k = (X_k - x_old + x_new) * exp(2πik/N)
+        self.twiddle = np.exp(2j * np.pi * np.arange(len(self.freqs)) / lookback)
+        self.states = {}
+
+    def update(self, row):
+        """새 일자 1행(일자, 충전방식, daily_total, peak_ratio)을 반영
+
+        horizon일 전에 끝난 윈도우의 타깃이 이번 행으로 완성되면 해당 학습 샘플(dict)을,
+        아니면 None을 반환. 반환 샘플은 build_sliding_window_samples와 같은 스키마.
+        """
+        c_type = row['충전방식']
+        date = pd.Timestamp(row['일자'])
+        value = row['daily_total']
+        state = self.states.get(c_type)
+        if state is None:
+            state = self.states[c_type] = _TypeState(self.lookback, self.horizon)
+        if state.last_date is not None and date <= state.last_date:
+            raise ValueError(f"{c_type}: 일자는 증가해야 합니다 ({date} <= {state.last_date})")
+        state.last_date = date
+
+        # 1. 타깃 윈도우(최근 horizon일) 누적합 갱신 후 완성된 샘플 방출
+        if len(state.recent) == self.horizon:
+            state.recent_sum -= state.recent[0]
+        state.recent.append(value)
+        state.recent_sum += value
+
+        sample = None
+        if len(state.pending) == self.horizon:
+            sample = state.pending.popleft()
+            sample['y_next7_total'] = state.recent_sum
+
+        # 2. 입력 윈도우 갱신 및 새 윈도우 특징 계산
+        self._push(state, value, row['peak_ratio'])
+        if len(state.daily) == self.lookback:
+            state.latest = self._window_features(state, c_type, date)
+            state.pending.append(dict(state.latest))
+
+        return sample
+
+    def update_frame(self, df):
+        """여러 행을 일자 순으로 반영하고 완성된 학습 샘플을 DataFrame으로 반환"""
+        df = df.sort_values('일자', kind='stable')
+        samples = []
+        for row in df[['일자', '충전방식', 'daily_total', 'peak_ratio']].to_dict('records'):
+            sample = self.update(row)
+            if sample is not None:
+                samples.append(sample)
+        return pd.DataFrame(samples)
+
+    def warm_start(self, df):
+        """과거 이력으로 상태를 채움 (충전방식별 마지막 lookback + horizon일만 사용)"""
+        tail = df.sort_values('일자').groupby('충전방식', sort=False).tail(self.lookback + self.horizon)
+        self.update_frame(tail)
+        return self
+
+    def latest_features(self, c_type):
+        """가장 최근 일자로 끝나는 윈도우의 특징 (스코어링용, 타깃은 NaN)"""
+        state = self.states.get(c_type)
+        if state is None or state.latest is None:
+            return None
+        return dict(state.latest)
+
+    def _push(self, state, value, peak_value):
+        """윈도우에 새 값을 넣고 누적합과 DFT 계수를 갱신"""
+        full = len(state.daily) == self.lookback
+        old_value = state.daily[0] if full else 0.0
+        old_peak = state.peak[0] if full else 0.0
+
+        state.daily.append(value)
+        state.peak.append(peak_value)
+        state.daily_sum += value - old_value
+        state.daily_sq_sum += float(value) * value - float(old_value) * old_value
+        state.peak_sum += peak_value - old_peak
+
+        if len(state.daily) < self.lookback:
+            return
+        state.steps_since_sync += 1
+        if state.spectrum is None or state.steps_since_sync >= self.resync_every:
+            self._resync(state)
+        else:
+            state.spectrum = (state.spectrum - old_value + value) * self.twiddle
+
+    def _resync(self, state):
+        """버퍼로부터 누적합과 DFT 계수를 다시 계산 (부동소수점 누적 오차 제거)"""
+        daily = np.asarray(state.daily, dtype=np.float64)
+        state.daily_sum = daily.sum()
+        state.daily_sq_sum = np.dot(daily, daily)
+        state.peak_sum = float(np.sum(state.peak))
+        state.spectrum = np.fft.rfft(daily)
+        state.steps_since_sync = 0
+
+    def _window_features(self, state, c_type, date):
+        """현재 윈도우의 특징 dict 생성 (build_sliding_window_samples와 동일한 키 순서)"""
+        n = self.lookback
+        mean = state.daily_sum / n
+        var = max(state.daily_sq_sum / n - mean * mean, 0.0)
+
+        # DC 성분은 평균 제거(detrend)로 0이 되므로 나머지 주파수 진폭만 사용
+        amplitudes = np.abs(state.spectrum)
+        amplitudes[0] = 0.0
+
+        feat = {
+            'window_end_date': date,
+            'charging_type': c_type,
+            'y_next7_total': np.nan,
+            'month': date.month,
+            'dayofweek': date.dayofweek,
+            'mean_28d': mean,
+            'std_28d': np.sqrt(var),
+            'last_day_usage': state.daily[-1],
+            'peak_ratio_mean': state.peak_sum / n
+        }
+        fft_feat = spectral_features(amplitudes[np.newaxis, :], self.freqs, top_k=self.top_k)
+        feat.update({name: values[0] for name, values in fft_feat.items()})
+        return feat
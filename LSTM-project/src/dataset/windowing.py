@@ -1,7 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
-from src.features.fourier_transform import fft_features
+from src.features.fourier_transform import fft_features, fft_features_batch
+from src.utils.profiling import profiled
 
 def build_sliding_window_samples(type_df, lookback=28, horizon=7, top_k=3):
     """특정 충전방식 데이터에 대해 슬라이딩 윈도우 샘플 생성"""
@@ -39,19 +43,279 @@ def build_sliding_window_samples(type_df, lookback=28, horizon=7, top_k=3):
         
     return samples
 
-def build_train_df(df, lookback=28, horizon=7, top_k=3):
-    """전체 데이터에 대해 충전방식별 윈도우를 생성하고 병합"""
+def _window_stats(daily, peak, lookback):
+    """끝 인덱스 lookback-1 ~ n-1의 모든 윈도우에 대한 Time-domain 통계 (윈도우 뷰 기반)"""
+    windows = sliding_window_view(daily, lookback)
+    peak_windows = sliding_window_view(peak, lookback)
+    stats = {
+        'mean_28d': windows.mean(axis=1),
+        'std_28d': windows.std(axis=1),
+        'last_day_usage': windows[:, -1],
+        'peak_ratio_mean': peak_windows.mean(axis=1)
+    }
+    return windows, stats
+
+def _assemble_window_frame(type_df, end_idx, targets, stats, fft_feat):
+    """윈도우별 배열들을 build_sliding_window_samples와 같은 컬럼 순서의 DataFrame으로 조립"""
+    n_windows = len(end_idx)
+    dates = type_df['일자'].iloc[end_idx].reset_index(drop=True)
+    frame = pd.DataFrame({
+        'window_end_date': dates,
+        'charging_type': type_df['충전방식'].values[end_idx],
+        'y_next7_total': targets,
+        'month': dates.dt.month.astype('int64'),
+        'dayofweek': dates.dt.dayofweek.astype('int64'),
+        **{name: values[:n_windows] for name, values in stats.items()}
+    })
+    fft_frame = pd.DataFrame({name: values[:n_windows] for name, values in fft_feat.items()})
+    return pd.concat([frame, fft_frame], axis=1)
+
+def build_sliding_window_frame(type_df, lookback=28, horizon=7, top_k=3):
+    """build_sliding_window_samples의 배열 연산 버전 (동일한 결과를 컬럼형 DataFrame으로 반환)"""
+    type_df = type_df.sort_values('일자').reset_index(drop=True)
+    n_rows = len(type_df)
+    n_windows = n_rows - horizon - (lookback - 1)
+    if n_windows <= 0:
+        return pd.DataFrame()
+
+    # 윈도우 끝(t) 인덱스: lookback-1 ~ n_rows-horizon-1
+    end_idx = np.arange(lookback - 1, n_rows - horizon)
+
+    # 1. (n_windows, lookback) 윈도우 뷰 (복사 없이 stride만 조정)
+    daily = type_df['daily_total'].values
+    windows, stats = _window_stats(daily, type_df['peak_ratio'].values, lookback)
+    windows = windows[:n_windows]
+
+    # t+1 ~ t+horizon 타깃 윈도우 (Leakage 방지: 입력 윈도우와 겹치지 않음)
+    targets = sliding_window_view(daily[lookback:], horizon)[:n_windows].sum(axis=1)
+
+    # 2. FFT 특징 (전체 윈도우를 한 번의 rfft로 계산) 후 3. 컬럼 조립
+    fft_feat = fft_features_batch(windows, top_k=top_k)
+    return _assemble_window_frame(type_df, end_idx, targets, stats, fft_feat)
+
+def build_inference_frame(type_df, lookback=28, top_k=3, latest_only=False):
+    """추론용 윈도우 특징 생성 (타깃 없이 마지막 일자로 끝나는 윈도우까지 포함, y_next7_total은 NaN)
+
+    latest_only=True이면 가장 최근 윈도우 1개만 계산.
+    """
+    type_df = type_df.sort_values('일자')
+    if latest_only:
+        type_df = type_df.iloc[-lookback:]
+    type_df = type_df.reset_index(drop=True)
+    n_rows = len(type_df)
+    if n_rows < lookback:
+        return pd.DataFrame()
+
+    end_idx = np.arange(lookback - 1, n_rows)
+    windows, stats = _window_stats(type_df['daily_total'].values, type_df['peak_ratio'].values, lookback)
+    targets = np.full(len(end_idx), np.nan)
+    fft_feat = fft_features_batch(windows, top_k=top_k)
+    return _assemble_window_frame(type_df, end_idx, targets, stats, fft_feat)
+
+@profiled()
+def build_inference_df(df, lookback=28, top_k=3, latest_only=False):
+    """전체 충전방식에 대해 추론용 윈도우 특징을 생성하고 시간 순으로 병합"""
+    frames = [
+        build_inference_frame(type_df, lookback, top_k, latest_only)
+        for _, type_df in df.groupby('충전방식', sort=False, dropna=False)
+    ]
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame()
+    return _sort_windows(pd.concat(frames, ignore_index=True))
+
+def build_target_frame(df, lookback=28, horizon=7, level=None):
+    """윈도우별 실제 타깃만 계산 (특징/FFT 없이, 평가용)
+
+    level=None이면 y_next7_total(horizon일 합계), 'daily'/'hourly'이면 multi_horizon_target_columns 타깃.
+    행은 build_train_df / build_multi_horizon_df와 같은 윈도우, 같은 정렬.
+    """
+    frames = []
+    for _, type_df in df.groupby('충전방식', sort=False, dropna=False):
+        type_df = type_df.sort_values('일자').reset_index(drop=True)
+        n_windows = len(type_df) - horizon - (lookback - 1)
+        if n_windows <= 0:
+            continue
+        end_idx = np.arange(lookback - 1, len(type_df) - horizon)
+        frame = pd.DataFrame({
+            'window_end_date': type_df['일자'].iloc[end_idx].reset_index(drop=True),
+            'charging_type': type_df['충전방식'].values[end_idx],
+        })
+        if level is None:
+            frame['y_next7_total'] = sliding_window_view(type_df['daily_total'].values[lookback:], horizon)[:n_windows].sum(axis=1)
+        else:
+            targets = _multi_horizon_targets(type_df, lookback, horizon, n_windows, level)
+            frame = pd.concat([frame, pd.DataFrame(targets, columns=multi_horizon_target_columns(horizon, level))], axis=1)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    return _sort_windows(pd.concat(frames, ignore_index=True))
+
+# 워커에 전달할 최소 컬럼 (전체 DataFrame을 pickle하지 않기 위함)
+WINDOW_INPUT_COLUMNS = ['일자', '충전방식', 'daily_total', 'peak_ratio']
+
+def _build_group_chunk(group_columns, lookback, horizon, top_k, vectorized):
+    """워커에서 충전방식 그룹 묶음의 윈도우 생성 (그룹별 컬럼 배열 dict 리스트 입력)"""
+    build = build_sliding_window_frame if vectorized else build_sliding_window_samples
+    return [build(pd.DataFrame(columns), lookback, horizon, top_k) for columns in group_columns]
+
+def _build_groups_parallel(groups, lookback, horizon, top_k, vectorized, n_jobs, executor):
+    """충전방식 그룹을 묶음 단위로 나누어 프로세스/스레드 풀에서 처리 (입력 순서대로 반환)"""
+    # 그룹별로 필요한 컬럼의 NumPy 배열만 잘라서 전달
+    group_columns = [
+        {col: type_df[col].to_numpy() for col in WINDOW_INPUT_COLUMNS}
+        for _, type_df in groups
+    ]
+    chunk_size = max(1, -(-len(group_columns) // (n_jobs * 4)))
+    chunks = [group_columns[i : i + chunk_size] for i in range(0, len(group_columns), chunk_size)]
+
+    pool_cls = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    with pool_cls(max_workers=n_jobs) as pool:
+        futures = [
+            pool.submit(_build_group_chunk, chunk, lookback, horizon, top_k, vectorized)
+            for chunk in chunks
+        ]
+        return [result for future in futures for result in future.result()]
+
+@profiled()
+def build_train_df(df, lookback=28, horizon=7, top_k=3, vectorized=True, n_jobs=1, executor='process', verbose=True):
+    """전체 데이터에 대해 충전방식별 윈도우를 생성하고 병합
+
+    n_jobs > 1이면 충전방식 그룹을 executor('process' 또는 'thread') 풀에서 병렬 처리.
+    결과는 window_end_date, charging_type 순으로 정렬되므로 n_jobs와 무관하게 동일.
+    """
+    if executor not in ('process', 'thread'):
+        raise ValueError(f"executor는 'process' 또는 'thread'여야 합니다: {executor}")
+
     all_samples = []
-    charging_types = df['충전방식'].unique()
-    
-    for c_type in charging_types:
-        type_df = df[df['충전방식'] == c_type]
-        type_samples = build_sliding_window_samples(type_df, lookback, horizon, top_k)
-        all_samples.extend(type_samples)
-        print(f"Windows generated for {c_type}: {len(type_samples)}")
-        
-    train_df = pd.DataFrame(all_samples)
-    
-    # 시간 순 정렬 (중요: 검증 시 Leakage 방지)
-    train_df = train_df.sort_values(['window_end_date', 'charging_type']).reset_index(drop=True)
-    return train_df
\ No newline at end of file
+    groups = list(df.groupby('충전방식', sort=False, dropna=False))
+
+    if n_jobs > 1 and len(groups) > 1:
+        results = _build_groups_parallel(groups, lookback, horizon, top_k, vectorized, n_jobs, executor)
+    else:
+        build = build_sliding_window_frame if vectorized else build_sliding_window_samples
+        results = (build(type_df, lookback, horizon, top_k) for _, type_df in groups)
+
+    for (c_type, _), type_samples in zip(groups, results):
+        if vectorized:
+            if len(type_samples):
+                all_samples.append(type_samples)
+        else:
+            all_samples.extend(type_samples)
+        if verbose:
+            print(f"Windows generated for {c_type}: {len(type_samples)}")
+
+    if vectorized:
+        train_df = pd.concat(all_samples, ignore_index=True)
+    else:
+        train_df = pd.DataFrame(all_samples)
+
+    return _sort_windows(train_df)
+
+def _sort_windows(train_df):
+    """시간 순 정렬 (중요: 검증 시 Leakage 방지)"""
+    return train_df.sort_values(['window_end_date', 'charging_type']).reset_index(drop=True)
+
+@profiled()
+def build_train_df_sweep(df, lookbacks=(28,), horizons=(7,), top_ks=(3,), verbose=True):
+    """lookback x horizon x top_k 격자의 모든 조합에 대한 build_train_df 결과를 한 번에 생성
+
+    겹치는 계산은 한 번만 수행:
+    - 충전방식별 정렬/배열 추출: 1회
+    - 타깃 합계: 충전방식별 누적합 1회로 모든 horizon 처리 (정수형 데이터, 실수형은 윈도우 합)
+    - 평균/표준편차/peak_ratio 및 rfft: lookback당 1회, 모든 horizon/top_k가 공유
+      (top_k는 가장 큰 값으로 한 번 계산한 뒤 앞쪽 K개만 사용)
+    반환값: {(lookback, horizon, top_k): train_df}
+    """
+    grid = [(lb, h, k) for lb in lookbacks for h in horizons for k in top_ks]
+    max_k = max(top_ks)
+    parts = {cfg: [] for cfg in grid}
+
+    for c_type, type_df in df.groupby('충전방식', sort=False, dropna=False):
+        type_df = type_df.sort_values('일자').reset_index(drop=True)
+        n_rows = len(type_df)
+        daily = type_df['daily_total'].values
+        peak = type_df['peak_ratio'].values
+        if np.issubdtype(daily.dtype, np.integer):
+            cumsum = np.concatenate([[0], np.cumsum(daily, dtype=np.int64)])
+
+        for lookback in lookbacks:
+            if n_rows < lookback:
+                continue
+            windows, stats = _window_stats(daily, peak, lookback)
+            fft_feat = fft_features_batch(windows, top_k=max_k)
+
+            for horizon in horizons:
+                n_windows = n_rows - horizon - (lookback - 1)
+                if n_windows <= 0:
+                    continue
+                end_idx = np.arange(lookback - 1, n_rows - horizon)
+                if np.issubdtype(daily.dtype, np.integer):
+                    targets = cumsum[end_idx + 1 + horizon] - cumsum[end_idx + 1]
+                else:
+                    targets = sliding_window_view(daily[lookback:], horizon)[:n_windows].sum(axis=1)
+
+                for top_k in top_ks:
+                    k = min(top_k, lookback // 2 + 1)
+                    keep = {
+                        name: values for name, values in fft_feat.items()
+                        if not name.startswith('fft_') or int(name.rsplit('_', 1)[1]) < k
+                    }
+                    frame = _assemble_window_frame(type_df, end_idx, targets, stats, keep)
+                    parts[(lookback, horizon, top_k)].append(frame)
+
+        if verbose:
+            print(f"Sweep windows generated for {c_type}: {len(grid)} configs")
+
+    return {
+        cfg: _sort_windows(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+        for cfg, frames in parts.items()
+    }
+
+# 다중 horizon 타깃 (일별: y_d1..y_dH, 시간대별: y_d1_h00..y_dH_h23)
+HOURLY_TARGET_SOURCE = [f'{i}시' for i in range(24)]
+
+def multi_horizon_target_columns(horizon=7, level='daily'):
+    """다중 horizon 타깃 컬럼 이름 (level: 'daily' 또는 'hourly')"""
+    if level == 'daily':
+        return [f'y_d{d}' for d in range(1, horizon + 1)]
+    if level == 'hourly':
+        return [f'y_d{d}_h{h:02d}' for d in range(1, horizon + 1) for h in range(24)]
+    raise ValueError(f"level은 'daily' 또는 'hourly'여야 합니다: {level}")
+
+def _multi_horizon_targets(type_df, lookback, horizon, n_windows, level):
+    """윈도우별 t+1 ~ t+horizon 타깃 행렬 (n_windows, horizon) 또는 (n_windows, horizon * 24)"""
+    if level == 'daily':
+        return sliding_window_view(type_df['daily_total'].values[lookback:], horizon)[:n_windows]
+    hourly = type_df[HOURLY_TARGET_SOURCE].to_numpy()[lookback:]
+    # (n, 24, horizon) 뷰 -> (n, horizon, 24) -> 일자 우선 순서로 펼침
+    views = sliding_window_view(hourly, horizon, axis=0)[:n_windows]
+    return views.transpose(0, 2, 1).reshape(n_windows, horizon * 24)
+
+def build_multi_horizon_frame(type_df, lookback=28, horizon=7, top_k=3, level='daily'):
+    """build_sliding_window_frame과 같은 특징에 1..horizon일 타깃 행렬을 붙인 DataFrame
+
+    y_next7_total(horizon일 합계)도 유지하므로 기존 단일 타깃 모델과 같은 행으로 비교 가능.
+    """
+    target_cols = multi_horizon_target_columns(horizon, level)
+    frame = build_sliding_window_frame(type_df, lookback, horizon, top_k)
+    if not len(frame):
+        return frame
+
+    type_df = type_df.sort_values('일자').reset_index(drop=True)
+    targets = _multi_horizon_targets(type_df, lookback, horizon, len(frame), level)
+    return pd.concat([frame, pd.DataFrame(targets, columns=target_cols)], axis=1)
+
+@profiled()
+def build_multi_horizon_df(df, lookback=28, horizon=7, top_k=3, level='daily', verbose=True):
+    """전체 충전방식에 대해 다중 horizon 학습 데이터를 한 번에 생성 (window_end_date, charging_type 순 정렬)"""
+    frames = []
+    for c_type, type_df in df.groupby('충전방식', sort=False, dropna=False):
+        frame = build_multi_horizon_frame(type_df, lookback, horizon, top_k, level)
+        if len(frame):
+            frames.append(frame)
+        if verbose:
+            print(f"Multi-horizon windows generated for {c_type}: {len(frame)}")
+    if not frames:
+        return pd.DataFrame()
+    return _sort_windows(pd.concat(frames, ignore_index=True))
\ No newline at end of file
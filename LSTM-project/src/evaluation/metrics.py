@@ -0,0 +1,136 @@
+"""
+회귀 평가 지표 (MAE, MSE, RMSE, R2, 피어슨 상관계수, 정규화 MAE 기반 Accuracy)
+
+- regression_metrics: 전체 배열에 대해 한 번의 순회로 모든 지표 계산
+- MetricAccumulator: 배치 단위로 누적합만 갱신하는 스트리밍 버전 (전체 배열을 메모리에 두지 않음)
+- GroupedMetricAccumulator: 그룹(예: charging_type)별 스트리밍 지표
+
+지표는 모두 아래 누적합으로부터 계산하며, 큰 값에서의 자릿수 손실을 줄이기 위해
+y_true/y_pred는 shift(기본: 첫 배치 y_true 평균)만큼 이동한 값으로 누적.
+"""
+import numpy as np
+import pandas as pd
+
+# 누적합 항목: 개수, Σt, Σp, Σt², Σp², Σtp, Σ|p-t|, Σ(p-t)²
+SUM_FIELDS = ('n', 'st', 'sp', 'stt', 'spp', 'stp', 'sae', 'sse')
+
+
+def _batch_sums(y_true, y_pred, shift):
+    """배치 1개의 누적합 벡터 (SUM_FIELDS 순서)"""
+    t = np.asarray(y_true, dtype=np.float64).ravel() - shift
+    p = np.asarray(y_pred, dtype=np.float64).ravel() - shift
+    err = p - t
+    return np.array([t.size, t.sum(), p.sum(), t @ t, p @ p, t @ p, np.abs(err).sum(), err @ err])
+
+
+def _metrics_from_sums(sums, shift):
+    """누적합 벡터로부터 지표 dict 계산"""
+    n, st, sp, stt, spp, stp, sae, sse = sums
+    if n == 0:
+        return {'n': 0, 'mae': np.nan, 'mse': np.nan, 'rmse': np.nan, 'r2': np.nan,
+                'pearson_corr': np.nan, 'accuracy': np.nan}
+
+    ss_true = stt - st * st / n
+    ss_pred = spp - sp * sp / n
+    cov = stp - st * sp / n
+    mae = sae / n
+    mse = sse / n
+    mean_true = shift + st / n
+    return {
+        'n': int(n),
+        'mae': mae,
+        'mse': mse,
+        'rmse': np.sqrt(mse),
+        'r2': 1 - sse / ss_true if ss_true > 0 else np.nan,
+        'pearson_corr': cov / np.sqrt(ss_true * ss_pred) if ss_true > 0 and ss_pred > 0 else np.nan,
+        'accuracy': max(0, 1 - mae / (mean_true + 1e-8)) * 100,  # 정규화 MAE 기반, 하한 0
+    }
+
+
+def regression_metrics(y_true, y_pred):
+    """MAE, MSE, RMSE, R2, 피어슨 상관계수, Accuracy를 한 번의 순회로 계산"""
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    shift = y_true.mean() if y_true.size else 0.0
+    return _metrics_from_sums(_batch_sums(y_true, y_pred, shift), shift)
+
+
+class MetricAccumulator:
+    """배치 단위로 갱신하는 스트리밍 회귀 지표
+
+    scale/offset을 주면 y = raw * scale + offset으로 역정규화한 값에 대해 지표 계산
+    (with_minmax_scaler로 MinMaxScaler의 inverse_transform과 동일하게 설정 가능).
+    """
+
+    def __init__(self, scale=1.0, offset=0.0, shift=None):
+        self.scale = scale
+        self.offset = offset
+        self.shift = shift
+        self.sums = np.zeros(len(SUM_FIELDS))
+
+    @classmethod
+    def with_minmax_scaler(cls, scaler, **kwargs):
+        """단일 컬럼 MinMaxScaler의 역변환을 적용하는 누적기"""
+        return cls(scale=1.0 / scaler.scale_[0], offset=-scaler.min_[0] / scaler.scale_[0], **kwargs)
+
+    def _transform(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if self.scale != 1.0 or self.offset != 0.0:
+            values = values * self.scale + self.offset
+        return values
+
+    def update(self, y_true, y_pred):
+        """배치 1개 반영"""
+        y_true, y_pred = self._transform(y_true), self._transform(y_pred)
+        if self.shift is None and y_true.size:
+            self.shift = y_true.mean()
+        self.sums += _batch_sums(y_true, y_pred, self.shift or 0.0)
+        return self
+
+    def result(self):
+        """현재까지 누적된 지표 dict"""
+        return _metrics_from_sums(self.sums, self.shift or 0.0)
+
+
+class GroupedMetricAccumulator(MetricAccumulator):
+    """그룹별 스트리밍 회귀 지표 (배치마다 bincount로 그룹별 누적합 갱신)"""
+
+    def __init__(self, scale=1.0, offset=0.0, shift=None):
+        super().__init__(scale, offset, shift)
+        self.group_index = {}
+        self.group_sums = np.zeros((0, len(SUM_FIELDS)))
+
+    def update(self, groups, y_true, y_pred):
+        """배치 1개 반영 (groups: y_true와 같은 길이의 그룹 라벨)"""
+        y_true, y_pred = self._transform(y_true), self._transform(y_pred)
+        if self.shift is None and y_true.size:
+            self.shift = y_true.mean()
+        shift = self.shift or 0.0
+
+        codes, labels = pd.factorize(np.asarray(groups).ravel())
+        rows = np.array([self.group_index.setdefault(label, len(self.group_index)) for label in labels], dtype=np.int64)
+        if len(self.group_index) > len(self.group_sums):
+            pad = np.zeros((len(self.group_index) - len(self.group_sums), len(SUM_FIELDS)))
+            self.group_sums = np.vstack([self.group_sums, pad])
+
+        t, p = y_true - shift, y_pred - shift
+        err = p - t
+        n_groups = len(labels)
+        batch = np.column_stack([
+            np.bincount(codes, minlength=n_groups),
+            np.bincount(codes, t, n_groups),
+            np.bincount(codes, p, n_groups),
+            np.bincount(codes, t * t, n_groups),
+            np.bincount(codes, p * p, n_groups),
+            np.bincount(codes, t * p, n_groups),
+            np.bincount(codes, np.abs(err), n_groups),
+            np.bincount(codes, err * err, n_groups),
+        ])
+        np.add.at(self.group_sums, rows, batch)
+        self.sums += batch.sum(axis=0)
+        return self
+
+    def group_results(self):
+        """그룹별 지표 DataFrame (index: 그룹 라벨)"""
+        shift = self.shift or 0.0
+        records = {label: _metrics_from_sums(self.group_sums[row], shift) for label, row in self.group_index.items()}
+        return pd.DataFrame.from_dict(records, orient='index')
@@ -1,33 +1,66 @@
 import numpy as np
 from scipy.stats import entropy
 
+from src.utils.profiling import profiled
+
 def fft_features(daily_seq, top_k=3):
     """주어진 시퀀스(28일)에 대해 FFT 특징 추출"""
-    n = len(daily_seq) # n = 28
-    detrended_seq = daily_seq - np.mean(daily_seq) # daily_seq에서 평균 뺀 행렬(DC Offset 제거)
-    fft_vals = np.fft.rfft(detrended_seq) # Discreate Fourier Transform
-    amplitudes = np.abs(fft_vals) # 복소평면 속 유클리디안 거리 -> 진폭 계산
-    freqs = np.fft.rfftfreq(n) # 주파수 행렬 생성
-    
+    # 배치 버전에 윈도우 1개를 넘겨 계산 (두 경로의 결과가 항상 동일)
+    batch = fft_features_batch(np.asarray(daily_seq)[np.newaxis, :], top_k=top_k)
+    return {name: values[0] for name, values in batch.items()}
+
+@profiled()
+def fft_features_batch(windows, top_k=3, dtype=None):
+    """(n_windows, lookback) 행렬의 모든 윈도우에 대해 FFT 특징을 한 번에 추출
+
+    윈도우별 dict 없이 특징 이름 -> (n_windows,) 배열의 dict를 반환.
+    dtype=np.float32로 주면 대규모 백필 시 메모리를 절반으로 줄일 수 있음.
+    """
+    windows = np.asarray(windows)
+    if dtype is not None:
+        windows = windows.astype(dtype, copy=False)
+    elif not np.issubdtype(windows.dtype, np.floating):
+        windows = windows.astype(np.float64)
+    n_windows, n = windows.shape
+
+    detrended = windows - windows.mean(axis=1, keepdims=True) # 윈도우별 DC Offset 제거
+    fft_vals = np.fft.rfft(detrended, axis=1) # 모든 윈도우를 한 번의 rfft로 변환
+    amplitudes = np.abs(fft_vals) # (n_windows, n//2 + 1)
+    freqs = np.fft.rfftfreq(n).astype(windows.dtype, copy=False)
+
+    return spectral_features(amplitudes, freqs, top_k=top_k)
+
+def spectral_features(amplitudes, freqs, top_k=3):
+    """(n_windows, n_bins) 진폭 행렬로부터 상위 K 진폭/주파수, 파워, 엔트로피 특징 계산"""
+    n_windows, n_bins = amplitudes.shape
     features = {}
-    
-    # 상위 K개 진폭 및 해당 주파수
-    top_indices = np.argsort(amplitudes)[-top_k:][::-1] # 상위 진폭 3개 추출
-    for j, idx in enumerate(top_indices): # j=0,1,2; idx=진폭 인덱스 6개 Feature 생성
-        features[f'fft_amp_{j}'] = amplitudes[idx]
+
+    # 상위 K개 진폭 및 해당 주파수 (argpartition으로 후보만 뽑은 뒤 K개만 정렬)
+    k = min(top_k, n_bins)
+    if k < n_bins:
+        candidates = np.argpartition(amplitudes, n_bins - k, axis=1)[:, n_bins - k:]
+    else:
+        candidates = np.broadcast_to(np.arange(n_bins), (n_windows, n_bins))
+    # 진폭 내림차순, 동률이면 높은 인덱스 우선 (기존 argsort(...)[::-1]과 동일한 순서)
+    order = np.lexsort((-candidates, -np.take_along_axis(amplitudes, candidates, axis=1)), axis=1)
+    top_indices = np.take_along_axis(candidates, order, axis=1)
+    for j in range(k):
+        idx = top_indices[:, j]
+        features[f'fft_amp_{j}'] = amplitudes[np.arange(n_windows), idx]
         features[f'fft_freq_{j}'] = freqs[idx]
-        
+
     # Spectral
-    psd = amplitudes**2 # Power Spectral Density, 28일 주기, 14일 주기, ... 2일 주기, 1일 주기 신호의 에너지 분포
-    features['total_power'] = np.sum(psd) # 전체 에너지 합
-    
+    psd = amplitudes**2
+    total_power = psd.sum(axis=1)
+    features['total_power'] = total_power
+
     # Spectral Entropy
-    psd_norm = psd / (np.sum(psd) + 1e-9) # 확률분포 정규화
-    features['spectral_entropy'] = entropy(psd_norm) # 엔트로피 계산
-    
+    psd_norm = psd / (total_power[:, np.newaxis] + 1e-9)
+    features['spectral_entropy'] = entropy(psd_norm, axis=1)
+
     # Band Power
-    mid_idx = len(psd) // 2
-    features['low_freq_power'] = np.sum(psd[:mid_idx]) # 저주파 에너지 합
-    features['high_freq_power'] = np.sum(psd[mid_idx:]) # 고주파 에너지 합
-    
-    return features
\ No newline at end of file
+    mid_idx = n_bins // 2
+    features['low_freq_power'] = psd[:, :mid_idx].sum(axis=1)
+    features['high_freq_power'] = psd[:, mid_idx:].sum(axis=1)
+
+    return features
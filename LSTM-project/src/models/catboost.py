@@ -0,0 +1,340 @@
+"""
+CatBoost FFT 특징 모델 학습/검증
+
+build_train_df 결과(train_df)를 입력으로 사용:
+- window_end_date 기준 walk-forward(확장 윈도우) 교차검증, 타깃 기간 겹침 방지를 위한 gap
+- 전체 데이터로 양자화(quantized) Pool을 한 번 만들어 디스크에 캐시하고 fold마다 slice로 재사용
+- thread_count 명시
+- 검증 fold는 학습 곡선 기록에만 사용 (use_best_model=False). 조기 종료 파라미터를 주면 학습 구간
+  마지막 일부를 내부 검증으로 떼어 조기 종료하고, 바깥 검증 fold는 채점에만 사용
+- fold별 소요 시간/메모리 사용량을 outputs/reports에 기록
+- 다중 horizon 타깃(y_d1..y_dH, build_multi_horizon_df)은 MultiRMSE 모델 1개로 학습/예측
+"""
+import os
+import json
+import time
+import re
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor, Pool
+
+from src.utils.paths import PROCESSED_DATA_DIR, OUTPUTS_DIR, ensure_dir, get_model_path, get_report_path
+from src.utils.resources import rss_mb, peak_rss_mb
+from src.evaluation.metrics import regression_metrics, GroupedMetricAccumulator
+from src.utils.profiling import profiled
+
+TARGET_COL = 'y_next7_total'
+DATE_COL = 'window_end_date'
+CAT_FEATURES = ['charging_type']
+NON_FEATURE_COLS = [DATE_COL, TARGET_COL]
+MULTI_TARGET_PATTERN = re.compile(r'^y_d\d+(_h\d+)?$')
+
+POOL_CACHE_DIR = PROCESSED_DATA_DIR / "catboost_pools"
+EARLY_STOPPING_PARAMS = ('early_stopping_rounds', 'od_type', 'od_wait', 'od_pval')
+INNER_VAL_FRACTION = 0.2  # 조기 종료용 내부 검증 구간 비율 (학습 구간의 마지막 일자들)
+DEFAULT_THREAD_COUNT = os.cpu_count() or 1
+DEFAULT_PARAMS = {
+    'iterations': 500,
+    'learning_rate': 0.05,
+    'depth': 6,
+    'loss_function': 'MAE',
+    'random_seed': 42,
+    'train_dir': str(OUTPUTS_DIR / 'catboost_info'),
+}
+
+
+def resolve_params(params=None):
+    """기본 파라미터에 사용자 파라미터를 덮어쓰고 학습 로그 디렉토리 생성"""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    if params.get('train_dir'):
+        ensure_dir(Path(params['train_dir']))
+    return params
+
+
+def feature_columns(train_df):
+    """학습에 사용할 특징 컬럼 (날짜/타깃 제외, train_df 컬럼 순서 유지)"""
+    return [col for col in train_df.columns
+            if col not in NON_FEATURE_COLS and not MULTI_TARGET_PATTERN.match(col)]
+
+
+def multi_target_columns(train_df):
+    """다중 horizon 타깃 컬럼 (y_d1..y_dH 또는 y_d1_h00..y_dH_h23, train_df 컬럼 순서 유지)"""
+    return [col for col in train_df.columns if MULTI_TARGET_PATTERN.match(col)]
+
+
+def feature_frame(train_df, features=None):
+    """CatBoost 입력용 특징 DataFrame (범주형 컬럼은 문자열로 변환)"""
+    features = features or feature_columns(train_df)
+    X = train_df[features].copy()
+    for col in CAT_FEATURES:
+        if col in X:
+            X[col] = X[col].astype(str)
+    return X
+
+
+def make_pool(train_df, features=None, thread_count=DEFAULT_THREAD_COUNT, target_cols=None):
+    """train_df로부터 CatBoost Pool 생성 (target_cols를 주면 다중 타깃 label 행렬 사용)"""
+    X = feature_frame(train_df, features)
+    cat_features = [col for col in CAT_FEATURES if col in X]
+    if target_cols:
+        label = train_df[target_cols].to_numpy(dtype=np.float64)
+    else:
+        label = train_df[TARGET_COL].to_numpy() if TARGET_COL in train_df else None
+    return Pool(X, label=label, cat_features=cat_features, thread_count=thread_count)
+
+
+@profiled()
+def load_or_build_quantized_pool(train_df, features=None, thread_count=DEFAULT_THREAD_COUNT,
+                                 border_count=254, cache_dir=POOL_CACHE_DIR):
+    """양자화 Pool을 (특징/타깃 데이터 해시, 컬럼 이름, Pool 구성 설정) 키로 디스크에 캐시하여 반환
+
+    값이 같아도 특징 컬럼 구성이나 범주형 설정이 다르면 호환되지 않는 Pool이므로 키에 포함.
+    """
+    features = features or feature_columns(train_df)
+    hashed = pd.util.hash_pandas_object(train_df[features + [TARGET_COL]], index=False)
+    settings = {
+        'features': features,
+        'target': TARGET_COL,
+        'cat_features': [col for col in CAT_FEATURES if col in features],
+        'border_count': border_count,
+    }
+    key = json.dumps(settings, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    digest = hashlib.sha256(hashed.to_numpy().tobytes() + b'|' + key).hexdigest()[:32]
+    path = Path(cache_dir) / f"{digest}.bin"
+
+    if path.exists():
+        return Pool(f"quantized://{path}")
+
+    pool = make_pool(train_df, features, thread_count)
+    pool.quantize(border_count=border_count)
+    ensure_dir(Path(cache_dir))
+    pool.save(str(path))
+    return pool
+
+
+def walk_forward_splits(dates, n_splits=5, gap=7, max_train_days=None):
+    """window_end_date 기준 walk-forward 분할 (train_idx, val_idx) 생성
+
+    고유 일자를 n_splits+1개 구간으로 나누어 k번째 fold는 k+1번째 구간을 검증에 사용.
+    학습은 검증 시작일 gap일 전까지(타깃 t+1~t+horizon이 검증 기간과 겹치지 않도록)만 사용하며,
+    max_train_days를 주면 확장 윈도우 대신 최근 max_train_days일만 사용.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    unique = np.unique(dates)
+    if len(unique) < n_splits + 1:
+        raise ValueError(f"일자 수({len(unique)})가 fold 수({n_splits})보다 적습니다.")
+    bounds = np.linspace(0, len(unique), n_splits + 2).astype(int)
+
+    for k in range(n_splits):
+        val_start, val_end = unique[bounds[k + 1]], unique[bounds[k + 2] - 1]
+        train_end = val_start - np.timedelta64(gap, 'D')
+        train_mask = dates < train_end
+        if max_train_days is not None:
+            train_mask &= dates >= train_end - np.timedelta64(max_train_days, 'D')
+        val_mask = (dates >= val_start) & (dates <= val_end)
+        if not train_mask.any():
+            continue
+        yield np.flatnonzero(train_mask), np.flatnonzero(val_mask)
+
+
+def inner_split(dates, train_idx, gap=7, fraction=INNER_VAL_FRACTION):
+    """학습 구간 안의 조기 종료용 (내부 학습, 내부 검증) 분할
+
+    학습 구간 고유 일자의 마지막 fraction을 내부 검증으로 쓰고, 그보다 gap일 이전까지만 내부 학습에 사용.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    train_dates = dates[train_idx]
+    unique = np.unique(train_dates)
+    cut = unique[min(int(len(unique) * (1 - fraction)), len(unique) - 1)]
+    inner_train = train_idx[train_dates < cut - np.timedelta64(gap, 'D')]
+    inner_val = train_idx[train_dates >= cut]
+    return inner_train, inner_val
+
+
+def fit_fold(params, pool, dates, train_idx, val_idx, gap=7, thread_count=DEFAULT_THREAD_COUNT):
+    """fold 모델 학습 (검증 fold로 트리 수를 고르지 않아 fold 지표가 낙관적으로 편향되지 않음)
+
+    기본은 검증 fold를 eval_set(학습 곡선 기록)으로만 주고 use_best_model=False로 전체 iterations 사용.
+    params에 조기 종료 설정이 있으면 inner_split의 내부 검증으로 조기 종료.
+    """
+    model = CatBoostRegressor(**params, thread_count=thread_count, verbose=False)
+    if any(key in params for key in EARLY_STOPPING_PARAMS):
+        inner_train, inner_val = inner_split(dates, train_idx, gap)
+        if len(inner_train) and len(inner_val):
+            model.fit(pool.slice(inner_train), eval_set=pool.slice(inner_val), use_best_model=True)
+            return model
+    model.fit(pool.slice(train_idx), eval_set=pool.slice(val_idx), use_best_model=False)
+    return model
+
+
+def _fold_metrics(y_true, y_pred):
+    """fold 리포트용 회귀 지표 (MAE/MSE/RMSE/R2/피어슨/Accuracy)"""
+    metrics = regression_metrics(y_true, y_pred)
+    metrics.pop('n')
+    return {name: float(value) for name, value in metrics.items()}
+
+
+@profiled()
+def cross_validate_catboost(train_df, n_splits=5, gap=7, max_train_days=None, params=None,
+                            thread_count=DEFAULT_THREAD_COUNT, border_count=254,
+                            pool_cache_dir=POOL_CACHE_DIR, report_name='catboost_cv'):
+    """walk-forward 교차검증 수행 후 fold별 결과 DataFrame과 모델 리스트 반환
+
+    fold별 지표, 학습/예측 시간, CPU 시간, 메모리(RSS)를 reports/<report_name>_folds.csv와
+    reports/<report_name>_summary.json에, 충전방식별 지표를 reports/<report_name>_by_type.csv에 저장.
+    """
+    params = resolve_params(params)
+    features = feature_columns(train_df)
+
+    # 1. Pool은 한 번만 만들고(또는 캐시에서 읽고) fold마다 slice
+    start = time.perf_counter()
+    pool = load_or_build_quantized_pool(train_df, features, thread_count, border_count, pool_cache_dir)
+    pool_sec = time.perf_counter() - start
+    X_all = feature_frame(train_df, features)
+    y_all = train_df[TARGET_COL].to_numpy(dtype=np.float64)
+
+    records, models = [], []
+    by_type = GroupedMetricAccumulator()
+    splits = walk_forward_splits(train_df[DATE_COL], n_splits, gap, max_train_days)
+    for fold, (train_idx, val_idx) in enumerate(splits, 1):
+        rss_start = rss_mb()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+        model = fit_fold(params, pool, train_df[DATE_COL], train_idx, val_idx, gap, thread_count)
+        fit_sec = time.perf_counter() - wall_start
+
+        predict_start = time.perf_counter()
+        pred = model.predict(X_all.iloc[val_idx], thread_count=thread_count)
+        predict_sec = time.perf_counter() - predict_start
+        by_type.update(train_df['charging_type'].iloc[val_idx].astype(str), y_all[val_idx], pred)
+
+        records.append({
+            'fold': fold,
+            'train_start': train_df[DATE_COL].iloc[train_idx].min(),
+            'train_end': train_df[DATE_COL].iloc[train_idx].max(),
+            'val_start': train_df[DATE_COL].iloc[val_idx].min(),
+            'val_end': train_df[DATE_COL].iloc[val_idx].max(),
+            'n_train': len(train_idx),
+            'n_val': len(val_idx),
+            **_fold_metrics(y_all[val_idx], pred),
+            'fit_sec': fit_sec,
+            'predict_sec': predict_sec,
+            'wall_sec': time.perf_counter() - wall_start,
+            'cpu_sec': time.process_time() - cpu_start,
+            'rss_start_mb': rss_start,
+            'rss_end_mb': rss_mb(),
+            'peak_rss_mb': peak_rss_mb(),
+        })
+        models.append(model)
+        print(f"Fold {fold}: MAE={records[-1]['mae']:.1f}, fit={fit_sec:.2f}s")
+
+    folds = pd.DataFrame(records)
+    folds.to_csv(get_report_path(f"{report_name}_folds.csv"), index=False)
+    # 전체 검증 구간의 충전방식별 지표
+    by_type.group_results().rename_axis('charging_type').to_csv(get_report_path(f"{report_name}_by_type.csv"))
+    summary = {
+        'n_rows': len(train_df),
+        'n_features': len(features),
+        'n_folds': len(folds),
+        'gap_days': gap,
+        'thread_count': thread_count,
+        'border_count': border_count,
+        'pool_sec': pool_sec,
+        'params': params,
+        'overall': by_type.result(),
+        'mean': folds[['mae', 'rmse', 'r2', 'accuracy', 'fit_sec', 'wall_sec']].mean().to_dict() if len(folds) else {},
+    }
+    get_report_path(f"{report_name}_summary.json").write_text(
+        json.dumps(summary, ensure_ascii=False, indent=2, default=str), encoding='utf-8'
+    )
+    return folds, models
+
+
+@profiled()
+def train_catboost(train_df, params=None, thread_count=DEFAULT_THREAD_COUNT, border_count=254,
+                   pool_cache_dir=POOL_CACHE_DIR):
+    """전체 train_df로 최종 모델 학습"""
+    params = resolve_params(params)
+    pool = load_or_build_quantized_pool(train_df, None, thread_count, border_count, pool_cache_dir)
+    model = CatBoostRegressor(**params, thread_count=thread_count, verbose=False)
+    model.fit(pool)
+    return model
+
+
+def save_model(model, filename='catboost_fft_model.cbm'):
+    """모델을 outputs/models에 저장하고 경로 반환"""
+    path = get_model_path(filename)
+    model.save_model(str(path))
+    return path
+
+
+def save_feature_importance(model, filename='feature_importance.csv'):
+    """특징 중요도를 outputs/reports에 저장"""
+    importance = model.get_feature_importance(prettified=True)
+    importance.columns = ['feature', 'importance']
+    path = get_report_path(filename)
+    importance.to_csv(path, index=False)
+    return path
+
+
+@profiled()
+def train_catboost_multi(train_df, target_cols=None, params=None, thread_count=DEFAULT_THREAD_COUNT):
+    """다중 horizon 타깃 전체를 MultiRMSE 모델 1개로 학습"""
+    target_cols = target_cols or multi_target_columns(train_df)
+    params = resolve_params({'loss_function': 'MultiRMSE', **(params or {})})
+    model = CatBoostRegressor(**params, thread_count=thread_count, verbose=False)
+    model.fit(make_pool(train_df, thread_count=thread_count, target_cols=target_cols))
+    return model
+
+
+def predict_multi(model, feature_df, target_cols, thread_count=DEFAULT_THREAD_COUNT):
+    """다중 horizon 예측을 window_end_date, charging_type + 타깃별 컬럼 DataFrame으로 반환"""
+    preds = model.predict(feature_frame(feature_df, list(model.feature_names_)), thread_count=thread_count)
+    result = feature_df[[DATE_COL, 'charging_type']].reset_index(drop=True)
+    return pd.concat([result, pd.DataFrame(np.atleast_2d(preds), columns=target_cols)], axis=1)
+
+
+@profiled()
+def cross_validate_catboost_multi(train_df, n_splits=5, gap=7, max_train_days=None, params=None,
+                                  thread_count=DEFAULT_THREAD_COUNT, report_name='catboost_multi_cv'):
+    """다중 horizon MultiRMSE 모델 walk-forward 교차검증
+
+    fold별 전체 지표는 reports/<report_name>_folds.csv, 타깃(horizon)별 지표는
+    reports/<report_name>_by_horizon.csv에 저장. gap은 horizon 이상이어야 타깃 기간이 겹치지 않음.
+    반환: (fold 결과 DataFrame, horizon별 지표 DataFrame, 모델 리스트)
+    """
+    target_cols = multi_target_columns(train_df)
+    params = resolve_params({'loss_function': 'MultiRMSE', **(params or {})})
+    features = feature_columns(train_df)
+    pool = make_pool(train_df, features, thread_count, target_cols)
+    X_all = feature_frame(train_df, features)
+    Y_all = train_df[target_cols].to_numpy(dtype=np.float64)
+    horizon_labels = np.array(target_cols)
+
+    records, models = [], []
+    by_horizon = GroupedMetricAccumulator()
+    for fold, (train_idx, val_idx) in enumerate(walk_forward_splits(train_df[DATE_COL], n_splits, gap, max_train_days), 1):
+        wall_start = time.perf_counter()
+        model = fit_fold(params, pool, train_df[DATE_COL], train_idx, val_idx, gap, thread_count)
+        pred = model.predict(X_all.iloc[val_idx], thread_count=thread_count)
+
+        # (n_val, n_targets) 행렬을 펼치고 타깃 이름을 그룹 라벨로 사용
+        by_horizon.update(np.tile(horizon_labels, len(val_idx)), Y_all[val_idx], pred)
+        records.append({
+            'fold': fold,
+            'n_train': len(train_idx),
+            'n_val': len(val_idx),
+            **_fold_metrics(Y_all[val_idx], pred),
+            'wall_sec': time.perf_counter() - wall_start,
+        })
+        models.append(model)
+        print(f"Fold {fold}: MAE={records[-1]['mae']:.1f} over {len(target_cols)} targets")
+
+    folds = pd.DataFrame(records)
+    folds.to_csv(get_report_path(f"{report_name}_folds.csv"), index=False)
+    horizons = by_horizon.group_results().reindex(target_cols).rename_axis('target')
+    horizons.to_csv(get_report_path(f"{report_name}_by_horizon.csv"))
+    return folds, horizons, models
\ No newline at end of file
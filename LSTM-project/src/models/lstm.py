@@ -1,17 +1,334 @@
-import pandas as pd
-import numpy as np
+"""
+일별 시간대 충전부하 시계열 LSTM 예측 모델
+
+- 입력: src/data/processing.py 결과(0시~23시, daily_total, peak_ratio)를 충전방식별로 이은 시계열
+- 타깃: 다음 horizon일 daily_total 합계 (y_next7_total과 동일한 정의)
+  또는 multi_horizon=True이면 1..horizon일 daily_total(또는 일자x시간대) 벡터를 다중 출력 head로 한 번에 예측
+- Dataset은 전체 데이터를 연속된 float32 텐서 1개로 보관하고 윈도우는 unfold 뷰로 노출 (샘플별 복사 없음)
+- 배치는 인덱스 텐서로 한 번에 gather (샘플 단위 collate 없음)
+"""
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, Dataset
+from torch.utils.data import Dataset
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_squared_error, r2_score
-from scipy.stats import pearsonr  # 피어슨 상관계수 계산
-from sklearn.model_selection import train_test_split, KFold
-import matplotlib.pyplot as plt
+from sklearn.model_selection import KFold
+
+from src.evaluation.metrics import MetricAccumulator, regression_metrics
+from src.utils.profiling import profiled
 
 import warnings
 
 warnings.filterwarnings("ignore", category=UserWarning, module="torch.nn.modules.loss")
-warnings.filterwarnings("ignore", category=FutureWarning)
\ No newline at end of file
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+# 하이퍼파라미터 기본값
+NUM_EPOCHS = 30
+LEARNING_RATE = 0.001
+BATCH_SIZE = 256
+DROPOUT = 0.3
+
+FEATURE_COLS = [f'{i}시' for i in range(24)] + ['daily_total', 'peak_ratio']
+
+
+# LSTM 모델 (Hidden layer 2개, Dropout 추가)
+class LSTMModel(nn.Module):
+    def __init__(self, input_dim=len(FEATURE_COLS), hidden_dim=50, output_dim=1, num_layers=2, dropout=DROPOUT):
+        super(LSTMModel, self).__init__()
+        self.lstm = nn.LSTM(input_dim, hidden_dim, num_layers, batch_first=True, dropout=dropout)
+        self.fc = nn.Linear(hidden_dim, output_dim)
+
+    def forward(self, x):
+        out, _ = self.lstm(x)  # out: (batch_size, seq_len, hidden_dim)
+        out = out[:, -1, :]  # 마지막 타임스텝의 출력
+        out = self.fc(out)
+        return out
+
+
+class WindowedSeriesDataset(Dataset):
+    """연속 float32 텐서 1개 위의 슬라이딩 윈도우 Dataset
+
+    data: (n_rows, n_features) 전체 시계열 (충전방식별로 이어 붙임)
+    starts: 충전방식 경계를 넘지 않는 윈도우 시작 위치 (n_windows,)
+    labels: 윈도우별 스케일된 타깃 (n_windows,) 또는 다중 horizon 타깃 (n_windows, n_targets)
+    """
+
+    def __init__(self, data, starts, labels, lookback, window_end_dates=None, charging_types=None):
+        self.data = data.contiguous()
+        self.starts = starts
+        self.labels = labels
+        self.lookback = lookback
+        self.window_end_dates = window_end_dates
+        self.charging_types = charging_types
+        self._build_view()
+
+    def _build_view(self):
+        # (n_rows - lookback + 1, lookback, n_features) 뷰 - 저장 공간을 공유하며 복사하지 않음
+        self.windows = self.data.unfold(0, self.lookback, 1).transpose(1, 2)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def output_dim(self):
+        return 1 if self.labels.dim() == 1 else self.labels.shape[1]
+
+    def __getitem__(self, idx):
+        labels = self.labels[idx:idx + 1] if self.labels.dim() == 1 else self.labels[idx]
+        return self.windows[self.starts[idx]], labels
+
+    def batch(self, indices):
+        """인덱스 텐서로 배치를 한 번에 gather"""
+        labels = self.labels[indices]
+        return self.windows[self.starts[indices]], labels.unsqueeze(1) if labels.dim() == 1 else labels
+
+    def to(self, device):
+        """텐서를 device로 한 번만 이동 (이후 배치는 device 위에서 gather)"""
+        self.data = self.data.to(device)
+        self.starts = self.starts.to(device)
+        self.labels = self.labels.to(device)
+        self._build_view()
+        return self
+
+
+class IndexBatchLoader:
+    """WindowedSeriesDataset용 배치 반복자 (DataLoader의 샘플 단위 collate 대체)"""
+
+    def __init__(self, dataset, indices=None, batch_size=BATCH_SIZE, shuffle=False, seed=42):
+        self.dataset = dataset
+        device = dataset.starts.device
+        self.indices = torch.arange(len(dataset), device=device) if indices is None else torch.as_tensor(indices, dtype=torch.long, device=device)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.generator = torch.Generator().manual_seed(seed)
+
+    def __len__(self):
+        return -(-len(self.indices) // self.batch_size)
+
+    def __iter__(self):
+        order = self.indices
+        if self.shuffle:
+            perm = torch.randperm(len(order), generator=self.generator).to(order.device)
+            order = order[perm]
+        for batch_idx in order.split(self.batch_size):
+            yield self.dataset.batch(batch_idx)
+
+
+@profiled()
+def build_series_dataset(df, lookback=28, horizon=7, feature_cols=FEATURE_COLS,
+                         feature_scaler=None, target_scaler=None, multi_horizon=False, target_level='daily'):
+    """전처리된 일별 데이터로 WindowedSeriesDataset 생성
+
+    multi_horizon=True이면 타깃이 1..horizon일 daily_total (target_level='hourly'이면 일자x시간대
+    horizon*24개) 행렬이며, 모든 타깃을 같은 단위로 보고 target_scaler 1개로 스케일.
+    scaler를 넘기지 않으면 새로 fit. 반환: (dataset, feature_scaler, target_scaler)
+    """
+    df = df.sort_values(['충전방식', '일자'], kind='stable').reset_index(drop=True)
+
+    features = df[feature_cols].to_numpy(dtype=np.float64)
+    if feature_scaler is None:
+        feature_scaler = MinMaxScaler().fit(features)
+    data = np.ascontiguousarray(feature_scaler.transform(features), dtype=np.float32)
+
+    # 충전방식 경계를 넘지 않는 윈도우 시작 위치
+    sizes = df.groupby('충전방식', sort=False, observed=True).size().to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    starts = np.concatenate([
+        np.arange(offset, offset + size - lookback - horizon + 1)
+        for offset, size in zip(offsets[:-1], sizes) if size >= lookback + horizon
+    ] or [np.empty(0, dtype=np.int64)]).astype(np.int64)
+
+    if multi_horizon:
+        # 타깃: 윈도우 다음 1..horizon일 값 (일자 우선 순서로 펼친 행렬)
+        source_cols = ['daily_total'] if target_level == 'daily' else [f'{i}시' for i in range(24)]
+        values = df[source_cols].to_numpy(dtype=np.float64)
+        target_idx = starts[:, None] + lookback + np.arange(horizon)
+        labels = values[target_idx].reshape(len(starts), horizon * len(source_cols))
+    else:
+        # 타깃: 윈도우 다음 horizon일 daily_total 합계 (누적합 차분)
+        cumsum = np.concatenate([[0.0], np.cumsum(df['daily_total'].to_numpy(dtype=np.float64))])
+        labels = cumsum[starts + lookback + horizon] - cumsum[starts + lookback]
+    if target_scaler is None:
+        target_scaler = MinMaxScaler().fit(labels.reshape(-1, 1))
+    scaled_labels = target_scaler.transform(labels.reshape(-1, 1)).reshape(labels.shape).astype(np.float32)
+
+    dataset = WindowedSeriesDataset(
+        torch.from_numpy(data),
+        torch.from_numpy(starts),
+        torch.from_numpy(scaled_labels),
+        lookback,
+        window_end_dates=df['일자'].to_numpy()[starts + lookback - 1],
+        charging_types=df['충전방식'].to_numpy()[starts + lookback - 1],
+    )
+    return dataset, feature_scaler, target_scaler
+
+
+def run_epoch(model, loader, criterion, optimizer=None, collect=False):
+    """1 epoch 학습(optimizer 지정 시) 또는 평가. 반환: (평균 loss, 예측 텐서, 타깃 텐서, 초당 샘플 수)
+
+    collect=True일 때만 예측/타깃을 device 위에 누적한 뒤 epoch 끝에 한 번만 합침 (아니면 None).
+    """
+    training = optimizer is not None
+    model.train(training)
+    total_loss, n_samples = 0.0, 0
+    preds, targets = [], []
+
+    start = time.perf_counter()
+    with torch.set_grad_enabled(training):
+        for inputs, target in loader:
+            outputs = model(inputs)
+            loss = criterion(outputs, target)
+            if training:
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+            total_loss += loss.detach() * len(target)
+            n_samples += len(target)
+            if collect:
+                preds.append(outputs.detach())
+                targets.append(target)
+    elapsed = time.perf_counter() - start
+
+    if not n_samples:
+        # 빈 인덱스(예: 검증 fold 없음)는 loss NaN, 빈 예측/타깃 텐서
+        empty = torch.empty(0, device=next(model.parameters()).device) if collect else None
+        return float('nan'), empty, empty, 0.0
+    avg_loss = (total_loss / n_samples).item()
+    if not collect:
+        return avg_loss, None, None, n_samples / elapsed
+    return avg_loss, torch.cat(preds).squeeze(1), torch.cat(targets).squeeze(1), n_samples / elapsed
+
+
+@profiled(rows=lambda dataset, train_idx, *args, **kwargs: len(train_idx))
+def fit_lstm(dataset, train_idx, val_idx=None, num_epochs=NUM_EPOCHS, learning_rate=LEARNING_RATE,
+             batch_size=BATCH_SIZE, device=None, seed=42, verbose=True, **model_kwargs):
+    """LSTM 학습. 반환: (model, history DataFrame[epoch, train_loss, val_loss, samples_per_sec])"""
+    torch.manual_seed(seed)
+    device = device or torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    dataset.to(device)
+
+    model_kwargs.setdefault('output_dim', dataset.output_dim)
+    model = LSTMModel(input_dim=dataset.data.shape[1], **model_kwargs).to(device)
+    optimizer = optim.Adam(model.parameters(), lr=learning_rate, weight_decay=1e-4)
+    criterion = nn.MSELoss()
+
+    train_loader = IndexBatchLoader(dataset, train_idx, batch_size, shuffle=True, seed=seed)
+    val_loader = IndexBatchLoader(dataset, val_idx, batch_size) if val_idx is not None else None
+
+    history = []
+    for epoch in range(1, num_epochs + 1):
+        train_loss, _, _, throughput = run_epoch(model, train_loader, criterion, optimizer)
+        val_loss = run_epoch(model, val_loader, criterion)[0] if val_loader else float('nan')
+        history.append({'epoch': epoch, 'train_loss': train_loss, 'val_loss': val_loss,
+                        'samples_per_sec': throughput})
+        if verbose:
+            print(f"Epoch {epoch}/{num_epochs} - loss: {train_loss:.5f}, val_loss: {val_loss:.5f}, "
+                  f"{throughput:,.0f} samples/sec")
+
+    return model, pd.DataFrame(history)
+
+
+@profiled(rows=lambda model, dataset, indices=None, *args, **kwargs: len(dataset if indices is None else indices))
+def predict(model, dataset, indices=None, batch_size=4096, target_scaler=None):
+    """윈도우 예측 (target_scaler를 주면 원래 단위로 역변환한 NumPy 배열 반환)"""
+    loader = IndexBatchLoader(dataset, indices, batch_size)
+    _, preds, targets, _ = run_epoch(model, loader, nn.MSELoss(), collect=True)
+    preds, targets = preds.cpu().numpy(), targets.cpu().numpy()
+    if target_scaler is not None:
+        preds = target_scaler.inverse_transform(preds.reshape(-1, 1)).reshape(preds.shape)
+        targets = target_scaler.inverse_transform(targets.reshape(-1, 1)).reshape(targets.shape)
+    return preds, targets
+
+
+def evaluate(model, dataset, indices=None, batch_size=4096, target_scaler=None):
+    """배치별로 지표 누적합만 갱신하며 평가 (예측 배열을 모으지 않음, 반환: 지표 dict)"""
+    accumulator = MetricAccumulator.with_minmax_scaler(target_scaler) if target_scaler is not None else MetricAccumulator()
+    model.eval()
+    with torch.no_grad():
+        for inputs, target in IndexBatchLoader(dataset, indices, batch_size):
+            accumulator.update(target.cpu().numpy(), model(inputs).cpu().numpy())
+    return accumulator.result()
+
+
+def kfold_splits(dataset, n_splits=5, seed=42):
+    """노트북과 동일한 KFold(shuffle) 분할을 윈도우 인덱스에 적용"""
+    kf = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    return list(kf.split(np.arange(len(dataset))))
+
+
+def _init_fold_worker(n_threads):
+    """워커 프로세스별 torch 스레드 수 제한 (코어를 워커 수로 분할)"""
+    torch.set_num_threads(n_threads)
+    torch.set_num_interop_threads(1)
+
+
+def _train_fold(fold, data, starts, labels, lookback, train_idx, val_idx, fit_kwargs):
+    """fold 1개 학습 (워커 프로세스에서 실행, data/starts/labels는 공유 메모리 텐서)"""
+    start = time.perf_counter()
+    dataset = WindowedSeriesDataset(data, starts, labels, lookback)
+    model, history = fit_lstm(dataset, train_idx, val_idx, **fit_kwargs)
+    preds, targets = predict(model, dataset, val_idx)
+    return {
+        'fold': fold,
+        'state_dict': {k: v.cpu() for k, v in model.state_dict().items()},
+        'history': history,
+        'val_pred': preds,
+        'val_true': targets,
+        'wall_sec': time.perf_counter() - start,
+        'n_threads': torch.get_num_threads(),
+    }
+
+
+@profiled()
+def cross_validate_lstm(dataset, n_splits=5, splits=None, n_workers=None, total_threads=None,
+                        target_scaler=None, **fit_kwargs):
+    """fold를 프로세스 풀에서 병렬 학습 (윈도우 텐서는 한 번 만들어 공유 메모리로 전달)
+
+    splits를 주지 않으면 kfold_splits 사용. 워커별 torch 스레드 수는 total_threads // n_workers.
+    스레드 수에 따라 부동소수점 합산 순서가 달라지므로 n_workers가 다르면 결과가 비트 단위로 같지는 않음
+    (같은 스레드 수에서는 재현 가능, 차이는 1e-9 수준).
+    반환: fold 결과 dict 리스트 (fold 순서, 'metrics'는 target_scaler로 역변환한 단위의 검증 지표)
+    """
+    splits = splits if splits is not None else kfold_splits(dataset, n_splits)
+    total_threads = total_threads or os.cpu_count() or 1
+    n_workers = max(1, min(n_workers or len(splits), len(splits), total_threads))
+    n_threads = max(1, total_threads // n_workers)
+    fit_kwargs.setdefault('verbose', False)
+
+    data, starts, labels = dataset.data.cpu(), dataset.starts.cpu(), dataset.labels.cpu()
+    tasks = [
+        (fold, data, starts, labels, dataset.lookback, train_idx, val_idx, fit_kwargs)
+        for fold, (train_idx, val_idx) in enumerate(splits, 1)
+    ]
+
+    if n_workers == 1:
+        # 현재 프로세스에서 실행: 호출자의 torch 스레드 설정은 끝나면 되돌림
+        prev_threads = torch.get_num_threads()
+        torch.set_num_threads(n_threads)
+        try:
+            results = [_train_fold(*task) for task in tasks]
+        finally:
+            torch.set_num_threads(prev_threads)
+    else:
+        # 공유 메모리로 옮겨 두면 워커에 전달될 때 복사 없이 같은 저장 공간을 참조
+        for tensor in (data, starts, labels):
+            tensor.share_memory_()
+        ctx = torch.multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx,
+                                 initializer=_init_fold_worker, initargs=(n_threads,)) as pool:
+            futures = [pool.submit(_train_fold, *task) for task in tasks]
+            results = [future.result() for future in futures]
+
+    for result in results:
+        y_true, y_pred = result['val_true'], result['val_pred']
+        if target_scaler is not None:
+            y_true = target_scaler.inverse_transform(y_true.reshape(-1, 1))
+            y_pred = target_scaler.inverse_transform(y_pred.reshape(-1, 1))
+        result['metrics'] = regression_metrics(y_true, y_pred)
+    return results
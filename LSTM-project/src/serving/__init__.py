@@ -0,0 +1 @@
+# serving package
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+저장된 CatBoost FFT 모델 상주(resident) 예측 서비스
+
+- 대량(bulk) 모드: 원본 일자별 행 -> 전처리 -> 배열 기반 윈도우/FFT -> 다중 스레드 predict
+- 단일 요청 모드: 충전방식 1개의 최근 lookback일로 다음 horizon일 합계(y_next7_total) 예측
+- 다중 horizon(MultiRMSE) 모델은 bulk 모드에서 타깃별 예측 컬럼을 한 번의 predict로 반환
+- 기본 모델 경로: outputs/models 또는 scripts/outputs/models의 catboost_fft_model.cbm
+"""
+import re
+import time
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+
+from src.utils.paths import find_model_path
+from src.data.processing import prepare_daily_frame
+from src.dataset.windowing import build_inference_df, build_target_frame, multi_horizon_target_columns
+from src.features.fourier_transform import fft_features
+from src.models.catboost import DEFAULT_THREAD_COUNT, TARGET_COL
+from src.utils.profiling import profiled
+
+DEFAULT_MODEL_NAME = 'catboost_fft_model.cbm'
+
+
+class CatBoostForecaster:
+    """모델을 한 번 로드해 메모리에 유지하며 충전부하 예측을 제공
+
+    target_cols: 다중 출력 모델의 타깃 이름 (예측 컬럼 이름으로도 사용)
+    horizon: 단일 출력 모델의 타깃(y_next7_total) 합산 일수
+    """
+
+    def __init__(self, model_path=None, lookback=28, thread_count=DEFAULT_THREAD_COUNT, target_cols=None,
+                 horizon=7):
+        self.model_path = model_path or find_model_path(DEFAULT_MODEL_NAME)
+        if not Path(self.model_path).exists():
+            raise FileNotFoundError(f"모델 파일이 없습니다: {self.model_path}")
+        self.model = CatBoostRegressor()
+        self.model.load_model(str(self.model_path))
+        self.lookback = lookback
+        self.horizon = horizon
+        self.thread_count = thread_count
+
+        # 출력 차원(리프 값 수 / 리프 수)으로 단일/다중 출력을 구분해 타깃/예측 컬럼 이름 결정
+        n_leaves = sum(self.model.get_tree_leaf_counts())
+        self.n_outputs = len(self.model.get_leaf_values()) // n_leaves if n_leaves else 1
+        if self.n_outputs == 1:
+            self.target_cols, self.prediction_cols = [TARGET_COL], ['y_pred']
+        else:
+            if target_cols is not None and len(target_cols) != self.n_outputs:
+                raise ValueError(f"target_cols 수({len(target_cols)})가 모델 출력 수({self.n_outputs})와 다릅니다.")
+            self.target_cols = list(target_cols) if target_cols else None
+            self.prediction_cols = self.target_cols or [f'y_pred_{i}' for i in range(1, self.n_outputs + 1)]
+
+        # 학습 시 특징 순서/범주형 컬럼/top_k는 모델에서 복원
+        self.features = list(self.model.feature_names_)
+        self.cat_features = [self.features[i] for i in self.model.get_cat_feature_indices()]
+        self.top_k = sum(name.startswith('fft_amp_') for name in self.features)
+
+    def prepare(self, raw_df):
+        """daily_total/peak_ratio가 없으면 원본 시간대 컬럼으로부터 계산"""
+        if 'daily_total' in raw_df and 'peak_ratio' in raw_df:
+            return raw_df
+        return prepare_daily_frame(raw_df)
+
+    def _predict_frame(self, feature_df):
+        X = feature_df[self.features].copy()
+        for col in self.cat_features:
+            X[col] = X[col].astype(str)
+        return self.model.predict(X, thread_count=self.thread_count)
+
+    @profiled(rows=lambda self, raw_df, *args, **kwargs: len(raw_df))
+    def predict_bulk(self, raw_df, latest_only=False, chunk_size=1_000_000):
+        """모든 충전방식의 모든 윈도우(또는 최근 윈도우만)에 대해 예측
+
+        반환: window_end_date, charging_type + prediction_cols 컬럼의 DataFrame
+        (단일 출력이면 y_pred, 다중 출력이면 target_cols 또는 y_pred_1..y_pred_N)
+        raw_df가 이미 prepare()를 거친 프레임이면 전처리를 다시 하지 않음.
+        """
+        df = self.prepare(raw_df)
+        features = build_inference_df(df, self.lookback, self.top_k, latest_only)
+        if not len(features):
+            return pd.DataFrame(columns=['window_end_date', 'charging_type', *self.prediction_cols])
+
+        # 메모리 상한을 위해 chunk 단위로 predict (각 chunk는 CatBoost 내부에서 병렬 처리)
+        preds = np.concatenate([
+            self._predict_frame(features.iloc[start : start + chunk_size])
+            for start in range(0, len(features), chunk_size)
+        ])
+        result = features[['window_end_date', 'charging_type']].copy()
+        preds = preds.reshape(len(result), -1)
+        return pd.concat([result, pd.DataFrame(preds, columns=self.prediction_cols, index=result.index)], axis=1)
+
+    def actuals(self, df):
+        """prepare()된 프레임에서 윈도우별 실제 타깃 계산 (window_end_date, charging_type + target_cols)
+
+        다중 출력 모델의 target_cols가 없거나 y_d1..y_dH 형식이 아니면 타깃을 알 수 없으므로 None.
+        """
+        if self.n_outputs == 1:
+            return build_target_frame(df, self.lookback, self.horizon)
+        if not self.target_cols:
+            return None
+        match = re.fullmatch(r'y_d(\d+)(_h\d+)?', self.target_cols[-1])
+        if match is None:
+            return None
+        horizon, level = int(match.group(1)), 'hourly' if match.group(2) else 'daily'
+        if multi_horizon_target_columns(horizon, level) != self.target_cols:
+            return None
+        return build_target_frame(df, self.lookback, horizon, level)
+
+    def predict_features(self, feat):
+        """특징 dict 1개(build_sliding_window_samples / IncrementalWindowBuilder 스키마) 예측"""
+        row = [str(feat[col]) if col in self.cat_features else feat[col] for col in self.features]
+        return float(self.model.predict([row], thread_count=1)[0])
+
+    def predict_window(self, charging_type, window_end_date, daily_seq, peak_ratio_seq):
+        """단일 요청 저지연 경로: pandas 없이 lookback일 배열로 특징 계산 후 예측"""
+        daily_seq = np.asarray(daily_seq)[-self.lookback:]
+        peak_ratio_seq = np.asarray(peak_ratio_seq)[-self.lookback:]
+        if len(daily_seq) < self.lookback:
+            raise ValueError(f"최소 {self.lookback}일의 이력이 필요합니다 (입력: {len(daily_seq)}일)")
+
+        date = pd.Timestamp(window_end_date)
+        feat = {
+            'charging_type': charging_type,
+            'month': date.month,
+            'dayofweek': date.dayofweek,
+            'mean_28d': np.mean(daily_seq),
+            'std_28d': np.std(daily_seq),
+            'last_day_usage': daily_seq[-1],
+            'peak_ratio_mean': np.mean(peak_ratio_seq)
+        }
+        feat.update(fft_features(daily_seq, top_k=self.top_k))
+        return self.predict_features(feat)
+
+    def predict_one(self, history):
+        """충전방식 1개의 원본 일자별 행(최근 lookback일 이상)으로 다음 horizon일 합계 예측"""
+        df = self.prepare(history.sort_values('일자').tail(self.lookback))
+        return self.predict_window(
+            df['충전방식'].iloc[-1], df['일자'].iloc[-1],
+            df['daily_total'].to_numpy(), df['peak_ratio'].to_numpy()
+        )
+
+
+def measure_latency(func, payloads, warmup=10):
+    """payload별 func 호출 지연시간(ms) 분포 측정"""
+    for payload in payloads[:warmup]:
+        func(payload)
+
+    latencies = np.empty(len(payloads))
+    for i, payload in enumerate(payloads):
+        start = time.perf_counter()
+        func(payload)
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    return {
+        'n_requests': len(payloads),
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+    }
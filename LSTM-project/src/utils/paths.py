@@ -34,6 +34,9 @@ NOTEBOOKS_DIR = PROJECT_ROOT / "notebooks"
 # 스크립트 디렉토리
 SCRIPTS_DIR = PROJECT_ROOT / "scripts"
 
+# scripts/ 에서 실행한 노트북(train.ipynb)이 모델을 저장한 디렉토리
+SCRIPTS_MODELS_DIR = SCRIPTS_DIR / "outputs" / "models"
+
 
 def ensure_dir(path: Path) -> Path:
     """디렉토리가 없으면 생성"""
@@ -62,6 +65,18 @@ def get_model_path(filename: str) -> Path:
     return MODELS_DIR / filename
 
 
+def find_model_path(filename: str) -> Path:
+    """저장된 모델 파일 경로 반환 (outputs/models, scripts/outputs/models 순으로 탐색, 디렉토리는 만들지 않음)"""
+    for directory in (MODELS_DIR, SCRIPTS_MODELS_DIR):
+        path = directory / filename
+        if path.exists():
+            return path
+    raise FileNotFoundError(
+        f"모델 파일 '{filename}'이 {MODELS_DIR} 또는 {SCRIPTS_MODELS_DIR}에 없습니다. "
+        "scripts/train_catboost.py로 학습하거나 --model로 경로를 지정하세요."
+    )
+
+
 def get_figure_path(filename: str) -> Path:
     """그래프 저장 경로 반환"""
     ensure_dir(FIGURES_DIR)
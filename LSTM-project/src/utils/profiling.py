@@ -0,0 +1,206 @@
+"""
+파이프라인 단계별 프로파일링 (opt-in)
+
+- @profiled('stage') 데코레이터 또는 with profile_stage('stage'): 로 단계 표시
+- 최상위 단계 호출마다 wall time, CPU time, RSS(시작/종료), 프로세스 최대 RSS, 처리 행 수, rows/sec 기록
+  (process_peak_rss_mb는 프로세스 시작 이후의 최대값이므로 단계별 메모리는 rss_end_mb - rss_start_mb로 판단)
+- 중첩 단계(depth > 0, 예: 배치 FFT 안의 fft_features)는 호출별로 기록하지 않고
+  단계 이름별 calls/wall/CPU/rows 합계만 누적 (기록 수가 호출 수에 비례해 늘지 않음)
+- 단계 깊이는 스레드별로 관리 (여러 스레드에서 동시에 측정해도 깊이가 섞이지 않음)
+- enable_profiling(cprofile=True)이면 메인 스레드의 최상위 단계마다 cProfile 통계도 수집
+- write_profile_report()로 outputs/reports/<name>.json, <name>.csv(+ <name>_cprofile.txt) 저장
+
+비활성 상태(기본값)에서는 플래그 확인 1회 후 원래 함수를 그대로 호출.
+환경변수 LSTM_PROFILE=1 이면 import 시점부터 활성화.
+"""
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.utils.paths import get_report_path
+from src.utils.resources import rss_mb, peak_rss_mb
+
+_enabled = os.environ.get('LSTM_PROFILE', '') not in ('', '0')
+_use_cprofile = False
+_records = []  # 최상위 단계 호출별 기록
+_nested = {}  # 중첩 단계 이름 -> 누적 기록
+_lock = threading.Lock()
+_local = threading.local()  # 스레드별 현재 단계 깊이
+_profiler = None
+
+
+def enable_profiling(cprofile=False):
+    """프로파일링 활성화 (기존 기록은 유지)"""
+    global _enabled, _use_cprofile, _profiler
+    _enabled = True
+    _use_cprofile = cprofile
+    if cprofile and _profiler is None:
+        _profiler = cProfile.Profile()
+
+
+def disable_profiling():
+    """프로파일링 비활성화"""
+    global _enabled
+    _enabled = False
+
+
+def profiling_enabled():
+    return _enabled
+
+
+def reset_profiling():
+    """기록된 단계/통계 초기화"""
+    global _profiler
+    with _lock:
+        _records.clear()
+        _nested.clear()
+    _profiler = cProfile.Profile() if _use_cprofile else None
+
+
+def _default_rows(*args, **kwargs):
+    """첫 번째 인자의 길이를 처리 행 수로 사용 (길이가 없으면 None)"""
+    try:
+        return len(args[0])
+    except (IndexError, TypeError):
+        return None
+
+
+@contextmanager
+def profile_stage(stage, rows=None):
+    """단계 1회 실행을 측정하는 context manager
+
+    yield된 dict의 'rows'를 블록 안에서 채우면 rows/sec도 계산.
+    비활성 상태에서도 빈 dict를 yield하므로 호출 코드는 그대로 둘 수 있음.
+    """
+    if not _enabled:
+        yield {}
+        return
+
+    depth = getattr(_local, 'depth', 0)
+    record = {'stage': stage, 'depth': depth, 'rows': rows}
+    profile_here = (_use_cprofile and depth == 0 and _profiler is not None
+                    and threading.current_thread() is threading.main_thread())
+    rss_start = rss_mb() if depth == 0 else None
+    _local.depth = depth + 1
+    if profile_here:
+        _profiler.enable()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        wall_sec = time.perf_counter() - wall_start
+        cpu_sec = time.process_time() - cpu_start
+        if profile_here:
+            _profiler.disable()
+        _local.depth = depth
+        n_rows = record.get('rows')
+        if depth == 0:
+            record.update({
+                'calls': 1,
+                'wall_sec': wall_sec,
+                'cpu_sec': cpu_sec,
+                'rss_start_mb': rss_start,
+                'rss_end_mb': rss_mb(),
+                'process_peak_rss_mb': peak_rss_mb(),
+                'rows_per_sec': n_rows / wall_sec if n_rows and wall_sec > 0 else None,
+            })
+            with _lock:
+                _records.append(record)
+        else:
+            _add_nested(stage, depth, wall_sec, cpu_sec, n_rows)
+
+
+def _add_nested(stage, depth, wall_sec, cpu_sec, rows):
+    """중첩 단계 호출 1회를 단계 이름별 누적 기록에 반영"""
+    with _lock:
+        total = _nested.get(stage)
+        if total is None:
+            total = _nested[stage] = {'stage': stage, 'depth': depth, 'rows': None,
+                                      'calls': 0, 'wall_sec': 0.0, 'cpu_sec': 0.0}
+        total['depth'] = min(total['depth'], depth)
+        total['calls'] += 1
+        total['wall_sec'] += wall_sec
+        total['cpu_sec'] += cpu_sec
+        if rows is not None:
+            total['rows'] = (total['rows'] or 0) + rows
+
+
+def profiled(stage=None, rows=_default_rows):
+    """함수를 단계로 표시하는 데코레이터
+
+    rows: 함수 인자(*args, **kwargs)를 받아 처리 행 수를 반환하는 함수 (None이면 행 수 미기록)
+    """
+    def decorator(func):
+        name = stage or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with profile_stage(name, rows(*args, **kwargs) if rows else None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_records():
+    """최상위 단계 호출별 기록(완료 순서) + 중첩 단계 이름별 누적 기록 DataFrame"""
+    with _lock:
+        records = _records + [dict(total) for total in _nested.values()]
+    return pd.DataFrame(records)
+
+
+def profile_summary():
+    """단계별 합계/평균 요약 DataFrame (RSS 항목은 최상위 단계만)"""
+    records = profile_records()
+    if not len(records):
+        return pd.DataFrame()
+    for col in ('rss_start_mb', 'rss_end_mb', 'process_peak_rss_mb'):
+        if col not in records:
+            records[col] = None
+    records[['rss_start_mb', 'rss_end_mb', 'process_peak_rss_mb']] = (
+        records[['rss_start_mb', 'rss_end_mb', 'process_peak_rss_mb']].astype(float))
+    summary = records.groupby('stage', sort=False).agg(
+        calls=('calls', 'sum'),
+        depth=('depth', 'min'),
+        wall_sec=('wall_sec', 'sum'),
+        cpu_sec=('cpu_sec', 'sum'),
+        rows=('rows', 'sum'),
+        process_peak_rss_mb=('process_peak_rss_mb', 'max'),
+        rss_delta_mb=('rss_end_mb', 'max'),
+    )
+    summary['rss_delta_mb'] -= records.groupby('stage', sort=False)['rss_start_mb'].min()
+    summary['rows_per_sec'] = summary['rows'] / summary['wall_sec']
+    return summary.reset_index()
+
+
+def write_profile_report(name='profile', top_n=30):
+    """기록을 reports/<name>.json(요약+호출별), reports/<name>.csv(요약)로 저장하고 경로 반환
+
+    cProfile이 켜져 있으면 누적 시간 상위 top_n 함수를 reports/<name>_cprofile.txt에 저장.
+    """
+    summary = profile_summary()
+    json_path = get_report_path(f"{name}.json")
+    csv_path = get_report_path(f"{name}.csv")
+    json_path.write_text(json.dumps({
+        'summary': summary.to_dict(orient='records'),
+        'calls': profile_records().to_dict(orient='records'),
+    }, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    summary.to_csv(csv_path, index=False)
+
+    paths = [json_path, csv_path]
+    if _profiler is not None and _profiler.getstats():
+        stream = io.StringIO()
+        pstats.Stats(_profiler, stream=stream).sort_stats('cumulative').print_stats(top_n)
+        text_path = get_report_path(f"{name}_cprofile.txt")
+        text_path.write_text(stream.getvalue(), encoding='utf-8')
+        paths.append(text_path)
+    return paths
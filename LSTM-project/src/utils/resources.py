@@ -0,0 +1,33 @@
+"""
+프로세스 메모리 사용량 측정 유틸리티 (psutil이 없으면 resource 모듈로 대체)
+"""
+import sys
+
+try:
+    import psutil
+except ImportError:  # psutil은 선택 의존성
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_mb():
+    """현재 프로세스의 RSS(MB), 측정 불가 시 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1024**2
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """프로세스 시작 이후 최대 RSS(MB), 측정 불가 시 None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 byte 단위
+        return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024**2
+    return None
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.data.synthetic import generate_ev_load
+
+
+@pytest.fixture(scope="session")
+def raw_load():
+    """2개 충전방식 x 200일 합성 원본 (dataset.csv와 같은 스키마)"""
+    return generate_ev_load(n_series=2, n_days=200, seed=0)
+
+
+@pytest.fixture(scope="session")
+def train_df(raw_load):
+    from src.data.processing import prepare_daily_frame
+    from src.dataset.windowing import build_train_df
+    return build_train_df(prepare_daily_frame(raw_load, compact=False), verbose=False)
+
+
+@pytest.fixture
+def report_dir(tmp_path, monkeypatch):
+    """outputs/reports 대신 임시 디렉토리에 리포트 저장"""
+    import src.models.catboost as catboost_module
+    monkeypatch.setattr(catboost_module, 'get_report_path', lambda name: tmp_path / name)
+    return tmp_path
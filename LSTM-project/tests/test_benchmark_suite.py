@@ -0,0 +1,57 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.processing import HOURLY_COLS, prepare_daily_frame
+from src.data.synthetic import generate_ev_load, series_names
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'scripts' / 'benchmark_suite.py'
+
+
+@pytest.fixture(scope="module")
+def suite():
+    spec = importlib.util.spec_from_file_location('benchmark_suite', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_generator_is_reproducible(raw_load):
+    pd.testing.assert_frame_equal(generate_ev_load(n_series=2, n_days=200, seed=0), raw_load)
+    assert not generate_ev_load(n_series=2, n_days=200, seed=1).equals(raw_load)
+
+    assert list(raw_load.columns) == ['일자', '충전방식'] + HOURLY_COLS
+    assert len(raw_load) == 400 and (raw_load[HOURLY_COLS] >= 0).all().all()
+    assert series_names(2) == ['급속', '완속']
+    assert series_names(3) == ['급속_00000', '완속_00001', '급속_00002']
+
+    # 급속은 낮, 완속은 저녁에 부하가 가장 큼
+    daily = prepare_daily_frame(raw_load, compact=False)
+    peaks = daily.groupby('충전방식', observed=True)[HOURLY_COLS].mean().idxmax(axis=1)
+    assert 10 <= int(peaks['급속'][:-1]) <= 17 and 17 <= int(peaks['완속'][:-1]) <= 20
+
+
+def test_suite_runs_and_compares(suite, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(suite, 'BENCHMARK_DIR', tmp_path)
+    config = {'series': 2, 'days': 120, 'stages': ['fft', 'vector_store'], 'repeat': 1, 'lookback': 28,
+              'horizon': 7, 'top_k': 3, 'threads': 1, 'iterations': 10, 'lstm_epochs': 1, 'vectors': 300,
+              'index_type': 'flat', 'seed': 0}
+    results = suite.run(config)
+    # 선행 단계(processing)는 실행하지만 결과에는 요청한 단계만 기록
+    assert [r['stage'] for r in results] == ['fft', 'vector_ingest', 'vector_load', 'vector_search']
+    assert all(np.isfinite(r['min_sec']) for r in results)
+
+    # index_type 열이 없는 이전 history.csv와는 비교하지 않음
+    pd.DataFrame(results).assign(**{k: config[k] for k in suite.CONFIG_KEYS if k != 'index_type'},
+                                 run_id='old').to_csv(tmp_path / 'history.csv', index=False)
+    suite.save_and_compare(results, config)
+    assert 'vs run' not in capsys.readouterr().out
+
+    history = pd.read_csv(tmp_path / 'history.csv')
+    history.loc[history['run_id'] != 'old', 'run_id'] = 'previous'
+    history.to_csv(tmp_path / 'history.csv', index=False)
+    suite.save_and_compare(results, config)
+    assert 'vs run previous' in capsys.readouterr().out
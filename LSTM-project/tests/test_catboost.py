@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+
+from src.models.catboost import (DATE_COL, cross_validate_catboost, feature_columns, feature_frame, inner_split,
+                                 load_or_build_quantized_pool, resolve_params, walk_forward_splits)
+
+PARAMS = {'iterations': 40, 'learning_rate': 0.1, 'depth': 3}
+
+
+def _params(tmp_path, **extra):
+    return {**PARAMS, 'train_dir': str(tmp_path / 'catboost_info'), **extra}
+
+
+def test_walk_forward_splits_keep_gap(train_df):
+    dates = pd.to_datetime(train_df[DATE_COL]).to_numpy()
+    splits = list(walk_forward_splits(train_df[DATE_COL], n_splits=4, gap=7))
+    assert splits
+    for train_idx, val_idx in splits:
+        assert dates[train_idx].max() <= dates[val_idx].min() - np.timedelta64(8, 'D')
+
+
+def test_fold_models_ignore_validation_fold(train_df, tmp_path, report_dir):
+    folds, models = cross_validate_catboost(train_df, n_splits=3, params=_params(tmp_path), thread_count=1,
+                                            pool_cache_dir=tmp_path / 'pools')
+    assert [model.tree_count_ for model in models] == [PARAMS['iterations']] * len(models)
+
+    # 검증 fold 없이 학습한 모델과 예측이 같아야 함 (검증 데이터가 모델 선택에 쓰이지 않음)
+    pool = load_or_build_quantized_pool(train_df, thread_count=1, cache_dir=tmp_path / 'pools')
+    X = feature_frame(train_df)
+    for (train_idx, val_idx), model in zip(walk_forward_splits(train_df[DATE_COL], n_splits=3), models):
+        reference = CatBoostRegressor(**resolve_params(_params(tmp_path)), thread_count=1, verbose=False)
+        reference.fit(pool.slice(train_idx))
+        np.testing.assert_allclose(model.predict(X.iloc[val_idx]), reference.predict(X.iloc[val_idx]))
+    assert (report_dir / 'catboost_cv_folds.csv').exists()
+
+
+def test_pool_cache_key_includes_columns(train_df, tmp_path):
+    cache_dir = tmp_path / 'pools'
+    pool = load_or_build_quantized_pool(train_df, thread_count=1, cache_dir=cache_dir)
+    assert load_or_build_quantized_pool(train_df, thread_count=1, cache_dir=cache_dir).num_col() == pool.num_col()
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # 값은 같고 컬럼 이름만 다른 특징 구성은 별도 Pool
+    features = feature_columns(train_df)
+    renamed = train_df.rename(columns={features[-1]: 'renamed_feature'})
+    other = load_or_build_quantized_pool(renamed, thread_count=1, cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 2
+    assert other.get_feature_names()[-1] == 'renamed_feature'
+
+    load_or_build_quantized_pool(train_df, thread_count=1, border_count=32, cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 3
+
+
+def test_early_stopping_uses_inner_split(train_df, tmp_path, report_dir):
+    dates = pd.to_datetime(train_df[DATE_COL]).to_numpy()
+    for train_idx, val_idx in walk_forward_splits(train_df[DATE_COL], n_splits=3):
+        inner_train, inner_val = inner_split(train_df[DATE_COL], train_idx)
+        assert set(inner_train) | set(inner_val) <= set(train_idx)
+        assert dates[inner_val].max() < dates[val_idx].min()
+        assert dates[inner_train].max() < dates[inner_val].min()
+
+    _, models = cross_validate_catboost(train_df, n_splits=3, params=_params(tmp_path, early_stopping_rounds=5),
+                                        thread_count=1, pool_cache_dir=tmp_path / 'pools')
+    assert all(model.tree_count_ <= PARAMS['iterations'] for model in models)
+
+
+def test_multi_fold_models_ignore_validation_fold(raw_load, tmp_path, report_dir):
+    from src.data.processing import prepare_daily_frame
+    from src.dataset.windowing import build_multi_horizon_df
+    from src.models.catboost import cross_validate_catboost_multi, make_pool, multi_target_columns
+
+    multi_df = build_multi_horizon_df(prepare_daily_frame(raw_load, compact=False), verbose=False)
+    folds, horizons, models = cross_validate_catboost_multi(multi_df, n_splits=3, params=_params(tmp_path),
+                                                            thread_count=1)
+    assert [model.tree_count_ for model in models] == [PARAMS['iterations']] * len(models)
+    assert list(horizons.index) == multi_target_columns(multi_df)
+
+    pool = make_pool(multi_df, thread_count=1, target_cols=multi_target_columns(multi_df))
+    X = feature_frame(multi_df)
+    params = resolve_params({'loss_function': 'MultiRMSE', **_params(tmp_path)})
+    train_idx, val_idx = next(walk_forward_splits(multi_df[DATE_COL], n_splits=3))
+    reference = CatBoostRegressor(**params, thread_count=1, verbose=False)
+    reference.fit(pool.slice(train_idx))
+    np.testing.assert_allclose(models[0].predict(X.iloc[val_idx]), reference.predict(X.iloc[val_idx]))
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+import src.dataset.cache as cache_module
+from src.data.processing import prepare_daily_frame
+from src.dataset.cache import cached_build_train_df, clear_feature_cache, evict_feature_cache, feature_cache_key
+
+
+@pytest.fixture(scope="module")
+def daily(raw_load):
+    return prepare_daily_frame(raw_load, compact=False)
+
+
+def test_round_trip(daily, train_df, tmp_path, monkeypatch):
+    first = cached_build_train_df(daily, cache_dir=tmp_path, verbose=False)
+    pd.testing.assert_frame_equal(first, train_df)
+    assert len(list(tmp_path.glob('*.parquet'))) == 1
+
+    # 같은 조건이면 다시 계산하지 않고 저장된 결과 반환
+    monkeypatch.setattr(cache_module, 'build_train_df', lambda *args, **kwargs: pytest.fail("rebuilt"))
+    pd.testing.assert_frame_equal(cached_build_train_df(daily, cache_dir=tmp_path), train_df)
+
+
+def test_key_changes_with_inputs(daily):
+    key = feature_cache_key(daily)
+    assert feature_cache_key(daily.copy()) == key
+    assert feature_cache_key(daily, lookback=14) != key
+    assert feature_cache_key(daily, top_k=4) != key
+    changed = daily.copy()
+    changed.loc[0, 'daily_total'] += 1
+    assert feature_cache_key(changed) != key
+
+
+def test_lru_eviction(tmp_path):
+    for i, name in enumerate(['old', 'used', 'new']):
+        path = tmp_path / f'{name}.parquet'
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    os.utime(tmp_path / 'used.parquet', (2000, 2000))  # 최근 사용
+
+    assert evict_feature_cache(tmp_path, max_bytes=200) == ['old.parquet']
+    assert sorted(p.name for p in tmp_path.glob('*.parquet')) == ['new.parquet', 'used.parquet']
+    assert len(clear_feature_cache(tmp_path)) == 2
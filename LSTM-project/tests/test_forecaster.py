@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.utils.paths as paths
+from src.data.processing import prepare_daily_frame
+from src.dataset.windowing import build_multi_horizon_df, build_target_frame, multi_horizon_target_columns
+from src.models.catboost import train_catboost, train_catboost_multi
+from src.serving.forecaster import CatBoostForecaster, measure_latency
+
+PARAMS = {'iterations': 20, 'depth': 3}
+
+
+@pytest.fixture(scope="module")
+def daily(raw_load):
+    return prepare_daily_frame(raw_load, compact=False)
+
+
+@pytest.fixture
+def single_model(train_df, tmp_path):
+    model = train_catboost(train_df, {**PARAMS, 'train_dir': str(tmp_path / 'info')}, thread_count=1,
+                           pool_cache_dir=tmp_path / 'pools')
+    path = tmp_path / 'single.cbm'
+    model.save_model(str(path))
+    return path
+
+
+@pytest.fixture
+def multi_model(daily, tmp_path):
+    multi_df = build_multi_horizon_df(daily, verbose=False)
+    model = train_catboost_multi(multi_df, params={**PARAMS, 'train_dir': str(tmp_path / 'info')}, thread_count=1)
+    path = tmp_path / 'multi.cbm'
+    model.save_model(str(path))
+    return path
+
+
+def test_target_frame_matches_train_df(daily, train_df):
+    actual = build_target_frame(daily)
+    expected = train_df[['window_end_date', 'charging_type', 'y_next7_total']]
+    pd.testing.assert_frame_equal(actual, expected.reset_index(drop=True), check_dtype=False)
+
+    multi = build_target_frame(daily, level='daily')
+    reference = build_multi_horizon_df(daily, verbose=False)
+    cols = multi_horizon_target_columns(7, 'daily')
+    np.testing.assert_array_equal(multi[cols].to_numpy(), reference[cols].to_numpy())
+
+
+def test_single_output_columns(single_model, raw_load, daily):
+    forecaster = CatBoostForecaster(single_model, thread_count=1)
+    assert forecaster.n_outputs == 1
+    assert forecaster.prediction_cols == ['y_pred'] and forecaster.target_cols == ['y_next7_total']
+    forecasts = forecaster.predict_bulk(raw_load)
+    assert list(forecasts.columns) == ['window_end_date', 'charging_type', 'y_pred']
+    # 이미 전처리된 프레임을 넘겨도 같은 결과
+    pd.testing.assert_frame_equal(forecasts, forecaster.predict_bulk(forecaster.prepare(raw_load)))
+    assert len(forecaster.actuals(daily)) == len(forecasts) - daily['충전방식'].nunique() * 7
+
+
+def test_multi_output_columns(multi_model, daily):
+    target_cols = multi_horizon_target_columns(7, 'daily')
+    unnamed = CatBoostForecaster(multi_model, thread_count=1)
+    assert unnamed.n_outputs == 7
+    assert unnamed.prediction_cols == [f'y_pred_{i}' for i in range(1, 8)]
+    assert unnamed.actuals(daily) is None
+
+    named = CatBoostForecaster(multi_model, thread_count=1, target_cols=target_cols)
+    forecasts = named.predict_bulk(daily)
+    assert list(forecasts.columns[2:]) == target_cols
+    assert list(named.actuals(daily).columns[2:]) == target_cols
+
+    with pytest.raises(ValueError):
+        CatBoostForecaster(multi_model, target_cols=target_cols[:3])
+
+
+def test_missing_model_fails_without_creating_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, 'MODELS_DIR', tmp_path / 'outputs' / 'models')
+    monkeypatch.setattr(paths, 'SCRIPTS_MODELS_DIR', tmp_path / 'scripts' / 'outputs' / 'models')
+    with pytest.raises(FileNotFoundError):
+        paths.find_model_path('missing.cbm')
+    assert not (tmp_path / 'outputs').exists()
+
+    with pytest.raises(FileNotFoundError):
+        CatBoostForecaster(tmp_path / 'missing.cbm')
+
+
+def test_single_request_matches_bulk(single_model, raw_load):
+    forecaster = CatBoostForecaster(single_model, thread_count=1)
+    latest = forecaster.predict_bulk(raw_load, latest_only=True).set_index('charging_type')
+    assert len(latest) == raw_load['충전방식'].nunique()
+    for c_type, history in raw_load.groupby('충전방식', observed=True):
+        assert forecaster.predict_one(history) == pytest.approx(latest.loc[c_type, 'y_pred'], rel=1e-9)
+
+    stats = measure_latency(forecaster.predict_one, [history] * 5, warmup=1)
+    assert stats['n_requests'] == 5 and stats['p50_ms'] <= stats['max_ms']
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy.stats import entropy
+
+from src.features.fourier_transform import fft_features, fft_features_batch
+
+
+def reference_fft_features(daily_seq, top_k=3):
+    """기존 윈도우 1개 단위 구현"""
+    n = len(daily_seq)
+    amplitudes = np.abs(np.fft.rfft(daily_seq - np.mean(daily_seq)))
+    freqs = np.fft.rfftfreq(n)
+    features = {}
+    for j, idx in enumerate(np.argsort(amplitudes)[-top_k:][::-1]):
+        features[f'fft_amp_{j}'] = amplitudes[idx]
+        features[f'fft_freq_{j}'] = freqs[idx]
+    psd = amplitudes ** 2
+    features['total_power'] = np.sum(psd)
+    features['spectral_entropy'] = entropy(psd / (np.sum(psd) + 1e-9))
+    mid_idx = len(psd) // 2
+    features['low_freq_power'] = np.sum(psd[:mid_idx])
+    features['high_freq_power'] = np.sum(psd[mid_idx:])
+    return features
+
+
+@pytest.fixture(scope="module")
+def windows():
+    rng = np.random.default_rng(0)
+    weekly = np.sin(2 * np.pi * np.arange(28) / 7)
+    return np.vstack([
+        rng.integers(0, 100_000, (50, 28)),
+        1e5 + 1e4 * weekly + rng.normal(0, 1e3, (50, 28)),
+        np.full((2, 28), 5.0),  # 진폭이 모두 0 -> 동률 순서
+    ])
+
+
+@pytest.mark.parametrize('top_k', [1, 3, 15, 20])
+def test_batch_matches_reference(windows, top_k):
+    batch = fft_features_batch(windows, top_k=top_k)
+    for i, window in enumerate(windows):
+        expected = reference_fft_features(window.astype(np.float64), top_k)
+        assert set(batch) == set(expected)
+        for name, value in expected.items():
+            assert batch[name][i] == pytest.approx(value, rel=1e-9, abs=1e-6, nan_ok=True), (i, name)
+
+
+def test_single_window_wrapper(windows):
+    features = fft_features(windows[60], top_k=3)
+    expected = reference_fft_features(windows[60], 3)
+    assert features == pytest.approx(expected, rel=1e-12)
+
+
+def test_float32_output(windows):
+    batch = fft_features_batch(windows, dtype=np.float32)
+    assert all(values.dtype == np.float32 for values in batch.values())
+    np.testing.assert_allclose(batch['fft_amp_0'], fft_features_batch(windows)['fft_amp_0'], rtol=1e-4)
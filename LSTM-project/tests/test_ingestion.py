@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+import src.data.ingestion as ingestion
+from src.data.ingestion import HOURLY_COLS, ingest_raw_data, load_dataset
+
+
+def write_csv(path, dates, types, value, encoding, date_col='일자', hour_fmt='{:02d}시'):
+    frame = pd.DataFrame({date_col: dates, '충전방식': types})
+    for hour in range(24):
+        frame[hour_fmt.format(hour)] = value + hour
+    frame.to_csv(path, index=False, encoding=encoding)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    a, b = tmp_path / 'a.csv', tmp_path / 'b.csv'
+    write_csv(a, ['2024-01-01', '2024-01-02'], ['급속', '완속'], 100, 'cp949')
+    write_csv(b, ['2024-01-02', '2024-01-03'], ['완속', '완속'], 500, 'utf-8-sig', date_col='일시', hour_fmt='{}시(kW)')
+    return [a, b]
+
+
+def test_round_trip_and_cache(sources, tmp_path, monkeypatch):
+    store = tmp_path / 'store'
+    first = ingest_raw_data(sources, store)
+    assert [entry['cached'] for entry in first.values()] == [False, False]
+
+    df = load_dataset('daily', store)
+    assert list(df.columns) == ['일자', '충전방식', *HOURLY_COLS]
+    assert df['0시'].dtype == 'int32' and isinstance(df['충전방식'].dtype, pd.CategoricalDtype)
+    # 겹치는 (일자, 충전방식)은 나중 파일 값 사용
+    assert df[['일자', '충전방식', '0시']].astype({'충전방식': str}).values.tolist() == [
+        [pd.Timestamp('2024-01-01'), '급속', 100],
+        [pd.Timestamp('2024-01-02'), '완속', 500],
+        [pd.Timestamp('2024-01-03'), '완속', 500],
+    ]
+
+    # 내용이 같으면 다시 파싱하지 않음
+    monkeypatch.setattr(ingestion, 'read_raw_file', lambda path: pytest.fail(f"re-parsed {path}"))
+    second = ingest_raw_data(sources, store)
+    assert all(entry['cached'] for entry in second.values())
+    pd.testing.assert_frame_equal(load_dataset('daily', store), df)
+
+
+def test_changed_file_replaces_partition(sources, tmp_path):
+    store = tmp_path / 'store'
+    before = ingest_raw_data(sources, store)['a.csv']
+    write_csv(sources[0], ['2024-01-01'], ['급속'], 700, 'cp949')
+    after = ingest_raw_data(sources, store)['a.csv']
+    assert not after['cached'] and after['path'] != before['path']
+    assert not (store / before['path']).exists()
+    assert load_dataset('daily', store)['0시'].tolist() == [700, 500, 500]
+
+
+def test_missing_granularity(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_dataset('monthly', tmp_path)
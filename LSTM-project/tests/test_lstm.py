@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import torch
+
+from src.data.processing import prepare_daily_frame
+from src.models.lstm import (IndexBatchLoader, build_series_dataset, cross_validate_lstm, evaluate, fit_lstm,
+                             kfold_splits, predict, run_epoch)
+
+FIT_KWARGS = {'num_epochs': 2, 'batch_size': 64, 'hidden_dim': 8, 'num_layers': 1, 'dropout': 0.0, 'device': torch.device('cpu')}
+
+
+@pytest.fixture(scope="module")
+def dataset(raw_load):
+    dataset, _, target_scaler = build_series_dataset(prepare_daily_frame(raw_load, compact=False))
+    return dataset, target_scaler
+
+
+def test_windows_match_naive_slices(raw_load, dataset, train_df):
+    dataset, target_scaler = dataset
+    df = prepare_daily_frame(raw_load, compact=False).sort_values(['충전방식', '일자']).reset_index(drop=True)
+    assert len(dataset) == len(train_df)
+    for idx in (0, len(dataset) // 2, len(dataset) - 1):
+        window, label = dataset[idx]
+        start = int(dataset.starts[idx])
+        # 윈도우는 데이터 텐서의 복사 없는 뷰
+        assert window.untyped_storage().data_ptr() == dataset.data.untyped_storage().data_ptr()
+        torch.testing.assert_close(window, dataset.data[start:start + dataset.lookback])
+        assert df['충전방식'].iloc[start] == df['충전방식'].iloc[start + dataset.lookback + 6]
+        expected = df['daily_total'].iloc[start + dataset.lookback:start + dataset.lookback + 7].sum()
+        assert target_scaler.inverse_transform(label.numpy().reshape(-1, 1))[0, 0] == pytest.approx(expected, rel=1e-5)
+
+    # 같은 윈도우의 타깃은 build_train_df의 y_next7_total과 같음
+    labels = target_scaler.inverse_transform(dataset.labels.numpy().reshape(-1, 1)).ravel()
+    by_window = dict(zip(zip(dataset.window_end_dates, dataset.charging_types), labels))
+    for row in train_df.itertuples():
+        assert by_window[(row.window_end_date.to_datetime64(), row.charging_type)] == pytest.approx(row.y_next7_total, rel=1e-5)
+
+
+def test_batches_match_items(dataset):
+    dataset, _ = dataset
+    indices = torch.tensor([5, 0, 17])
+    inputs, labels = dataset.batch(indices)
+    for row, idx in enumerate(indices.tolist()):
+        window, label = dataset[idx]
+        torch.testing.assert_close(inputs[row], window)
+        torch.testing.assert_close(labels[row], label)
+    loader = IndexBatchLoader(dataset, batch_size=64, shuffle=True)
+    seen = torch.cat([batch_labels.squeeze(1) for _, batch_labels in loader])
+    assert len(loader) == -(-len(dataset) // 64)
+    torch.testing.assert_close(seen.sort().values, dataset.labels.sort().values)
+
+
+def test_streaming_evaluate_matches_predict(dataset):
+    from src.evaluation.metrics import regression_metrics
+    dataset, target_scaler = dataset
+    model, _ = fit_lstm(dataset, np.arange(200), verbose=False, **{**FIT_KWARGS, 'num_epochs': 1})
+    preds, targets = predict(model, dataset, target_scaler=target_scaler)
+    expected = regression_metrics(targets, preds)
+    result = evaluate(model, dataset, batch_size=100, target_scaler=target_scaler)
+    for name in ('mae', 'rmse', 'r2'):
+        assert result[name] == pytest.approx(expected[name], rel=1e-4)
+
+
+def test_run_epoch_collects_only_on_request(dataset):
+    dataset, _ = dataset
+    model, _ = fit_lstm(dataset, np.arange(100), verbose=False, **{**FIT_KWARGS, 'num_epochs': 1})
+    loader = IndexBatchLoader(dataset, np.arange(50), batch_size=16)
+    loss, preds, targets, _ = run_epoch(model, loader, torch.nn.MSELoss())
+    assert preds is None and targets is None
+    collected_loss, preds, targets, _ = run_epoch(model, loader, torch.nn.MSELoss(), collect=True)
+    assert collected_loss == pytest.approx(loss) and preds.shape == targets.shape == (50,)
+    assert loss == pytest.approx(torch.nn.functional.mse_loss(preds, targets).item(), rel=1e-5)
+
+
+def test_empty_validation_fold(dataset):
+    dataset, _ = dataset
+    model, history = fit_lstm(dataset, np.arange(100), np.array([], dtype=int), verbose=False, **FIT_KWARGS)
+    assert history['val_loss'].isna().all()
+    preds, targets = predict(model, dataset, [])
+    assert preds.shape == targets.shape == (0,)
+
+
+def test_inline_folds_restore_thread_count(dataset):
+    dataset, target_scaler = dataset
+    splits = kfold_splits(dataset, n_splits=2)
+    previous = torch.get_num_threads()
+    results = cross_validate_lstm(dataset, splits=splits, n_workers=1, total_threads=1,
+                                  target_scaler=target_scaler, **FIT_KWARGS)
+    assert torch.get_num_threads() == previous
+    assert [r['n_threads'] for r in results] == [1, 1]
+
+    # 같은 스레드 수로 fold를 따로 학습하면 같은 예측
+    torch.set_num_threads(1)
+    try:
+        model, _ = fit_lstm(dataset, *splits[0], verbose=False, **FIT_KWARGS)
+        preds, _ = predict(model, dataset, splits[0][1])
+    finally:
+        torch.set_num_threads(previous)
+    np.testing.assert_allclose(results[0]['val_pred'], preds, rtol=1e-6)
+    assert set(results[0]['metrics']) >= {'mae', 'rmse'}
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.evaluation.metrics import GroupedMetricAccumulator, MetricAccumulator, regression_metrics
+
+
+@pytest.fixture(scope="module")
+def values():
+    rng = np.random.default_rng(0)
+    y_true = 1e6 + rng.normal(0, 1e4, 5000)
+    y_pred = y_true + rng.normal(0, 5e3, 5000)
+    groups = rng.choice(['급속', '완속', '기타'], 5000)
+    return y_true, y_pred, groups
+
+
+def _reference(y_true, y_pred):
+    """노트북(lstm.ipynb)의 지표 계산"""
+    err = y_pred - y_true
+    mae = np.mean(np.abs(err))
+    return {
+        'mae': mae,
+        'mse': np.mean(err ** 2),
+        'rmse': np.sqrt(np.mean(err ** 2)),
+        'r2': 1 - np.sum(err ** 2) / np.sum((y_true - y_true.mean()) ** 2),
+        'pearson_corr': np.corrcoef(y_true, y_pred)[0, 1],
+        'accuracy': max(0, 1 - mae / (np.mean(y_true) + 1e-8)) * 100,
+    }
+
+
+def _assert_metrics(actual, expected):
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_one_pass_matches_reference(values):
+    y_true, y_pred, _ = values
+    metrics = regression_metrics(y_true, y_pred)
+    assert metrics['n'] == len(y_true)
+    _assert_metrics(metrics, _reference(y_true, y_pred))
+
+
+def test_streaming_matches_one_pass(values):
+    y_true, y_pred, _ = values
+    accumulator = MetricAccumulator()
+    for start in range(0, len(y_true), 512):
+        accumulator.update(y_true[start:start + 512], y_pred[start:start + 512])
+    _assert_metrics(accumulator.result(), _reference(y_true, y_pred))
+
+
+def test_minmax_scaler_inverse(values):
+    from sklearn.preprocessing import MinMaxScaler
+    y_true, y_pred, _ = values
+    scaler = MinMaxScaler().fit(y_true.reshape(-1, 1))
+    scaled_true = scaler.transform(y_true.reshape(-1, 1))
+    scaled_pred = scaler.transform(y_pred.reshape(-1, 1))
+    result = MetricAccumulator.with_minmax_scaler(scaler).update(scaled_true, scaled_pred).result()
+    _assert_metrics(result, _reference(y_true, y_pred))
+
+
+def test_grouped_matches_per_group(values):
+    y_true, y_pred, groups = values
+    accumulator = GroupedMetricAccumulator()
+    for start in range(0, len(y_true), 700):
+        part = slice(start, start + 700)
+        accumulator.update(groups[part], y_true[part], y_pred[part])
+    by_group = accumulator.group_results()
+    for label in np.unique(groups):
+        mask = groups == label
+        _assert_metrics(by_group.loc[label], _reference(y_true[mask], y_pred[mask]))
+    _assert_metrics(accumulator.result(), _reference(y_true, y_pred))
+
+
+def test_empty_input():
+    metrics = regression_metrics([], [])
+    assert metrics['n'] == 0 and np.isnan(metrics['mae'])
+    assert MetricAccumulator().result()['n'] == 0
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.processing import HOURLY_COLS, prepare_daily_frame
+from src.dataset.windowing import build_multi_horizon_df, multi_horizon_target_columns
+
+
+@pytest.fixture(scope="module")
+def daily(raw_load):
+    return prepare_daily_frame(raw_load, compact=False)
+
+
+def test_daily_targets(daily, train_df):
+    multi = build_multi_horizon_df(daily, verbose=False)
+    targets = multi_horizon_target_columns(7, 'daily')
+    # 특징은 단일 타깃 학습 데이터와 같고, 일별 타깃의 합은 y_next7_total
+    features = [col for col in train_df.columns if col != 'y_next7_total']
+    pd.testing.assert_frame_equal(multi[features], train_df[features], check_dtype=False)
+    np.testing.assert_allclose(multi[targets].sum(axis=1), train_df['y_next7_total'])
+
+    series = daily.set_index(['충전방식', '일자'])['daily_total']
+    for row in multi.sample(20, random_state=0).itertuples():
+        dates = pd.date_range(row.window_end_date + pd.Timedelta(days=1), periods=7)
+        expected = series.loc[[(row.charging_type, date) for date in dates]].to_numpy()
+        np.testing.assert_array_equal([getattr(row, col) for col in targets], expected)
+
+
+def test_hourly_targets(daily):
+    multi = build_multi_horizon_df(daily, horizon=2, level='hourly', verbose=False)
+    targets = multi_horizon_target_columns(2, 'hourly')
+    assert len(targets) == 48 and targets[:2] == ['y_d1_h00', 'y_d1_h01']
+
+    hourly = daily.set_index(['충전방식', '일자'])[HOURLY_COLS]
+    row = multi.iloc[10]
+    expected = np.concatenate([
+        hourly.loc[(row['charging_type'], row['window_end_date'] + pd.Timedelta(days=d))].to_numpy()
+        for d in (1, 2)
+    ])
+    np.testing.assert_array_equal(row[targets].to_numpy(dtype=np.float64), expected)
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from src.data.processing import add_daily_features, preprocess_data
+from src.dataset.windowing import build_train_df
+
+
+@pytest.fixture(scope="module")
+def daily(raw_load):
+    # 충전방식 6개 (원본 2개를 이름만 바꿔 3벌)
+    raw = pd.concat([raw_load.assign(충전방식=raw_load['충전방식'] + f'_{i}') for i in range(3)], ignore_index=True)
+    return add_daily_features(preprocess_data(raw))
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_parallel_matches_serial(daily, executor, vectorized):
+    serial = build_train_df(daily, vectorized=vectorized, verbose=False)
+    parallel = build_train_df(daily, vectorized=vectorized, n_jobs=3, executor=executor, verbose=False)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_rejects_unknown_executor(daily):
+    with pytest.raises(ValueError):
+        build_train_df(daily, n_jobs=2, executor='gpu', verbose=False)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.processing import HOURLY_COLS, add_daily_features, prepare_daily_frame, preprocess_data
+
+
+def baseline_preprocess(data):
+    """최적화 이전 preprocess_data (비교 기준)"""
+    df = data.copy()
+    df['일자'] = pd.to_datetime(df['일자'])
+    for col in HOURLY_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+def baseline_daily_features(df):
+    """최적화 이전 add_daily_features (비교 기준)"""
+    df['daily_total'] = df[HOURLY_COLS].sum(axis=1)
+    peak_cols = [f'{i}시' for i in range(8, 20)]
+    df['peak_ratio'] = df[peak_cols].sum(axis=1) / (df['daily_total'] + 1e-9)
+    return df
+
+
+def _variants(raw):
+    rng = np.random.default_rng(1)
+    floats = raw.copy()
+    floats[HOURLY_COLS] = raw[HOURLY_COLS] * rng.uniform(0.5, 1.5, (len(raw), 24)) + 0.01
+    with_nan = floats.copy()
+    with_nan.loc[rng.choice(len(raw), 30, replace=False), '5시'] = np.nan
+    with_object = raw.copy()
+    with_object['3시'] = raw['3시'].astype(object)
+    with_object.loc[0, '3시'] = '-'
+    return {'int': raw, 'float': floats, 'float_nan': with_nan, 'object_nan': with_object}
+
+
+@pytest.mark.parametrize('variant', ['int', 'float', 'float_nan', 'object_nan'])
+def test_default_output_matches_baseline(raw_load, variant):
+    raw = _variants(raw_load)[variant]
+    expected = baseline_daily_features(baseline_preprocess(raw))
+
+    # 행 합계는 numpy 축소 연산이라 실수 데이터는 pandas와 덧셈 순서만 다름
+    pd.testing.assert_frame_equal(add_daily_features(preprocess_data(raw)), expected, check_exact=False, rtol=1e-12)
+    pd.testing.assert_frame_equal(prepare_daily_frame(raw), expected, check_exact=False, rtol=1e-12)
+    if variant == 'int':
+        pd.testing.assert_frame_equal(prepare_daily_frame(raw), expected, check_exact=True)
+
+
+def test_object_column_with_missing_keeps_other_dtypes(raw_load):
+    raw = _variants(raw_load)['object_nan']
+    df = preprocess_data(raw)
+    assert df['3시'].dtype == np.float64
+    assert (df[[c for c in HOURLY_COLS if c != '3시']].dtypes == np.int64).all()
+
+
+def test_compact_narrows_hourly_columns(raw_load):
+    df = prepare_daily_frame(raw_load, compact=True)
+    assert (df[HOURLY_COLS].dtypes == np.int32).all()
+    expected = baseline_daily_features(baseline_preprocess(raw_load))
+    np.testing.assert_array_equal(df['daily_total'].to_numpy(), expected['daily_total'].to_numpy())
+
+
+def test_inplace_skips_copy(raw_load):
+    raw = raw_load.copy()
+    assert preprocess_data(raw, inplace=True) is raw
@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.features.fourier_transform import fft_features_batch
+from src.utils import profiling
+
+
+@pytest.fixture
+def enabled():
+    profiling.reset_profiling()
+    profiling.enable_profiling()
+    yield
+    profiling.disable_profiling()
+    profiling.reset_profiling()
+
+
+def test_disabled_records_nothing():
+    profiling.reset_profiling()
+    with profiling.profile_stage('idle') as record:
+        assert record == {}
+    assert profiling.profile_records().empty
+
+
+def test_nested_stages_are_aggregated(enabled):
+    windows = np.random.default_rng(0).random((50, 28))
+    with profiling.profile_stage('outer', rows=len(windows)):
+        fft_features_batch(windows)
+        fft_features_batch(windows)
+
+    records = profiling.profile_records()
+    # 중첩 호출은 호출 수와 관계없이 단계 이름별 1행
+    assert records['stage'].is_unique
+    top = records[records['depth'] == 0]
+    assert top['stage'].tolist() == ['outer']
+    assert top['process_peak_rss_mb'].notna().all()
+
+    summary = profiling.profile_summary().set_index('stage')
+    assert summary.loc['outer', 'calls'] == 1
+    nested = summary[summary['depth'] > 0]
+    assert len(nested) and (nested['calls'] >= 2).all()
+    assert nested['process_peak_rss_mb'].isna().all()
+
+
+def test_depth_is_per_thread(enabled):
+    inside, release = threading.Event(), threading.Event()
+
+    def worker():
+        with profiling.profile_stage('worker'):
+            inside.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    inside.wait(5)
+    # 다른 스레드의 단계 안에 있어도 이 스레드의 단계는 최상위
+    with profiling.profile_stage('main'):
+        pass
+    release.set()
+    thread.join()
+
+    depths = profiling.profile_records().set_index('stage')['depth']
+    assert depths['main'] == 0 and depths['worker'] == 0
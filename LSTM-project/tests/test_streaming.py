@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from src.data.processing import add_daily_features, preprocess_data
+from src.dataset.streaming import IncrementalWindowBuilder
+from src.dataset.windowing import build_inference_df
+
+
+@pytest.fixture(scope="module")
+def daily(raw_load):
+    return add_daily_features(preprocess_data(raw_load))
+
+
+def _sorted(frame):
+    return frame.sort_values(['window_end_date', 'charging_type']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('resync_every', [None, 5, 1000])
+def test_incremental_matches_batch(daily, train_df, resync_every):
+    builder = IncrementalWindowBuilder(resync_every=resync_every)
+    samples = _sorted(builder.update_frame(daily))
+    assert len(samples) == len(train_df)
+    # Sliding DFT는 재동기화 주기 사이에서만 오차가 누적되므로 상대 오차로 비교
+    pd.testing.assert_frame_equal(samples[train_df.columns], train_df, check_dtype=False, rtol=1e-6)
+
+
+def test_warm_start_continues_stream(daily, train_df):
+    cutoff = daily['일자'].sort_values().unique()[150]
+    builder = IncrementalWindowBuilder().warm_start(daily[daily['일자'] <= cutoff])
+    samples = _sorted(builder.update_frame(daily[daily['일자'] > cutoff]))
+    expected = train_df[train_df['window_end_date'] > cutoff - pd.Timedelta(days=7)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(samples[expected.columns], expected, check_dtype=False, rtol=1e-6)
+
+    latest = build_inference_df(daily, latest_only=True).set_index('charging_type')
+    for c_type, row in latest.iterrows():
+        features = builder.latest_features(c_type)
+        assert features['window_end_date'] == row['window_end_date']
+        assert features['mean_28d'] == pytest.approx(row['mean_28d'])
+        assert features['fft_amp_0'] == pytest.approx(row['fft_amp_0'], rel=1e-6)
+
+
+def test_rejects_out_of_order_dates(daily):
+    builder = IncrementalWindowBuilder()
+    row = daily.iloc[0][['일자', '충전방식', 'daily_total', 'peak_ratio']].to_dict()
+    builder.update(row)
+    with pytest.raises(ValueError):
+        builder.update(row)
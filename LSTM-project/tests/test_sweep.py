@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.processing import prepare_daily_frame
+from src.dataset.windowing import build_train_df, build_train_df_sweep
+
+LOOKBACKS, HORIZONS, TOP_KS = (14, 28), (1, 7), (2, 3, 20)
+
+
+@pytest.fixture(scope="module", params=['int', 'float'])
+def daily(request, raw_load):
+    df = prepare_daily_frame(raw_load, compact=False)
+    if request.param == 'float':
+        df['daily_total'] = df['daily_total'].astype(np.float64) / 3
+    return df
+
+
+def test_sweep_matches_individual_builds(daily):
+    sweep = build_train_df_sweep(daily, LOOKBACKS, HORIZONS, TOP_KS, verbose=False)
+    assert set(sweep) == {(lb, h, k) for lb in LOOKBACKS for h in HORIZONS for k in TOP_KS}
+    for (lookback, horizon, top_k), frame in sweep.items():
+        expected = build_train_df(daily, lookback, horizon, top_k, verbose=False)
+        pd.testing.assert_frame_equal(frame, expected, check_dtype=False, rtol=1e-9)
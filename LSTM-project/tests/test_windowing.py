@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.processing import add_daily_features, preprocess_data
+from src.dataset.windowing import build_inference_df, build_train_df
+
+
+@pytest.fixture(scope="module", params=['int', 'float'])
+def daily(request, raw_load):
+    df = add_daily_features(preprocess_data(raw_load))
+    if request.param == 'float':
+        df['daily_total'] = df['daily_total'].astype(np.float64) * 1.5
+    return df
+
+
+def test_vectorized_matches_row_loop(daily):
+    loop = build_train_df(daily, vectorized=False, verbose=False)
+    vectorized = build_train_df(daily, verbose=False)
+    assert list(vectorized.columns) == list(loop.columns)
+    pd.testing.assert_frame_equal(vectorized, loop, check_exact=True)
+
+
+@pytest.mark.parametrize('lookback, horizon, top_k', [(14, 1, 2), (28, 7, 3), (7, 14, 5)])
+def test_window_parameters(daily, lookback, horizon, top_k):
+    loop = build_train_df(daily, lookback, horizon, top_k, vectorized=False, verbose=False)
+    vectorized = build_train_df(daily, lookback, horizon, top_k, verbose=False)
+    pd.testing.assert_frame_equal(vectorized, loop, check_exact=True)
+    n_types = daily['충전방식'].nunique()
+    assert len(vectorized) == n_types * (daily.groupby('충전방식').size().iloc[0] - lookback - horizon + 1)
+
+
+def test_inference_windows_match_training_features(daily):
+    train = build_train_df(daily, verbose=False)
+    inference = build_inference_df(daily)
+    # 추론 윈도우는 타깃이 없는 마지막 horizon개 윈도우까지 포함
+    merged = train.merge(inference, on=['window_end_date', 'charging_type'], suffixes=('', '_inf'))
+    assert len(merged) == len(train)
+    for col in ['mean_28d', 'std_28d', 'fft_amp_0', 'spectral_entropy']:
+        np.testing.assert_allclose(merged[col], merged[f'{col}_inf'])
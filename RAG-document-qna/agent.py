@@ -7,65 +7,108 @@ from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_classic.chains import RetrievalQA
 from langchain_core.prompts import PromptTemplate
 
+from answer_cache import AnswerCache, CachedRetrievalQA, cache_version
+from embedding_cache import CachedEmbeddings
+from index_store import ANN_DB_PATH, NPROBE, EF_SEARCH, load_meta, load_store
+from lexical_index import HybridRetriever, LexicalIndex
+
 # --- 설정 ---
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MODEL_PATH = './bge-m3'
 DB_PATH = 'vectorstore/db_faiss'
+LEXICAL_PATH = os.path.join(DB_PATH, 'lexical')  # ingest.py가 만든 BM25 역색인
+RETRIEVAL_MODE = 'lexical_first'  # dense | lexical | hybrid | lexical_first (BM25가 확실하면 질문 임베딩 생략)
+USE_ANN_INDEX = True  # index_store.py build로 만든 서빙용 저장소가 있으면 mmap 로드 (없으면 DB_PATH 사용)
+USE_ANSWER_CACHE = True  # 같은/거의 같은 질문은 LLM 호출 없이 저장된 답변 반환 (answer_cache.py)
+LLM_MODEL = "gemini-2.5-flash"
+TOP_K = 5
+PROMPT_TEMPLATE = """당신은 기술 지원 전문가입니다. 아래 제공된 [참고 문서] 내용만을 바탕으로 답변하세요.
+문서에 내용이 없다면 "해당 내용은 문서에서 찾을 수 없습니다"라고 답하세요.
+
+[참고 문서]
+{context}
+
+[질문]
+{question}
+
+전문가 답변:"""
+
+def set_api_key():
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY가 .env 파일에 정의되어 있지 않습니다.")
+    os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
 
-os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY가 .env 파일에 정의되어 있지 않습니다.")
+def store_version(use_ann):
+    """답변 캐시 버전: 벡터 DB manifest(+ 서빙용 인덱스 meta), 임베딩 모델, LLM, 프롬프트, 검색 설정의 해시
+    ingest.py/index_store.py로 DB가 바뀌면 값이 달라져 이전 답변은 버려짐"""
+    parts = [MODEL_PATH, LLM_MODEL, PROMPT_TEMPLATE, RETRIEVAL_MODE, TOP_K]
+    paths = [os.path.join(DB_PATH, 'manifest.json')]
+    if use_ann:
+        paths.append(os.path.join(ANN_DB_PATH, 'meta.json'))
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                parts.append(f.read())
+    return cache_version(*parts)
 
-def get_agent():
-    # 1. 임베딩 모델 로딩
-    embeddings = HuggingFaceEmbeddings(
+def get_agent(llm=None, answer_cache=False):
+    """RetrievalQA 체인 생성 (llm을 주면 Gemini 대신 사용, 예: batch_qa.py의 스텁 LLM)
+    answer_cache=True면 답변 캐시를 앞에 둔 CachedRetrievalQA 반환 (invoke 사용법은 같음)"""
+    # 1. 임베딩 모델 로딩 (반복 질문은 디스크 캐시에서 반환, bge-m3는 질의/문서 임베딩이 같아 질의도 배치 계산)
+    model = HuggingFaceEmbeddings(
         model_name=MODEL_PATH,
         model_kwargs={'device': 'cpu'},
         encode_kwargs={'normalize_embeddings': True}
     )
+    embeddings = CachedEmbeddings(model, MODEL_PATH, query_batch=model.embed_documents)
 
-    # 2. FAISS DB 로드
-    if not os.path.exists(DB_PATH):
-        raise FileNotFoundError(f"벡터 DB가 '{DB_PATH}'에 없습니다. ingest.py를 먼저 실행하세요.")
-    
-    vectorstore = FAISS.load_local(
-        DB_PATH, 
-        embeddings, 
-        allow_dangerous_deserialization=True 
-    )
-
-    # 3. LLM 설정
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.1)
+    # 2. FAISS DB 로드 (서빙용 저장소: 인덱스 mmap + SQLite docstore, 없으면 전체 pickle 로드)
+    use_ann = USE_ANN_INDEX and load_meta(ANN_DB_PATH) is not None
+    if use_ann:
+        vectorstore = load_store(embeddings, ANN_DB_PATH, mmap=True, nprobe=NPROBE, ef_search=EF_SEARCH)
+    else:
+        if not os.path.exists(DB_PATH):
+            raise FileNotFoundError(f"벡터 DB가 '{DB_PATH}'에 없습니다. ingest.py를 먼저 실행하세요.")
 
-    # 4. 프롬프트 템플릿
-    template = """당신은 기술 지원 전문가입니다. 아래 제공된 [참고 문서] 내용만을 바탕으로 답변하세요.
-문서에 내용이 없다면 "해당 내용은 문서에서 찾을 수 없습니다"라고 답하세요.
-
-[참고 문서]
-{context}
+        vectorstore = FAISS.load_local(
+            DB_PATH, 
+            embeddings, 
+            allow_dangerous_deserialization=True 
+        )
 
-[질문]
-{question}
+    # 3. 하이브리드 검색기 (BM25 역색인이 없으면 벡터 검색만 사용)
+    lexical = LexicalIndex.load(LEXICAL_PATH) if LexicalIndex.exists(LEXICAL_PATH) else None
+    if lexical is None:
+        print(f"알림: BM25 역색인이 '{LEXICAL_PATH}'에 없어 벡터 검색만 사용합니다. ingest.py를 다시 실행하세요.")
+    retriever = HybridRetriever(vectorstore=vectorstore, lexical=lexical, k=TOP_K, mode=RETRIEVAL_MODE)
 
-전문가 답변:"""
+    # 4. LLM 설정
+    if llm is None:
+        set_api_key()
+        llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0.1)
 
-    prompt = PromptTemplate(template=template, input_variables=["context", "question"])
+    # 5. 프롬프트 템플릿
+    prompt = PromptTemplate(template=PROMPT_TEMPLATE, input_variables=["context", "question"])
 
-    # 5. RAG 체인 구성
+    # 6. RAG 체인 구성
     qa_chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
-        retriever=vectorstore.as_retriever(search_kwargs={"k": 5}),
+        retriever=retriever,
         return_source_documents=True,
         chain_type_kwargs={"prompt": prompt}
     )
+
+    # 7. 답변 캐시 (정확 일치 -> 질문 임베딩 유사 일치 -> 미적중 시 체인 실행 후 저장)
+    if answer_cache:
+        return CachedRetrievalQA(qa_chain, AnswerCache(store_version(use_ann)), embeddings)
     return qa_chain
 
 def main():
     print("KERI 에이전트 초기화 중...")
     try:
-        agent = get_agent()
+        agent = get_agent(answer_cache=USE_ANSWER_CACHE)
     except Exception as e:
         print(f"초기화 실패: {e}")
         # 어떤 모듈이 부족한지 구체적으로 확인하기 위한 출력
@@ -76,7 +119,10 @@ def main():
     print("\n연결 완료. (종료: q)")
     while True:
         query = input("\n[질문]: ")
-        if query.lower() == 'q': break
+        if query.lower() == 'q':
+            if isinstance(agent, CachedRetrievalQA):
+                print(agent.cache.report())
+            break
         
         print("답변 생성 중...")
         try:
@@ -84,6 +130,8 @@ def main():
             print("\n" + "="*60)
             print(f"[답변]: {response['result']}")
             print("="*60)
+            if response.get('cache'):
+                print(f"(답변 캐시 {response['cache']} 적중, {response['cache_ms']:.1f}ms)")
             
             print("\n[참고한 문서 조각]")
             for doc in response['source_documents']:
@@ -0,0 +1,250 @@
+"""
+agent.py RetrievalQA 앞단의 답변 캐시 (반복/유사 질문)
+
+- 정확 일치: 정규화한 질문(NFKC, 소문자, 공백 정리, 끝 문장부호 제거) 해시로 조회
+- 유사 일치: 질문 임베딩과 저장된 질문 임베딩의 코사인 유사도가 threshold 이상인 가장 가까운 항목
+- version: 벡터 DB manifest/인덱스, LLM, 프롬프트, 검색 설정의 해시. 다른 version의 항목은 열 때 삭제
+  -> ingest.py로 문서가 바뀌면 캐시 무효화
+- ttl초가 지난 항목은 사용하지 않고 삭제, max_entries 초과 시 가장 오래 사용되지 않은(LRU) 항목부터 삭제
+- 답변과 source_documents를 SQLite 파일에 저장하고 정확/유사 적중, 미적중 수를 집계
+- CachedRetrievalQA: 체인의 retriever가 HybridRetriever이면 BM25 단계를 먼저 실행해
+  BM25만으로 검색이 끝나는 질문(lexical_first)은 임베딩 없이 정확 일치 캐시만 사용하고,
+  그 외 질문은 유사 일치 조회에 쓴 질문 임베딩을 벡터 검색에 그대로 재사용
+"""
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lexical_index import HybridRetriever
+
+DEFAULT_CACHE_PATH = "vectorstore/answer_cache.sqlite"
+DEFAULT_THRESHOLD = 0.95  # 유사 일치로 인정할 최소 코사인 유사도
+DEFAULT_TTL = 7 * 24 * 3600  # 초
+DEFAULT_MAX_ENTRIES = 10_000
+
+def normalize_question(text):
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.。 ")
+
+def cache_version(*parts):
+    """버전 구성 요소(문자열/바이트)들의 해시"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+class AnswerCache:
+    """정규화 질문 정확 일치 + 질문 임베딩 유사 일치 답변 캐시"""
+
+    def __init__(self, version, path=DEFAULT_CACHE_PATH, threshold=DEFAULT_THRESHOLD, ttl=DEFAULT_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.version = version
+        self.path = str(path)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB,
+                answer TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers(last_used);
+        """)
+        # 다른 버전(재수집 전 DB, 다른 모델/프롬프트)과 만료된 항목 삭제
+        self._conn.execute("DELETE FROM answers WHERE version != ? OR created < ?", (version, self._expiry()))
+        self._conn.commit()
+        self._load_matrix()
+
+    def _expiry(self):
+        return time.time() - self.ttl if self.ttl else 0.0
+
+    def _key(self, question):
+        return hashlib.sha256(f"{self.version}\0{normalize_question(question)}".encode("utf-8")).hexdigest()
+
+    def _load_matrix(self):
+        """유사 일치용 (키 리스트, 정규화된 임베딩 행렬)을 메모리에 적재"""
+        rows = self._conn.execute("SELECT key, embedding FROM answers WHERE embedding IS NOT NULL").fetchall()
+        self._keys = []
+        self._rows = {}
+        self._matrix = None
+        for key, blob in rows:
+            self._append(key, np.frombuffer(blob, dtype=np.float32))
+
+    def _append(self, key, vector):
+        """행렬에 정규화한 임베딩 추가 (같은 키는 덮어씀, 용량은 2배씩 증가)"""
+        vector = vector / max(np.linalg.norm(vector), 1e-12)
+        if key in self._rows:
+            self._matrix[self._rows[key]] = vector
+            return
+        if self._matrix is None:
+            self._matrix = np.empty((16, len(vector)), dtype=np.float32)
+        elif len(self._keys) == len(self._matrix):
+            self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+        self._rows[key] = len(self._keys)
+        self._matrix[len(self._keys)] = vector
+        self._keys.append(key)
+
+    def _fetch(self, key):
+        """항목 조회 (만료되었으면 삭제 후 None), 적중 시 LRU 시각 갱신"""
+        row = self._conn.execute("SELECT answer, sources, created FROM answers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        answer, sources, created = row
+        if created < self._expiry():
+            self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._conn.commit()
+            self._load_matrix()
+            return None
+        self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        docs = [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in json.loads(sources)]
+        return answer, docs
+
+    def get(self, question):
+        """정확 일치 조회 -> (답변, 문서 리스트) 또는 None (미적중은 get_similar에서 집계)"""
+        with self._lock:
+            found = self._fetch(self._key(question))
+            if found is not None:
+                self.exact_hits += 1
+        return found
+
+    def get_similar(self, vector):
+        """임베딩 유사 일치 조회 -> (답변, 문서 리스트, 유사도) 또는 None"""
+        with self._lock:
+            found = None
+            if self._keys:
+                query = np.asarray(vector, dtype=np.float32)
+                scores = self._matrix[:len(self._keys)] @ (query / max(np.linalg.norm(query), 1e-12))
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    hit = self._fetch(self._keys[best])
+                    if hit is not None:
+                        found = (*hit, float(scores[best]))
+            if found is None:
+                self.misses += 1
+            else:
+                self.semantic_hits += 1
+        return found
+
+    def record_miss(self):
+        """유사 일치 조회 없이 미적중 처리한 질문 집계 (임베딩하지 않은 질문)"""
+        with self._lock:
+            self.misses += 1
+
+    def put(self, question, vector, answer, docs):
+        now = time.time()
+        sources = json.dumps([{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs],
+                             ensure_ascii=False)
+        key = self._key(question)
+        vector = None if vector is None else np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (key, self.version, question, None if vector is None else vector.tobytes(),
+                                answer, sources, now, now))
+            count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            if self.max_entries and count > self.max_entries:
+                # 한도의 90%까지 한 번에 줄여 행렬 재적재 횟수를 제한
+                self._conn.execute(
+                    "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY last_used LIMIT ?)",
+                    (count - int(self.max_entries * 0.9),)
+                )
+                self._conn.commit()
+                self._load_matrix()
+            else:
+                self._conn.commit()
+                if vector is not None:
+                    self._append(key, vector)
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            exact_hits, semantic_hits, misses = self.exact_hits, self.semantic_hits, self.misses
+        total = exact_hits + semantic_hits + misses
+        return {
+            "exact_hits": exact_hits,
+            "semantic_hits": semantic_hits,
+            "misses": misses,
+            "hit_rate": (exact_hits + semantic_hits) / total if total else 0.0,
+            "entries": count,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"답변 캐시: 정확 적중 {stats['exact_hits']}회 / 유사 적중 {stats['semantic_hits']}회 / "
+                f"미적중 {stats['misses']}회 (적중률 {stats['hit_rate']:.1%}), {stats['entries']}개")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CachedRetrievalQA:
+    """RetrievalQA 체인 앞에 AnswerCache를 둔 래퍼 (invoke 입출력 형식은 RetrievalQA와 같음)
+
+    결과 dict의 'cache'에 적중 종류('exact', 'semantic' 또는 None)와 조회 시간('cache_ms')을 추가.
+    """
+
+    def __init__(self, chain, cache, embeddings=None):
+        self.chain = chain
+        self.cache = cache
+        self.embeddings = embeddings or chain.retriever.vectorstore.embeddings
+
+    def invoke(self, inputs):
+        query = inputs["query"]
+        start = time.perf_counter()
+        hit = self.cache.get(query)
+        if hit is not None:
+            return self._result(query, *hit, "exact", start)
+
+        retriever = self.chain.retriever
+        if not isinstance(retriever, HybridRetriever):
+            vector = self.embeddings.embed_query(query)
+            hit = self.cache.get_similar(vector)
+            if hit is not None:
+                return self._result(query, hit[0], hit[1], "semantic", start)
+            response = self.chain.invoke(inputs)
+            self.cache.put(query, vector, response["result"], response.get("source_documents", []))
+            return {**response, "cache": None}
+
+        # 검색을 직접 나눠 실행: BM25로 끝나면 임베딩 생략, 아니면 유사 조회용 임베딩으로 벡터 검색
+        timings = {}
+        lexical_ids, docs = retriever._lexical_stage(query, timings)
+        vector = None
+        if docs is None:
+            vector = self.embeddings.embed_query(query)
+            hit = self.cache.get_similar(vector)
+            if hit is not None:
+                return self._result(query, hit[0], hit[1], "semantic", start)
+            docs = retriever._dense_stage(vector, lexical_ids, timings)
+        else:
+            self.cache.record_miss()
+        # 검색이 끝났으므로 RetrievalQA의 문서 결합 체인만 호출
+        answer = self.chain.combine_documents_chain.invoke({"input_documents": docs, "question": query})["output_text"]
+        self.cache.put(query, vector, answer, docs)
+        return {"query": query, "result": answer, "source_documents": docs, "cache": None}
+
+    @staticmethod
+    def _result(query, answer, docs, kind, start):
+        return {"query": query, "result": answer, "source_documents": docs, "cache": kind,
+                "cache_ms": (time.perf_counter() - start) * 1000}
@@ -0,0 +1,248 @@
+"""
+질문 JSONL 파일 일괄 질의응답 (회귀 평가용)
+
+입력 한 줄: {"id": ..., "question": ...} ("id"가 없으면 줄 번호)
+- 질문을 --embed-batch개씩 묶어 BM25 검색 후, 벡터 검색이 필요한 질문만 한 번의 호출로 임베딩
+- LLM 호출은 asyncio로 동시에 최대 --concurrency개, 분당 --rpm개 토큰 버킷으로 제한
+- 429 / RESOURCE_EXHAUSTED 오류는 서버가 알려준 대기 시간만큼 버킷을 멈춘 뒤 재시도
+- 결과는 끝나는 대로 출력 JSONL에 기록 (입력 순서와 다를 수 있음, id로 대응), --resume은 이미 답한 id를 건너뜀
+  timings_ms: 검색 단계별 시간 (embed는 묶음 전체의 배치 호출 시간), queue_ms: 검색 후 동시 실행 슬롯 대기 시간,
+  latency_ms: 슬롯을 얻은 뒤 답변까지 (토큰 버킷 대기와 재시도 포함)
+
+사용법:
+    python batch_qa.py questions.jsonl -o answers.jsonl --concurrency 4 --rpm 10
+    python batch_qa.py questions.jsonl --stub-llm --stub-latency 0.5   (Gemini 호출 없이 로컬 스텁 LLM)
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import numpy as np
+from langchain_core.language_models import FakeListChatModel
+
+from agent import get_agent
+
+# --- 설정 ---
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RPM = 10  # gemini-2.5-flash 무료 등급 분당 요청 수
+DEFAULT_EMBED_BATCH = 64
+MAX_RETRIES = 5
+STUB_ANSWER = "(stub answer)"
+
+class TokenBucket:
+    """분당 rate_per_minute개, 최대 burst개까지 모아 두는 asyncio 토큰 버킷"""
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """사용 제한 오류 후 seconds초 동안 토큰 지급 중단 (모아 둔 토큰도 비움)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+class StubChatModel(FakeListChatModel):
+    """Gemini 대용 로컬 스텁: latency초 후 고정 답변, error_rate 비율로 429 오류 발생"""
+
+    latency: float = 0.5
+    error_rate: float = 0.0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (stub). Please retry in 0.2s.")
+        return self._generate(messages, stop=stop, **kwargs)
+
+def is_rate_limited(error):
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "429" in message
+
+def retry_delay(error, attempt):
+    """사용 제한 오류 후 대기 시간 (서버 안내값, 없으면 지수 백오프)"""
+    match = re.search(r"retry in ([\d.]+)\s*s|retryDelay['\"]?:\s*['\"]?([\d.]+)s", str(error))
+    if match:
+        return float(match.group(1) or match.group(2))
+    return min(60.0, 2.0 ** attempt)
+
+async def call_with_retry(bucket, func, max_retries=MAX_RETRIES):
+    """토큰 버킷을 거쳐 func() 실행, 사용 제한 오류는 재시도. 반환: (결과, 시도 횟수)"""
+    for attempt in range(1, max_retries + 2):
+        if bucket is not None:
+            await bucket.acquire()
+        try:
+            return await func(), attempt
+        except Exception as e:
+            if not is_rate_limited(e) or attempt > max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            if bucket is not None:
+                bucket.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+def read_questions(path, skip_ids=()):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", line_no)
+            if item["id"] not in skip_ids:
+                yield item
+
+def completed_ids(path):
+    """출력 파일에서 오류 없이 답한 id 집합 (--resume용)"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return {record["id"] for record in records if not record.get("error")}
+
+def windows(items, size):
+    window = []
+    for item in items:
+        window.append(item)
+        if len(window) == size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+def source_info(doc):
+    return {key: doc.metadata[key] for key in ("source", "page") if key in doc.metadata}
+
+async def run_batch(questions_path, output_path, retriever, answer_fn, concurrency=DEFAULT_CONCURRENCY,
+                    rpm=DEFAULT_RPM, embed_batch=DEFAULT_EMBED_BATCH, embed_rpm=None, resume=False):
+    """questions_path의 질문에 답해 끝나는 순서대로 output_path에 기록하고 요약 dict 반환 (처리량과 지연시간 백분위는 답변에 성공한 질문의 latency_ms 기준)
+
+    answer_fn(question, docs): 답변 문자열을 반환하는 코루틴
+    """
+    llm_bucket = TokenBucket(rpm) if rpm else None
+    embed_bucket = TokenBucket(embed_rpm) if embed_rpm else None
+    slots = asyncio.Semaphore(concurrency)
+    skip = completed_ids(output_path) if resume else set()
+    latencies, errors = [], 0
+    started = time.perf_counter()
+
+    def write(record):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    async def answer(item, docs, timings, queue_wait):
+        nonlocal errors
+        record = {"id": item["id"], "question": item["question"]}
+        queued = time.perf_counter()
+        try:
+            text, attempts = await call_with_retry(llm_bucket, lambda: answer_fn(item["question"], docs))
+            timings["llm"] = time.perf_counter() - queued
+            record.update(answer=text, attempts=attempts)
+        except Exception as e:
+            errors += 1
+            record.update(answer=None, error=f"{type(e).__name__}: {e}")
+        finally:
+            slots.release()
+        latency = time.perf_counter() - queued
+        if "error" not in record:  # 실패한 질문은 처리량/지연시간 집계에서 제외
+            latencies.append(latency)
+        record.update(
+            sources=[source_info(doc) for doc in docs],
+            timings_ms={stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+            queue_ms=round(queue_wait * 1000, 2),
+            latency_ms=round(latency * 1000, 2),
+        )
+        write(record)
+
+    tasks = []
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        for window in windows(read_questions(questions_path, skip), embed_batch):
+            questions = [item["question"] for item in window]
+            # 묶음마다 검색 1회 (BM25 + 임베딩 배치 호출 1회), 이벤트 루프 밖 스레드에서 실행
+            try:
+                results, _ = await call_with_retry(
+                    embed_bucket, lambda: asyncio.to_thread(retriever.search_batch, questions)
+                )
+            except Exception as e:
+                errors += len(window)
+                for item in window:
+                    write({"id": item["id"], "question": item["question"], "answer": None,
+                           "error": f"검색 실패: {type(e).__name__}: {e}"})
+                continue
+            retrieved = time.perf_counter()
+            for item, (docs, timings) in zip(window, results):
+                await slots.acquire()
+                queue_wait = time.perf_counter() - retrieved
+                tasks.append(asyncio.create_task(answer(item, docs, timings, queue_wait)))
+            tasks = [task for task in tasks if not task.done()]
+        await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "answered": len(latencies),
+        "errors": errors,
+        "skipped": len(skip),
+        "elapsed_sec": elapsed,
+        "questions_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_latency_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+        "p95_latency_ms": float(np.percentile(latencies, 95) * 1000) if latencies else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 JSONL 파일 일괄 질의응답")
+    parser.add_argument('questions', help='입력 JSONL (한 줄에 {"id": ..., "question": ...})')
+    parser.add_argument('-o', '--output', default='batch_answers.jsonl')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="동시 LLM 호출 수")
+    parser.add_argument('--rpm', type=float, default=DEFAULT_RPM, help="분당 LLM 요청 수 (0: 제한 없음)")
+    parser.add_argument('--embed-rpm', type=float, default=None, help="분당 임베딩 요청 수")
+    parser.add_argument('--embed-batch', type=int, default=DEFAULT_EMBED_BATCH, help="한 번에 임베딩할 질문 수")
+    parser.add_argument('--resume', action='store_true', help="--output에 이어 쓰고 이미 답한 id는 건너뜀")
+    parser.add_argument('--stub-llm', action='store_true', help="Gemini 대신 로컬 스텁 LLM 사용")
+    parser.add_argument('--stub-latency', type=float, default=0.5)
+    parser.add_argument('--stub-error-rate', type=float, default=0.0, help="스텁 호출 중 429 오류 비율")
+    args = parser.parse_args()
+
+    llm = None
+    if args.stub_llm:
+        llm = StubChatModel(responses=[STUB_ANSWER], latency=args.stub_latency, error_rate=args.stub_error_rate)
+    qa_chain = get_agent(llm)
+
+    async def answer_fn(question, docs):
+        # 검색은 run_batch에서 끝났으므로 RetrievalQA의 문서 결합 체인만 호출
+        result = await qa_chain.combine_documents_chain.ainvoke({'input_documents': docs, 'question': question})
+        return result['output_text']
+
+    print(f"{args.questions} -> {args.output} (동시 {args.concurrency}개, 분당 {args.rpm or '무제한'}회, "
+          f"임베딩 배치 {args.embed_batch})")
+    summary = asyncio.run(run_batch(args.questions, args.output, qa_chain.retriever, answer_fn, args.concurrency,
+                                    args.rpm, args.embed_batch, args.embed_rpm, args.resume))
+    print(f"완료: {summary['answered']}개 답변 (오류 {summary['errors']}개, 건너뜀 {summary['skipped']}개), "
+          f"{summary['elapsed_sec']:.1f}초, 초당 {summary['questions_per_sec']:.2f}개")
+    if summary['answered']:
+        print(f"지연시간 p50 {summary['p50_latency_ms']:,.0f}ms / p95 {summary['p95_latency_ms']:,.0f}ms")
+    embeddings = qa_chain.retriever.vectorstore.embeddings
+    if hasattr(embeddings, 'report'):
+        print(embeddings.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+수집(ingest)과 질의(agent) 경로가 함께 쓰는 임베딩 디스크 캐시
+
+- CachedEmbeddings: LangChain Embeddings 객체를 감싸 벡터를 SQLite 파일(mmap 읽기, WAL)에 저장
+- 키: sha256(모델 이름, query/document 구분, 텍스트)
+- 벡터는 float32 또는 float16 바이트로 저장
+- max_entries / max_bytes 초과 시 가장 오래 사용되지 않은(LRU) 항목부터 삭제, 적중률 집계
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = "vectorstore/embedding_cache.sqlite"
+SQLITE_MAX_VARIABLES = 900  # SQLite 문장당 바인딩 변수 개수 제한 이하로 나누어 조회
+
+
+class CachedEmbeddings(Embeddings):
+    """같은 텍스트는 디스크 캐시에서 반환하는 Embeddings 래퍼"""
+
+    def __init__(self, embeddings, model_name, path=DEFAULT_CACHE_PATH, dtype="float32",
+                 max_entries=None, max_bytes=None, query_batch=None):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"dtype은 'float32' 또는 'float16'이어야 합니다: {dtype!r}")
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = str(path)
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.query_batch = query_batch
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA mmap_size=268435456;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+        """)
+
+    def _key(self, kind, text):
+        raw = f"{self.model_name}\0{kind}\0{text}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _lookup(self, keys):
+        """캐시된 벡터 조회 후 LRU 시각 갱신"""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), SQLITE_MAX_VARIABLES):
+                batch = unique[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+        return found
+
+    def _store(self, items):
+        """(키, 벡터) 저장 후 한도 초과 시 삭제"""
+        now = time.time()
+        rows = [(key, self.model_name, self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes(), now)
+                for key, vector in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        """max_entries / max_bytes를 넘는 만큼 LRU 순으로 삭제 (호출 측에서 lock 보유)"""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        excess = 0
+        if self.max_entries is not None:
+            excess = max(excess, count - self.max_entries)
+        if self.max_bytes is not None and size > self.max_bytes and count:
+            excess = max(excess, int(np.ceil((size - self.max_bytes) / (size / count))))
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+
+    def _embed(self, kind, texts, compute):
+        keys = [self._key(kind, text) for text in texts]
+        cached = self._lookup(keys)
+
+        # 캐시에 없는 텍스트는 중복 없이 한 번씩만 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        n_missed = sum(key not in cached for key in keys)
+        self.hits += len(keys) - n_missed
+        self.misses += n_missed
+
+        if missing:
+            vectors = compute(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self._store(computed.items())
+            cached.update({key: np.asarray(vector, dtype=np.float32) for key, vector in computed.items()})
+        return [cached[key].tolist() for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed("document", list(texts), self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed("query", [text], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    def embed_queries(self, texts):
+        """여러 질의 임베딩 (캐시 미적중분은 query_batch가 있으면 한 번에, 없으면 embed_query로 하나씩 계산)"""
+        compute = self.query_batch or (lambda texts: [self.embeddings.embed_query(text) for text in texts])
+        return self._embed("query", list(texts), compute)
+
+    def stats(self):
+        """현재 세션의 적중/미적중 수와 캐시 크기"""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": count,
+            "vector_bytes": size,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"임베딩 캐시: 적중 {stats['hits']}회 / 미적중 {stats['misses']}회 "
+                f"(적중률 {stats['hit_rate']:.1%}), {stats['entries']}개, "
+                f"{stats['vector_bytes'] / 1024**2:.1f} MB")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
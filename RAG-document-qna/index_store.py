@@ -0,0 +1,376 @@
+"""
+대규모 코퍼스용 FAISS 서빙 저장소 (근사 인덱스 + 메모리 매핑 + SQLite docstore)
+
+ingest.py가 관리하는 정확(flat) 인덱스 vectorstore/db_faiss를 서빙용 디렉터리로 변환:
+- index.faiss: flat / IVF-PQ / HNSW 인덱스. faiss.IO_FLAG_MMAP으로 로드해 파일 전체를 RAM에 읽지 않음
+- docstore.sqlite: 인덱스 위치 -> (청크 ID, 본문, 메타데이터) 테이블. pickle 전체 역직렬화 대신 검색된 행만 조회
+- meta.json: 인덱스 종류/파라미터, 벡터 수, 원본 manifest 해시 (ingest 후 재변환 필요 여부 확인용)
+
+IVF-PQ는 --refine으로 원본 벡터 재순위(IndexRefineFlat)를 붙여 recall을 보정할 수 있음.
+benchmark는 정확 검색 결과 대비 recall@k와 질의 1건당 지연시간을 nprobe/efSearch별로 비교.
+
+사용법:
+    python index_store.py build --index-type ivfpq --nlist 4096 --pq-m 64 --refine 4
+    python index_store.py build --index-type hnsw --hnsw-m 32
+    python index_store.py benchmark --nprobe 8 16 32 64 --ef-search 32 64 128
+    python index_store.py benchmark --synthetic 1000000 --index-type hnsw
+"""
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import argparse
+from collections.abc import Mapping
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+
+# --- 설정 ---
+DB_PATH = 'vectorstore/db_faiss'  # ingest.py의 정확 인덱스 (변환 원본)
+ANN_DB_PATH = 'vectorstore/db_faiss_ann'  # 서빙용 저장소
+INDEX_TYPES = ('flat', 'ivfpq', 'hnsw')
+PQ_M = 64  # PQ 부분 벡터 수 (차원의 약수, bge-m3 1024차원 -> 벡터당 64바이트)
+PQ_BITS = 8
+HNSW_M = 32
+EF_CONSTRUCTION = 200
+NPROBE = 16  # IVF 검색 시 조회할 클러스터 수
+EF_SEARCH = 64  # HNSW 검색 후보 수
+TRAIN_SAMPLE = 100_000  # IVF-PQ 학습에 쓰는 최대 벡터 수
+ADD_BATCH = 65_536  # 원본 인덱스에서 벡터를 읽어 추가하는 단위
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """인덱스 위치(pos)와 청크 ID로 조회하는 SQLite docstore"""
+
+    def __init__(self, path, readonly=True):
+        self.path = str(path)
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True,
+                                         check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS docs (
+                    pos INTEGER PRIMARY KEY,
+                    id TEXT UNIQUE NOT NULL,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                );
+            """)
+        self._conn.execute("PRAGMA mmap_size=268435456")
+
+    def search(self, search):
+        row = self._conn.execute("SELECT content, metadata FROM docs WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts):
+        """{청크 ID: Document}를 현재 마지막 위치 뒤에 추가 (인덱스 add 순서와 같아야 함)"""
+        start = self._conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM docs").fetchone()[0]
+        self.add_rows(start, texts.items())
+
+    def add_rows(self, start, items):
+        rows = [(start + i, doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                for i, (doc_id, doc) in enumerate(items)]
+        self._conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+class PositionIdMap(Mapping):
+    """FAISS.index_to_docstore_id 대용: 위치 -> 청크 ID를 필요할 때 SQLite에서 조회"""
+
+    def __init__(self, docstore):
+        self._conn = docstore._conn
+
+    def __getitem__(self, pos):
+        row = self._conn.execute("SELECT id FROM docs WHERE pos = ?", (int(pos),)).fetchone()
+        if row is None:
+            raise KeyError(pos)
+        return row[0]
+
+    def __iter__(self):
+        return (pos for (pos,) in self._conn.execute("SELECT pos FROM docs ORDER BY pos"))
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+def build_index(dim, index_type='flat', train_vectors=None, nlist=None, n_total=None, pq_m=PQ_M,
+                pq_bits=PQ_BITS, refine=None, hnsw_m=HNSW_M, ef_construction=EF_CONSTRUCTION):
+    """빈 인덱스 생성 (ivfpq는 train_vectors로 학습까지 수행). 벡터는 add로 따로 추가"""
+    import faiss
+
+    if index_type == 'flat':
+        return faiss.IndexFlatL2(dim)
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+        return index
+    if index_type != 'ivfpq':
+        raise ValueError(f"index_type은 {INDEX_TYPES} 중 하나여야 합니다: {index_type!r}")
+
+    if dim % pq_m:
+        raise ValueError(f"pq_m({pq_m})은 벡터 차원({dim})의 약수여야 합니다.")
+    n_train = len(train_vectors)
+    if n_train < 2 ** pq_bits:
+        raise ValueError(f"IVF-PQ 학습에는 벡터가 {2 ** pq_bits}개 이상 필요합니다 (현재 {n_train}개). "
+                         f"flat 또는 hnsw를 사용하세요.")
+    if nlist is None:
+        nlist = int(4 * np.sqrt(n_total or n_train))
+    nlist = max(1, min(nlist, n_train // 39))  # 클러스터당 학습 벡터 39개 이상
+    index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, pq_m, pq_bits)
+    if refine:
+        index = faiss.IndexRefineFlat(index)
+        index.k_factor = refine
+    index.train(np.ascontiguousarray(train_vectors, dtype=np.float32))
+    return index
+
+def set_search_params(index, nprobe=None, ef_search=None, refine=None):
+    """검색 파라미터 설정 (인덱스 종류에 해당하지 않는 값은 무시)"""
+    import faiss
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = nprobe
+    hnsw = faiss.downcast_index(index)
+    if ef_search is not None and hasattr(hnsw, 'hnsw'):
+        hnsw.hnsw.efSearch = ef_search
+    if refine is not None and hasattr(hnsw, 'k_factor'):
+        hnsw.k_factor = refine
+
+def read_index(path, mmap=True):
+    """index.faiss 로드 (mmap=True이면 메모리 매핑, 읽기 전용)"""
+    import faiss
+
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    return faiss.read_index(os.path.join(path, 'index.faiss'), flags)
+
+def manifest_hash(src=DB_PATH):
+    """원본 DB manifest 해시 (없으면 None)"""
+    path = os.path.join(src, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def iter_vectors(index, batch=ADD_BATCH):
+    """flat 인덱스에 저장된 벡터를 batch개씩 (시작 위치, 배열)로 반환"""
+    for start in range(0, index.ntotal, batch):
+        yield start, index.reconstruct_n(start, min(batch, index.ntotal - start))
+
+def sample_vectors(index, n, seed=0):
+    """학습용으로 flat 인덱스에서 벡터 n개 무작위 추출"""
+    rng = np.random.default_rng(seed)
+    ids = np.sort(rng.choice(index.ntotal, min(n, index.ntotal), replace=False))
+    return index.reconstruct_batch(ids)
+
+def fill_index(index, vectors_iter):
+    for _, vectors in vectors_iter:
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+def export_store(src=DB_PATH, dst=ANN_DB_PATH, index_type='ivfpq', nlist=None, pq_m=PQ_M, refine=None,
+                 hnsw_m=HNSW_M, ef_construction=EF_CONSTRUCTION):
+    """원본 FAISS DB(index.faiss + index.pkl)를 서빙용 저장소로 변환하고 meta 반환"""
+    import faiss
+
+    if not os.path.exists(os.path.join(src, 'index.faiss')):
+        raise FileNotFoundError(f"원본 벡터 DB가 '{src}'에 없습니다. ingest.py를 먼저 실행하세요.")
+    start = time.perf_counter()
+    source = faiss.read_index(os.path.join(src, 'index.faiss'), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    with open(os.path.join(src, 'index.pkl'), 'rb') as f:
+        docstore, index_to_docstore_id = pickle.load(f)  # ingest.py가 만든 파일만 읽음
+
+    train = sample_vectors(source, TRAIN_SAMPLE) if index_type == 'ivfpq' else None
+    index = build_index(source.d, index_type, train, nlist, source.ntotal, pq_m, refine=refine,
+                        hnsw_m=hnsw_m, ef_construction=ef_construction)
+    fill_index(index, iter_vectors(source))
+
+    os.makedirs(dst, exist_ok=True)
+    db_path = os.path.join(dst, 'docstore.sqlite')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    store = SQLiteDocstore(db_path, readonly=False)
+    positions = sorted(index_to_docstore_id)
+    for offset in range(0, len(positions), ADD_BATCH):
+        chunk = positions[offset : offset + ADD_BATCH]
+        ids = [index_to_docstore_id[pos] for pos in chunk]
+        store.add_rows(offset, [(doc_id, docstore.search(doc_id)) for doc_id in ids])
+    store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    store._conn.execute("PRAGMA journal_mode=DELETE")  # 읽기 전용 연결에서 열 수 있도록 WAL 해제
+    store.close()
+    faiss.write_index(index, os.path.join(dst, 'index.faiss'))
+
+    ivf = faiss.try_extract_index_ivf(index)
+    meta = {
+        'index_type': index_type,
+        'dim': source.d,
+        'ntotal': index.ntotal,
+        'nlist': ivf.nlist if ivf is not None else None,
+        'pq_m': pq_m if index_type == 'ivfpq' else None,
+        'refine': refine if index_type == 'ivfpq' else None,
+        'hnsw_m': hnsw_m if index_type == 'hnsw' else None,
+        'source': src,
+        'source_manifest': manifest_hash(src),
+        'build_sec': time.perf_counter() - start,
+    }
+    with open(os.path.join(dst, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+def load_meta(path=ANN_DB_PATH):
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def load_store(embeddings, path=ANN_DB_PATH, mmap=True, nprobe=NPROBE, ef_search=EF_SEARCH):
+    """서빙용 저장소를 LangChain FAISS 객체로 로드 (인덱스는 mmap, 문서는 SQLite에서 필요할 때 조회)"""
+    meta = load_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"서빙용 벡터 DB가 '{path}'에 없습니다. index_store.py build를 먼저 실행하세요.")
+    if meta['source_manifest'] != manifest_hash(meta['source']):
+        print(f"경고: '{meta['source']}'가 변환 이후 갱신되었습니다. index_store.py build를 다시 실행하세요.")
+    index = read_index(path, mmap)
+    set_search_params(index, nprobe, ef_search)
+    docstore = SQLiteDocstore(os.path.join(path, 'docstore.sqlite'))
+    return FAISS(embeddings, index, docstore, PositionIdMap(docstore))
+
+def synthetic_vectors(n, dim=1024, n_clusters=1000, spread=0.5, seed=0):
+    """군집 구조가 있는 L2 정규화 벡터 (실제 임베딩처럼 주제별로 모인 분포)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, ADD_BATCH):
+        size = min(ADD_BATCH, n - start)
+        block = centers[rng.integers(n_clusters, size=size)] + spread * rng.standard_normal((size, dim), dtype=np.float32)
+        vectors[start : start + size] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+def make_queries(vectors, n, noise=0.05, seed=1):
+    """저장 벡터에 잡음을 더한 질의 벡터 (임베딩 모델 없이 측정)"""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), n, replace=False)]
+    queries = queries + noise * rng.standard_normal(queries.shape, dtype=np.float32) / np.sqrt(queries.shape[1])
+    return np.ascontiguousarray(queries / np.linalg.norm(queries, axis=1, keepdims=True), dtype=np.float32)
+
+def measure(index, queries, k, truth):
+    """질의 1건씩 검색 (agent와 같은 방식) -> recall@k, 지연시간(ms) 통계"""
+    latencies = np.empty(len(queries))
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found[i] = index.search(query[None, :], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    recall = np.mean([len(np.intersect1d(f, t)) / k for f, t in zip(found, truth)])
+    return {'recall': float(recall), 'mean_ms': float(latencies.mean()),
+            'p50_ms': float(np.percentile(latencies, 50)), 'p99_ms': float(np.percentile(latencies, 99))}
+
+def benchmark(src=DB_PATH, dst=ANN_DB_PATH, k=5, n_queries=200, nprobes=(8, 16, 32, 64), ef_searches=(32, 64, 128),
+              synthetic=None, index_type='ivfpq', **build_kwargs):
+    """정확 flat 검색 대비 근사 인덱스의 recall@k / 지연시간 비교
+
+    synthetic=N이면 N개 합성 벡터로 flat과 근사 인덱스를 메모리에서 만들어 측정,
+    아니면 원본 DB(src)와 변환된 저장소(dst)의 인덱스를 mmap으로 로드해 측정.
+    """
+    import faiss
+
+    results = {'k': k, 'queries': n_queries}
+    if synthetic:
+        vectors = synthetic_vectors(synthetic)
+        exact = faiss.IndexFlatL2(vectors.shape[1])
+        exact.add(vectors)
+        start = time.perf_counter()
+        train = vectors[np.random.default_rng(0).choice(len(vectors), min(TRAIN_SAMPLE, len(vectors)), replace=False)]
+        ann = build_index(vectors.shape[1], index_type, train, n_total=len(vectors), **build_kwargs)
+        fill_index(ann, ((s, vectors[s : s + ADD_BATCH]) for s in range(0, len(vectors), ADD_BATCH)))
+        results['build_sec'] = time.perf_counter() - start
+        queries = make_queries(vectors, n_queries)
+        results.update(index_type=index_type, ntotal=len(vectors))
+    else:
+        exact = read_index(src)
+        meta = load_meta(dst)
+        if meta is None:
+            raise FileNotFoundError(f"서빙용 벡터 DB가 '{dst}'에 없습니다. index_store.py build를 먼저 실행하세요.")
+        start = time.perf_counter()
+        ann = read_index(dst)
+        SQLiteDocstore(os.path.join(dst, 'docstore.sqlite')).close()
+        results['load_sec'] = time.perf_counter() - start
+        queries = make_queries(exact.reconstruct_n(0, exact.ntotal) if exact.ntotal <= TRAIN_SAMPLE
+                               else sample_vectors(exact, TRAIN_SAMPLE), n_queries)
+        results.update(index_type=meta['index_type'], ntotal=ann.ntotal)
+        index_type = meta['index_type']
+
+    _, truth = exact.search(queries, k)
+    rows = [{'index': 'flat (exact)', **measure(exact, queries, k, truth)}]
+    if index_type == 'ivfpq':
+        settings = [{'nprobe': nprobe} for nprobe in nprobes]
+    elif index_type == 'hnsw':
+        settings = [{'ef_search': ef} for ef in ef_searches]
+    else:
+        settings = [{}]
+    for params in settings:
+        set_search_params(ann, **params)
+        label = ', '.join(f"{key}={value}" for key, value in params.items()) or 'flat'
+        rows.append({'index': f"{index_type} ({label})", **params, **measure(ann, queries, k, truth)})
+    results['rows'] = rows
+    return results
+
+def print_benchmark(results):
+    print(f"\n{results['index_type']} / 벡터 {results['ntotal']:,}개 / 질의 {results['queries']}개 / k={results['k']}")
+    for key in ('build_sec', 'load_sec'):
+        if key in results:
+            print(f"{key}: {results[key]:.3f}초")
+    print(f"{'index':<28} {'recall@k':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for row in results['rows']:
+        print(f"{row['index']:<28} {row['recall']:>9.3f} {row['mean_ms']:>9.3f} {row['p50_ms']:>9.3f} "
+              f"{row['p99_ms']:>9.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS 서빙용 저장소 변환 및 recall/지연시간 벤치마크")
+    parser.add_argument('command', choices=['build', 'benchmark'])
+    parser.add_argument('--src', default=DB_PATH, help="원본(정확) 벡터 DB 경로")
+    parser.add_argument('--dst', default=ANN_DB_PATH, help="서빙용 저장소 경로")
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default='ivfpq')
+    parser.add_argument('--nlist', type=int, default=None, help="IVF 클러스터 수 (기본: 4*sqrt(벡터 수))")
+    parser.add_argument('--pq-m', type=int, default=PQ_M, help="PQ 부분 벡터 수")
+    parser.add_argument('--refine', type=int, default=None, help="IVF-PQ 후보를 k*refine개 뽑아 원본 벡터로 재순위")
+    parser.add_argument('--hnsw-m', type=int, default=HNSW_M, help="HNSW 노드당 연결 수")
+    parser.add_argument('--ef-construction', type=int, default=EF_CONSTRUCTION)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 16, 32, 64])
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[32, 64, 128])
+    parser.add_argument('--synthetic', type=int, default=None, help="원본 DB 대신 합성 벡터 N개로 측정")
+    parser.add_argument('--threads', type=int, default=None, help="faiss OpenMP 스레드 수")
+    args = parser.parse_args()
+
+    if args.threads:
+        import faiss
+        faiss.omp_set_num_threads(args.threads)
+
+    build_kwargs = {'nlist': args.nlist, 'pq_m': args.pq_m, 'refine': args.refine, 'hnsw_m': args.hnsw_m,
+                    'ef_construction': args.ef_construction}
+    if args.command == 'build':
+        meta = export_store(args.src, args.dst, args.index_type, **build_kwargs)
+        print(f"성공: '{args.dst}'에 {meta['index_type']} 인덱스 저장 (벡터 {meta['ntotal']:,}개, "
+              f"{meta['build_sec']:.1f}초)")
+    else:
+        results = benchmark(args.src, args.dst, args.k, args.queries, args.nprobe, args.ef_search, args.synthetic,
+                            args.index_type, **build_kwargs)
+        print_benchmark(results)
+        out_path = os.path.join(os.path.dirname(args.dst) or '.', 'index_benchmark.json')
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {out_path}")
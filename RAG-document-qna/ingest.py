@@ -1,16 +1,131 @@
 import os
+import json
+import pickle
+import time
+import hashlib
+import argparse
+from collections import Counter
+
+import numpy as np
 from tqdm import tqdm  # 진행 바 라이브러리
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
+from embedding_cache import CachedEmbeddings
+from ingest_pipeline import QUEUE_SIZE, parallel_map, rebatch, run_pipeline
+from lexical_index import LexicalIndex
+
 # --- 설정 ---
-DATA_PATH = './docs' 
+DATA_PATH = './docs'
 DB_PATH = 'vectorstore/db_faiss'
 MODEL_PATH = './bge-m3'
+EMBED_BATCH_SIZE = 64  # 임베딩 배치 크기 (길이순 정렬 후 묶음)
+EMBED_THREADS = os.cpu_count() or 1  # 임베딩 모델(torch) 스레드 수
+EMBED_WINDOW = 4  # 한 번에 길이순 정렬해 임베딩할 배치 수
+LOAD_WORKERS = min(8, os.cpu_count() or 1)  # PDF 읽기/분할 프로세스 수
+MANIFEST_PATH = os.path.join(DB_PATH, 'manifest.json')  # 파일별 해시/청크 ID 기록 (증분 수집용)
+LEXICAL_PATH = os.path.join(DB_PATH, 'lexical')  # BM25 역색인 (벡터 DB 갱신 시 전체 청크로 재구축)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+def file_sha256(path):
+    """파일 내용 해시"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def assign_chunk_ids(chunks):
+    """청크 ID = (파일, 페이지, 내용, 같은 내용의 순번) 해시 -> 내용이 같은 청크는 재수집 시에도 같은 ID"""
+    seen = Counter()
+    ids = []
+    for doc in chunks:
+        key = (os.path.basename(doc.metadata.get('source', '')), doc.metadata.get('page'), doc.page_content)
+        seen[key] += 1
+        raw = '\0'.join(map(str, key + (seen[key],)))
+        ids.append(hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32])
+    return ids
+
+def load_manifest():
+    """이전 수집 기록 (없거나 청크 설정이 다르면 None -> 전체 재구축)"""
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('config') != manifest_config():
+        return None
+    return manifest
+
+def manifest_config():
+    return {'model': MODEL_PATH, 'chunk_size': CHUNK_SIZE, 'chunk_overlap': CHUNK_OVERLAP}
+
+def save_manifest(files):
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'config': manifest_config(), 'files': files}, f, ensure_ascii=False, indent=2)
+
+def load_and_split(pdf_path):
+    """PDF 1개 로드 및 분할 (프로세스 풀 워커에서 실행). 반환: (경로, 청크 리스트, 페이지 수, 오류 메시지)"""
+    try:
+        pages = PyMuPDFLoader(pdf_path).load()
+    except Exception as e:
+        return pdf_path, [], 0, str(e)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return pdf_path, text_splitter.split_documents(pages), len(pages), None
+
+def get_embeddings(batch_size=EMBED_BATCH_SIZE, threads=EMBED_THREADS, cache=True):
+    """bge-m3 임베딩 모델 로드 (CPU 스레드 수/배치 크기 지정, cache=True이면 디스크 캐시로 감쌈)"""
+    import torch
+    torch.set_num_threads(threads)
+    embeddings = HuggingFaceEmbeddings(
+        model_name=MODEL_PATH,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': batch_size}
+    )
+    return CachedEmbeddings(embeddings, MODEL_PATH) if cache else embeddings
+
+def embed_texts(embeddings, texts, batch_size=EMBED_BATCH_SIZE):
+    """텍스트를 길이순으로 정렬해 배치 임베딩 (패딩 최소화) 후 원래 순서의 (n, dim) float32 배열 반환"""
+    order = np.argsort([len(t) for t in texts], kind='stable')
+    vectors = None
+    for start in range(0, len(texts), batch_size):
+        idx = order[start : start + batch_size]
+        batch = np.asarray(embeddings.embed_documents([texts[i] for i in idx]), dtype=np.float32)
+        if vectors is None:
+            vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+        vectors[idx] = batch
+    return vectors
 
-def create_vector_db():
+def build_faiss_store(embeddings, texts, vectors, ids):
+    """임베딩 배열 전체를 한 번의 add로 FAISS 인덱스에 기록 (FAISS.from_documents와 같은 저장 구조)"""
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    vectorstore = FAISS(embeddings, index, InMemoryDocstore(), {})
+    add_vectors(vectorstore, texts, vectors, ids)
+    return vectorstore
+
+def add_vectors(vectorstore, texts, vectors, ids):
+    """기존 FAISS 저장소에 (n, dim) 배열을 한 번에 추가하고 docstore/ID 매핑 갱신"""
+    start = vectorstore.index.ntotal
+    vectorstore.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    vectorstore.docstore.add(dict(zip(ids, texts)))
+    vectorstore.index_to_docstore_id.update({start + i: doc_id for i, doc_id in enumerate(ids)})
+
+def build_lexical_index(docstore, index_to_docstore_id):
+    """벡터 DB의 전체 청크로 BM25 역색인 재구축 (임베딩 호출 없음, 청크 ID는 FAISS docstore와 동일)"""
+    ids = [index_to_docstore_id[pos] for pos in sorted(index_to_docstore_id)]
+    index = LexicalIndex.build(ids, [docstore.search(doc_id).page_content for doc_id in ids])
+    index.save(LEXICAL_PATH)
+    print(f"BM25 역색인 저장: 청크 {len(index)}개, 용어 {len(index.vocab)}개 ({LEXICAL_PATH})")
+    return index
+
+def create_vector_db(batch_size=EMBED_BATCH_SIZE, threads=EMBED_THREADS, workers=LOAD_WORKERS, rebuild=False,
+                     cache=True, queue_size=QUEUE_SIZE):
+    """PDF 벡터 DB 생성. 기존 DB와 manifest가 있으면 추가/변경된 파일만 다시 임베딩하고 삭제된 파일의 청크 제거"""
     # 1. PDF 파일 목록 확인
     if not os.path.exists(DATA_PATH):
         print(f"오류: {DATA_PATH} 폴더가 없습니다.")
@@ -21,52 +136,120 @@ def create_vector_db():
         print(f"알림: {DATA_PATH} 폴더 내에 PDF 파일이 없습니다.")
         return
 
-    # 2. 문서 로딩 (파일 단위 프로그레시브 바)
-    all_documents = []
-    print("\n[1/3] PDF 문서 로딩 중...")
-    for file in tqdm(pdf_files, desc="문서 읽기"):
-        pdf_path = os.path.join(DATA_PATH, file)
-        try:
-            loader = PyMuPDFLoader(pdf_path)
-            all_documents.extend(loader.load())
-        except Exception as e:
-            print(f"\n파일 로드 오류 ({file}): {e}")
-    
-    if not all_documents:
+    timings = {}
+
+    # 2. 파일 해시를 이전 manifest와 비교해 다시 처리할 파일 결정
+    hashes = {f: file_sha256(os.path.join(DATA_PATH, f)) for f in pdf_files}
+    manifest = None if rebuild or not os.path.exists(os.path.join(DB_PATH, 'index.faiss')) else load_manifest()
+    old_files = manifest['files'] if manifest else {}
+    changed = [f for f in pdf_files if old_files.get(f, {}).get('sha256') != hashes[f]]
+    removed = [f for f in old_files if f not in hashes]
+    if manifest and not changed and not removed:
+        print("변경된 문서가 없습니다. 벡터 DB가 최신 상태입니다.")
+        if not LexicalIndex.exists(LEXICAL_PATH):
+            with open(os.path.join(DB_PATH, 'index.pkl'), 'rb') as f:
+                build_lexical_index(*pickle.load(f))  # save_local이 저장한 (docstore, index_to_docstore_id)
         return
+    print(f"{'증분 수집' if manifest else '전체 재구축'}: 추가/변경 {len(changed)}개, 삭제 {len(removed)}개")
 
-    # 3. 텍스트 분할
-    print("\n[2/3] 텍스트 분할 중...")
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    texts = text_splitter.split_documents(all_documents)
+    # 3. 임베딩 모델 및 기존 벡터 DB 로드
+    print("\n[1/2] 임베딩 모델 로드 중...")
+    embeddings = get_embeddings(batch_size, threads, cache)
+    vectorstore = None
 
-    # 4. 임베딩 모델 로드
-    print("\n[3/3] 임베딩 모델 로드 및 벡터 DB 생성 중...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=MODEL_PATH,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
+    # 변경/삭제 파일의 이전 청크 ID (새 청크에 없으면 삭제, 이미 있는 청크는 재임베딩 생략)
+    old_ids = {i for f in changed + removed for i in old_files.get(f, {}).get('chunk_ids', [])}
+    files = {f: entry for f, entry in old_files.items() if f in hashes and f not in changed}
+    new_ids = set()
+    counts = Counter()
+
+    # 4. 스트리밍 파이프라인 단계: 읽기/분할(프로세스 풀) -> 임베딩 -> 벡터 DB 기록
+    def parse(names):
+        paths = [os.path.join(DATA_PATH, f) for f in names]
+        for pdf_path, chunks, n_pages, error in tqdm(parallel_map(load_and_split, paths, workers),
+                                                     total=len(paths), desc="문서 읽기/분할"):
+            f = os.path.basename(pdf_path)
+            if error:
+                # 읽지 못한 파일은 manifest를 갱신하지 않음: 이전 항목과 청크를 유지하고 다음 실행에서 다시 시도
+                print(f"\n파일 로드 오류 ({f}): {error}")
+                if f in old_files:
+                    files[f] = old_files[f]
+                    new_ids.update(old_files[f]['chunk_ids'])
+                continue
+            ids = assign_chunk_ids(chunks)
+            files[f] = {'sha256': hashes[f], 'chunk_ids': ids}
+            new_ids.update(ids)
+            counts['pages'] += n_pages
+            counts['chunks'] += len(chunks)
+            yield [(doc, doc_id) for doc, doc_id in zip(chunks, ids) if doc_id not in old_ids]
+
+    def embed(batches):
+        for batch in rebatch(batches, batch_size * EMBED_WINDOW):
+            vectors = embed_texts(embeddings, [doc.page_content for doc, _ in batch], batch_size)
+            yield [(doc, doc_id, vector) for (doc, doc_id), vector in zip(batch, vectors)]
+
+    def write(batches):
+        # 연속 float32 배열을 배치마다 한 번에 기록 (전체 재구축은 첫 배치로 인덱스 생성)
+        nonlocal vectorstore
+        for batch in batches:
+            docs = [doc for doc, _, _ in batch]
+            ids = [doc_id for _, doc_id, _ in batch]
+            vectors = np.stack([vector for _, _, vector in batch])
+            if vectorstore is None:
+                vectorstore = build_faiss_store(embeddings, docs, vectors, ids)
+            else:
+                add_vectors(vectorstore, docs, vectors, ids)
+            yield batch
 
-    # 5. 벡터 DB 생성 (배치 단위로 처리하여 진행 바 표시)
+    print("\n[2/2] 문서 읽기/분할 -> 임베딩 -> 벡터 DB 기록 (스트리밍)...")
     try:
-        # 처음 1개 데이터로 초기 DB 생성
-        vectorstore = FAISS.from_documents(texts[:1], embeddings)
-        
-        # 나머지 데이터를 배치 단위로 추가하며 진행률 표시
-        batch_size = 10  # 10개씩 묶어서 처리
-        for i in tqdm(range(1, len(texts), batch_size), desc="벡터화 작업"):
-            batch = texts[i : i + batch_size]
-            vectorstore.add_documents(batch)
+        start = time.perf_counter()
+        if manifest:
+            vectorstore = FAISS.load_local(DB_PATH, embeddings, allow_dangerous_deserialization=True)
+        stats = run_pipeline(changed, [('parse', parse), ('embed', embed), ('write', write)], queue_size)
+        if vectorstore is None:
+            return
+        stale_ids = sorted(old_ids - new_ids)
+        if stale_ids:
+            vectorstore.delete(stale_ids)
+        timings['pipeline'] = time.perf_counter() - start
 
         # 저장
         if not os.path.exists('vectorstore'):
             os.makedirs('vectorstore')
         vectorstore.save_local(DB_PATH)
+        save_manifest(files)
         print(f"\n성공: 벡터 DB가 '{DB_PATH}'에 저장되었습니다.")
-        
+
+        # 5. BM25 역색인 재구축
+        start = time.perf_counter()
+        build_lexical_index(vectorstore.docstore, vectorstore.index_to_docstore_id)
+        timings['bm25'] = time.perf_counter() - start
+
     except Exception as e:
         print(f"\n벡터 DB 생성 오류: {e}")
+        return
+
+    # 6. 처리량 / 큐 깊이 리포트 (큐가 가득 찬 단계의 다음 단계가 병목)
+    print(f"\n문서 {len(changed)}개, 페이지 {counts['pages']}개, 청크 {counts['chunks']}개 "
+          f"(임베딩 {stats[-1].chunks}개, 삭제 {len(stale_ids)}개, 전체 {vectorstore.index.ntotal}개)")
+    for stage in stats:
+        print(f"- {stage.report()}")
+    print(f"- bm25  : {timings['bm25']:8.2f}초")
+    total = sum(timings.values())
+    # 변경 파일의 청크 중 내용이 같아 건너뛴 청크는 제외하고 실제 임베딩한 청크 수로 계산
+    print(f"- total : {total:8.2f}초 ({stats[-1].chunks / max(total, 1e-9):,.1f} embedded chunks/sec)")
+    if cache:
+        print(embeddings.report())
 
 if __name__ == "__main__":
-    create_vector_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="PDF 문서 벡터 DB 생성")
+    parser.add_argument('--batch-size', type=int, default=EMBED_BATCH_SIZE, help="임베딩 배치 크기")
+    parser.add_argument('--threads', type=int, default=EMBED_THREADS, help="임베딩 CPU 스레드 수")
+    parser.add_argument('--workers', type=int, default=LOAD_WORKERS, help="PDF 읽기/분할 프로세스 수")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help="단계 사이에 대기할 수 있는 최대 배치 수")
+    parser.add_argument('--rebuild', action='store_true', help="manifest를 무시하고 전체 재구축")
+    parser.add_argument('--no-cache', action='store_true', help="임베딩 디스크 캐시 사용 안 함")
+    args = parser.parse_args()
+    create_vector_db(args.batch_size, args.threads, args.workers, args.rebuild, not args.no_cache,
+                     args.queue_size)
\ No newline at end of file
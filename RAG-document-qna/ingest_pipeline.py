@@ -0,0 +1,146 @@
+"""
+메모리 상한이 있는 스트리밍 수집 파이프라인 (ingest.py: 읽기/분할 -> 임베딩 -> 기록)
+
+- 단계(stage): 입력 이터레이터를 받아 출력 항목(리스트)을 내보내는 제너레이터 함수, 단계마다 스레드 1개
+- 단계 사이는 최대 queue_size개 항목의 큐로 연결 -> 뒤 단계가 느리면 앞 단계의 put이 대기하므로
+  코퍼스 크기와 관계없이 메모리에 올라가는 배치 수가 고정됨
+- parallel_map: 읽기/분할 워커 풀. 프로세스 풀에 최대 prefetch개 파일만 맡기고 입력 순서대로 결과 반환
+- 단계별 작업 시간, 입력 대기/출력 대기 시간, 출력 큐 깊이를 집계
+  -> 느린 단계 앞의 큐가 차고 뒤 단계는 입력 대기가 길어지므로 병목 단계를 확인할 수 있음
+"""
+import time
+import queue
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+QUEUE_SIZE = 8  # 단계 사이에 대기할 수 있는 최대 배치 수
+_DONE = object()
+_POLL = 0.1  # 큐 대기 중 중단 여부 확인 간격(초)
+
+class StageStats:
+    """파이프라인 단계 1개의 집계"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0  # 출력 항목 수 (파일, 배치)
+        self.chunks = 0  # 출력 항목에 담긴 청크 수
+        self.busy = 0.0  # 작업 시간(초)
+        self.wait_in = 0.0  # 입력 큐가 비어 대기한 시간
+        self.wait_out = 0.0  # 출력 큐가 가득 차 대기한 시간
+        self.depth_max = 0
+        self.depth_total = 0
+
+    @property
+    def depth_avg(self):
+        return self.depth_total / self.items if self.items else 0.0
+
+    def report(self):
+        rate = self.chunks / self.busy if self.busy > 0 else 0.0
+        return (f"{self.name:<6}: 항목 {self.items:>7,}개, 청크 {self.chunks:>9,}개 | "
+                f"작업 {self.busy:8.2f}초 ({rate:,.1f} chunks/sec) | "
+                f"입력 대기 {self.wait_in:7.2f}초, 출력 대기 {self.wait_out:7.2f}초 | "
+                f"큐 평균 {self.depth_avg:4.1f} / 최대 {self.depth_max}")
+
+def parallel_map(func, items, workers, prefetch=None):
+    """프로세스 풀에서 func을 순서대로 적용 (동시에 최대 prefetch개 작업, workers <= 1이면 현재 프로세스에서 실행)"""
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    prefetch = prefetch or 2 * workers
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(func, item) for item in islice(items, prefetch))
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(pool.submit(func, item))
+            yield result
+
+def rebatch(batches, size):
+    """리스트 이터레이터를 size개씩의 리스트로 다시 묶음 (마지막은 더 짧을 수 있음)"""
+    batch = []
+    for items in batches:
+        batch.extend(items)
+        while len(batch) >= size:
+            yield batch[:size]
+            batch = batch[size:]
+    if batch:
+        yield batch
+
+def run_pipeline(source, stages, queue_size=QUEUE_SIZE):
+    """source를 stages [(이름, 변환 함수), ...]에 차례로 통과시키고 단계별 StageStats 리스트 반환
+
+    첫 단계는 source를 직접 읽음. 출력 항목은 리스트(길이 = 청크 수)이며 마지막 단계의 출력은 버림.
+    한 단계에서 예외가 나면 나머지 단계를 멈추고 그 예외를 다시 발생시킴.
+    """
+    stats = [StageStats(name) for name, _ in stages]
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages[:-1]]
+    stop = threading.Event()
+    errors = []
+
+    def get(q, stage):
+        while True:
+            start = time.perf_counter()
+            try:
+                item = q.get(timeout=_POLL)
+            except queue.Empty:
+                stage.wait_in += time.perf_counter() - start
+                if stop.is_set():
+                    return _DONE
+                continue
+            stage.wait_in += time.perf_counter() - start
+            return item
+
+    def put(q, item, stage):
+        start = time.perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                break
+            except queue.Full:
+                pass
+        stage.wait_out += time.perf_counter() - start
+        if item is not _DONE:
+            depth = q.qsize()
+            stage.depth_max = max(stage.depth_max, depth)
+            stage.depth_total += depth
+
+    def inputs(q, stage):
+        while True:
+            item = get(q, stage)
+            if item is _DONE:
+                return
+            yield item
+
+    def worker(i, transform):
+        stage = stats[i]
+        source_iter = source if i == 0 else inputs(queues[i - 1], stage)
+        out = queues[i] if i < len(queues) else None
+        started = time.perf_counter()
+        try:
+            for item in transform(source_iter):
+                stage.items += 1
+                stage.chunks += len(item)
+                if out is not None:
+                    put(out, item, stage)
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if out is not None:
+                put(out, _DONE, stage)
+            stage.busy = time.perf_counter() - started - stage.wait_in - stage.wait_out
+
+    threads = [threading.Thread(target=worker, args=(i, transform), name=f"ingest-{name}", daemon=True)
+               for i, (name, transform) in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return stats
@@ -0,0 +1,261 @@
+"""
+BM25 어휘(lexical) 인덱스와 하이브리드(BM25 + 벡터) 검색
+
+- LexicalIndex: ingest.py가 전체 청크로 구축. CSR 형태 역색인(용어별 시작 위치, 문서 위치, 용어 빈도)과
+  문서 길이를 .npy 배열로, 용어 목록을 JSON으로 저장하고 mmap으로 로드
+- 토큰화: 한글 연속 구간은 글자 bigram (형태소 분석기 없이 조사/복합명사 대응),
+  영문/숫자(모델명, 규격, 단위)는 단어 그대로
+- HybridRetriever: BM25와 벡터 검색 결과를 RRF(reciprocal rank fusion)로 결합.
+  lexical_first 모드는 BM25 결과가 확실하면(1위가 질의 가중치 대부분을 포함하고 2위보다 충분히 높으면)
+  질문 임베딩을 생략
+"""
+import os
+import re
+import json
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid", "lexical_first")
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[^\W_가-힣]+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60  # RRF 상수
+FETCH_K = 20  # 결합 전 각 검색에서 가져오는 후보 수
+DECISIVE_COVERAGE = 0.8  # 1위 점수 / (질의의 모든 기지 용어가 1회씩 있는 평균 길이 문서의 점수)
+DECISIVE_MARGIN = 1.5  # 1위 점수 / 2위 점수
+
+def tokenize(text):
+    """한글 구간 -> 글자 bigram (1글자는 그대로), 그 외 단어는 그대로"""
+    tokens = []
+    for word in TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+class LexicalIndex:
+    """numpy 배열로 저장한 역색인 기반 BM25"""
+
+    def __init__(self, doc_ids, vocab, term_offsets, postings_doc, postings_tf, doc_len, k1=BM25_K1, b=BM25_B):
+        self.doc_ids = doc_ids
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+        # 문서별 길이 정규화 항 (모든 질의에서 공통)
+        self._norm = (k1 * (1 - b + b * doc_len / max(self.avg_len, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, ids, texts, k1=BM25_K1, b=BM25_B):
+        """청크 ID 리스트와 본문 리스트(같은 순서)로 구축"""
+        vocab = {}
+        term_ids, doc_pos, tfs, doc_len = [], [], [], []
+        for pos, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_pos.append(pos)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")  # 용어별로 묶고 용어 안에서는 문서 위치 오름차순
+        term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=term_offsets[1:])
+        return cls(
+            np.asarray(list(ids), dtype=str),
+            vocab,
+            term_offsets,
+            np.asarray(doc_pos, dtype=np.int32)[order],
+            np.minimum(np.asarray(tfs, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)[order],
+            np.asarray(doc_len, dtype=np.int32),
+            k1,
+            b,
+        )
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ("doc_ids", "term_offsets", "postings_doc", "postings_tf", "doc_len"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "terms": terms}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+                  for name in ("doc_ids", "term_offsets", "postings_doc", "postings_tf", "doc_len")}
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        vocab = {term: i for i, term in enumerate(meta["terms"])}
+        return cls(vocab=vocab, k1=meta["k1"], b=meta["b"], **arrays)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "vocab.json"))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def search(self, query, k):
+        """상위 k개 (청크 ID, 점수) 리스트와 기준 점수 반환
+
+        기준 점수: 질의의 기지 용어가 모두 1회씩 있는 평균 길이 문서의 점수 (용어 목록에 없는 용어는 제외)
+        """
+        n_docs = len(self.doc_ids)
+        query_terms = Counter(self.vocab[t] for t in tokenize(query) if t in self.vocab)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        reference = 0.0
+        for term, qtf in query_terms.items():
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            df = end - start
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)) * qtf
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+            reference += float(idf)
+        if not query_terms or k <= 0:
+            return [], reference
+
+        k = min(k, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(str(self.doc_ids[i]), float(scores[i])) for i in top if scores[i] > 0], reference
+
+def is_decisive(hits, reference, coverage=DECISIVE_COVERAGE, margin=DECISIVE_MARGIN):
+    """BM25 1위가 질의를 충분히 포함하고 2위보다 확실히 높으면 True"""
+    if not hits or reference <= 0 or hits[0][1] < coverage * reference:
+        return False
+    return len(hits) == 1 or hits[0][1] >= margin * hits[1][1]
+
+def rrf_fuse(rankings, rrf_k=RRF_K):
+    """순위 ID 리스트들을 RRF로 결합해 점수순 ID 리스트 반환"""
+    fused = Counter()
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1.0 / (rrf_k + rank + 1)
+    return [doc_id for doc_id, _ in fused.most_common()]
+
+class HybridRetriever(BaseRetriever):
+    """LexicalIndex와 FAISS/Chroma 벡터 저장소를 결합한 retriever
+
+    search()는 단계별 소요 시간도 반환. lexical이 None이면 모든 모드가 벡터 검색으로 동작.
+    """
+
+    vectorstore: Any
+    lexical: Optional[LexicalIndex] = None
+    k: int = 4
+    fetch_k: int = FETCH_K
+    mode: str = "lexical_first"
+    rrf_k: int = RRF_K
+    decisive_coverage: float = DECISIVE_COVERAGE
+    decisive_margin: float = DECISIVE_MARGIN
+
+    def _dense_search(self, vector, k):
+        """벡터 검색 -> (순위별 청크 ID, 이미 읽은 {ID: Document})"""
+        store = self.vectorstore
+        if hasattr(store, "index_to_docstore_id"):  # FAISS: 인덱스 위치를 바로 청크 ID로 변환
+            _, positions = store.index.search(np.asarray([vector], dtype=np.float32), k)
+            return [store.index_to_docstore_id[i] for i in positions[0] if i != -1], {}
+        docs = store.similarity_search_by_vector(vector, k=k)
+        return [doc.id for doc in docs], {doc.id: doc for doc in docs}
+
+    def _fetch(self, ids, loaded):
+        """ids 순서대로 Document 반환 (벡터 검색에서 읽지 않은 문서만 저장소에서 조회)"""
+        missing = [doc_id for doc_id in ids if doc_id not in loaded]
+        if missing:
+            if hasattr(self.vectorstore, "docstore"):
+                loaded.update((doc_id, self.vectorstore.docstore.search(doc_id)) for doc_id in missing)
+            else:
+                loaded.update((doc.id, doc) for doc in self.vectorstore.get_by_ids(missing))
+        return [loaded[doc_id] for doc_id in ids if not isinstance(loaded.get(doc_id, ""), str)]
+
+    def _lexical_stage(self, query, timings):
+        """BM25 단계 -> (BM25 순위 ID, BM25만으로 결정되면 Document 리스트 아니면 None)"""
+        if self.mode not in RETRIEVAL_MODES:
+            raise ValueError(f"mode는 {RETRIEVAL_MODES} 중 하나여야 합니다: {self.mode!r}")
+        if self.lexical is None or self.mode == "dense":
+            return [], None
+        start = time.perf_counter()
+        hits, reference = self.lexical.search(query, self.fetch_k)
+        timings["bm25"] = time.perf_counter() - start
+        lexical_ids = [doc_id for doc_id, _ in hits]
+        if self.mode == "lexical" or (
+            self.mode == "lexical_first"
+            and is_decisive(hits, reference, self.decisive_coverage, self.decisive_margin)
+        ):
+            start = time.perf_counter()
+            docs = self._fetch(lexical_ids[:self.k], {})
+            timings["fetch"] = time.perf_counter() - start
+            return lexical_ids, docs
+        return lexical_ids, None
+
+    def _dense_stage(self, vector, lexical_ids, timings):
+        """임베딩된 질의로 벡터 검색 후 BM25 순위가 있으면 RRF로 결합"""
+        start = time.perf_counter()
+        dense_ids, loaded = self._dense_search(vector, self.fetch_k if lexical_ids else self.k)
+        timings["search"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ids = rrf_fuse([dense_ids, lexical_ids], self.rrf_k)[:self.k] if lexical_ids else dense_ids[:self.k]
+        docs = self._fetch(ids, loaded)
+        timings["fuse"] = time.perf_counter() - start
+        return docs
+
+    def search(self, query):
+        """(Document 리스트, {단계: 초}) 반환"""
+        timings = {}
+        lexical_ids, docs = self._lexical_stage(query, timings)
+        if docs is not None:
+            return docs, timings
+
+        start = time.perf_counter()
+        vector = self.vectorstore.embeddings.embed_query(query)
+        timings["embed"] = time.perf_counter() - start
+        return self._dense_stage(vector, lexical_ids, timings), timings
+
+    def search_batch(self, queries):
+        """여러 질의 search(). BM25만으로 결정되지 않는 질의는 한 번의 배치 호출로 임베딩
+
+        임베딩 객체에 embed_queries()가 있으면(CachedEmbeddings) 사용, 각 질의의 'embed' 시간은 공유한 배치 호출 시간.
+        """
+        queries = list(queries)
+        results = []
+        pending = []
+        for query in queries:
+            timings = {}
+            lexical_ids, docs = self._lexical_stage(query, timings)
+            results.append((docs, timings))
+            if docs is None:
+                pending.append((len(results) - 1, lexical_ids))
+        if not pending:
+            return results
+
+        embeddings = self.vectorstore.embeddings
+        texts = [queries[i] for i, _ in pending]
+        start = time.perf_counter()
+        if hasattr(embeddings, "embed_queries"):
+            vectors = embeddings.embed_queries(texts)
+        else:
+            vectors = [embeddings.embed_query(text) for text in texts]
+        elapsed = time.perf_counter() - start
+
+        for (i, lexical_ids), vector in zip(pending, vectors):
+            timings = results[i][1]
+            timings["embed"] = elapsed
+            results[i] = (self._dense_stage(vector, lexical_ids, timings), timings)
+        return results
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.search(query)[0]
@@ -0,0 +1,36 @@
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+class StubEmbeddings(Embeddings):
+    """본문 해시로 만든 결정적 정규화 벡터 (bge-m3 대신 사용, 호출 수 기록)"""
+
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.documents = 0
+        self.queries = 0
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+        v = np.random.default_rng(seed).standard_normal(self.dim)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return self.vector(text)
+
+@pytest.fixture
+def stub_embeddings():
+    return StubEmbeddings()
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from langchain_classic.chains import RetrievalQA
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import PromptTemplate
+
+import agent
+import answer_cache
+from answer_cache import AnswerCache, CachedRetrievalQA
+from ingest import build_faiss_store
+from lexical_index import HybridRetriever, LexicalIndex
+
+TEXTS = ['충전기 접지 저항 측정 방법', '변압기 점검 주기 안내', '케이블 규격 표']
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, 'time', clock)
+    return clock
+
+def doc(text):
+    return Document(page_content=text, metadata={'source': 'doc.pdf', 'page': 0})
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = AnswerCache('v1', tmp_path / 'cache.sqlite', ttl=100)
+    cache.put('변압기 점검 주기는?', None, '1년', [doc('변압기 점검 주기 안내')])
+    answer, docs = cache.get('  변압기 점검 주기는 ')  # 정규화 후 정확 일치
+    assert answer == '1년' and docs[0].page_content == '변압기 점검 주기 안내'
+
+    clock.now += 200
+    assert cache.get('변압기 점검 주기는?') is None
+    assert cache.stats()['entries'] == 0
+
+def test_lru_eviction(tmp_path, clock):
+    cache = AnswerCache('v1', tmp_path / 'cache.sqlite', max_entries=10)
+    for i in range(10):
+        cache.put(f'질문 {i}', np.eye(16, dtype=np.float32)[i], f'답변 {i}', [])
+    assert cache.get('질문 0') is not None  # 최근 사용 -> 유지
+    cache.put('질문 10', np.eye(16, dtype=np.float32)[10], '답변 10', [])
+
+    # 한도 초과 시 90%까지 가장 오래 사용되지 않은 항목부터 삭제
+    assert cache.stats()['entries'] == 9
+    kept = [i for i in range(11) if cache.get(f'질문 {i}') is not None]
+    assert kept == [0, 3, 4, 5, 6, 7, 8, 9, 10]
+    # 삭제된 항목은 유사 일치 대상에서도 제외
+    assert cache.get_similar(np.eye(16, dtype=np.float32)[1]) is None
+    assert cache.get_similar(np.eye(16, dtype=np.float32)[3])[0] == '답변 3'
+
+def test_semantic_match_and_version(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = AnswerCache('v1', path, threshold=0.95)
+    vector = np.eye(16, dtype=np.float32)[0]
+    cache.put('케이블 규격', vector, '표 참조', [])
+    near = vector + 0.1 * np.eye(16, dtype=np.float32)[1]
+    assert cache.get_similar(near)[:1] == ('표 참조',)
+    assert cache.get_similar(np.eye(16, dtype=np.float32)[1]) is None
+    stats = cache.stats()
+    assert (stats['semantic_hits'], stats['misses']) == (1, 1)
+    cache.close()
+
+    # 다른 version으로 열면 이전 답변 삭제
+    assert AnswerCache('v2', path).stats()['entries'] == 0
+
+def test_store_version_includes_embedding_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    before = agent.store_version(use_ann=False)
+    monkeypatch.setattr(agent, 'MODEL_PATH', './other-model')
+    assert agent.store_version(use_ann=False) != before
+
+@pytest.fixture
+def qa(tmp_path, stub_embeddings):
+    docs = [doc(text) for text in TEXTS]
+    ids = [f'chunk-{i}' for i in range(len(TEXTS))]
+    vectors = np.asarray(stub_embeddings.embed_documents(TEXTS), dtype=np.float32)
+    store = build_faiss_store(stub_embeddings, docs, vectors, ids)
+    retriever = HybridRetriever(vectorstore=store, lexical=LexicalIndex.build(ids, TEXTS), k=2)
+    chain = RetrievalQA.from_chain_type(
+        llm=FakeListChatModel(responses=['답변']),
+        chain_type='stuff',
+        retriever=retriever,
+        return_source_documents=True,
+        chain_type_kwargs={'prompt': PromptTemplate(template=agent.PROMPT_TEMPLATE, input_variables=['context', 'question'])},
+    )
+    stub_embeddings.queries = 0
+    return CachedRetrievalQA(chain, AnswerCache('v1', tmp_path / 'cache.sqlite'), stub_embeddings)
+
+def test_lexical_first_question_is_not_embedded(qa, stub_embeddings):
+    response = qa.invoke({'query': '변압기 점검 주기'})
+    assert response['cache'] is None and response['result'] == '답변'
+    assert response['source_documents'][0].page_content == '변압기 점검 주기 안내'
+    assert stub_embeddings.queries == 0
+
+    assert qa.invoke({'query': '변압기 점검 주기?'})['cache'] == 'exact'
+    assert stub_embeddings.queries == 0
+    assert qa.cache.stats()['misses'] == 1
+
+def test_dense_question_embeds_once(qa, stub_embeddings):
+    query = 'EV 설비 문의'
+    expected = [d.page_content for d in qa.chain.retriever.search(query)[0]]
+    stub_embeddings.queries = 0
+
+    response = qa.invoke({'query': query})
+    assert [d.page_content for d in response['source_documents']] == expected
+    assert stub_embeddings.queries == 1  # 유사 조회와 벡터 검색이 같은 임베딩 사용
@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import embedding_cache
+from embedding_cache import CachedEmbeddings
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # 타이머 해상도와 관계없이 LRU 순서가 정해지도록 단조 증가하는 시각 사용
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embedding_cache.time, 'time', lambda: float(next(ticks)))
+
+def test_round_trip_across_instances(tmp_path, stub_embeddings):
+    path = tmp_path / 'cache.sqlite'
+    texts = ['충전기', '변압기', '충전기']
+    cache = CachedEmbeddings(stub_embeddings, 'stub', path=path)
+    first = cache.embed_documents(texts)
+    assert stub_embeddings.documents == 2  # 중복 텍스트는 한 번만 임베딩
+    assert cache.stats()['misses'] == 3 and cache.stats()['entries'] == 2
+    cache.close()
+
+    reopened = CachedEmbeddings(stub_embeddings, 'stub', path=path)
+    assert reopened.embed_documents(texts) == first
+    assert stub_embeddings.documents == 2
+    assert reopened.stats()['hit_rate'] == 1.0
+
+    # 질의/문서, 모델이 다르면 다른 키
+    reopened.embed_query('충전기')
+    CachedEmbeddings(stub_embeddings, 'other', path=path).embed_documents(['충전기'])
+    assert stub_embeddings.queries == 1 and stub_embeddings.documents == 3
+
+def test_float16_storage(tmp_path, stub_embeddings):
+    cache = CachedEmbeddings(stub_embeddings, 'stub', path=tmp_path / 'cache.sqlite', dtype='float16')
+    cache.embed_documents(['충전기'])
+    cached = cache.embed_documents(['충전기'])[0]
+    np.testing.assert_allclose(cached, stub_embeddings.vector('충전기'), atol=1e-3)
+    assert cache.stats()['vector_bytes'] == 2 * stub_embeddings.dim
+
+    with pytest.raises(ValueError):
+        CachedEmbeddings(stub_embeddings, 'stub', path=tmp_path / 'other.sqlite', dtype='int8')
+
+def test_lru_eviction(tmp_path, stub_embeddings):
+    cache = CachedEmbeddings(stub_embeddings, 'stub', path=tmp_path / 'cache.sqlite', max_entries=2)
+    cache.embed_documents(['a'])
+    cache.embed_documents(['b'])
+    cache.embed_documents(['a'])  # 'a' 갱신 -> 'b'가 가장 오래 사용되지 않은 항목
+    cache.embed_documents(['c'])
+    assert cache.stats()['entries'] == 2
+
+    calls = stub_embeddings.documents
+    cache.embed_documents(['a', 'c'])
+    assert stub_embeddings.documents == calls
+    cache.embed_documents(['b'])
+    assert stub_embeddings.documents == calls + 1
+
+    by_size = CachedEmbeddings(stub_embeddings, 'stub', path=tmp_path / 'sized.sqlite',
+                               max_bytes=3 * 4 * stub_embeddings.dim)
+    by_size.embed_documents(['a', 'b', 'c', 'd', 'e'])
+    assert by_size.stats()['entries'] == 3
+
+def test_query_batch(tmp_path, stub_embeddings):
+    batches = []
+
+    def query_batch(texts):
+        batches.append(list(texts))
+        return [stub_embeddings.vector(text) for text in texts]
+
+    cache = CachedEmbeddings(stub_embeddings, 'stub', path=tmp_path / 'cache.sqlite', query_batch=query_batch)
+    cache.embed_query('a')
+    vectors = cache.embed_queries(['a', 'b', 'c', 'b'])
+    assert batches == [['b', 'c']] and stub_embeddings.queries == 1
+    assert vectors[1] == vectors[3] == pytest.approx(stub_embeddings.vector('b'), rel=1e-6)
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import ingest
+from index_store import PositionIdMap, SQLiteDocstore, export_store, load_meta, load_store
+
+N_DOCS = 300
+
+@pytest.fixture
+def source(tmp_path, stub_embeddings):
+    """ingest.py와 같은 방식으로 만든 정확(flat) 원본 DB"""
+    texts = [f'청크 {i} 충전기 점검 기록' for i in range(N_DOCS)]
+    docs = [Document(page_content=text, metadata={'source': 'a.pdf', 'page': i}) for i, text in enumerate(texts)]
+    ids = [f'c{i}' for i in range(N_DOCS)]
+    store = ingest.build_faiss_store(stub_embeddings, docs, ingest.embed_texts(stub_embeddings, texts), ids)
+    src = str(tmp_path / 'db_faiss')
+    store.save_local(src)
+    with open(os.path.join(src, 'manifest.json'), 'w', encoding='utf-8') as f:
+        f.write('{}')
+    return src, store
+
+def top_texts(store, query, k):
+    return [doc.page_content for doc in store.similarity_search_by_vector(query, k=k)]
+
+@pytest.mark.parametrize('index_type', ['flat', 'hnsw'])
+def test_export_round_trip(tmp_path, source, stub_embeddings, index_type):
+    src, reference = source
+    dst = str(tmp_path / 'ann')
+    meta = export_store(src, dst, index_type=index_type)
+    assert meta['ntotal'] == N_DOCS and load_meta(dst)['index_type'] == index_type
+
+    store = load_store(stub_embeddings, dst, ef_search=N_DOCS)
+    for i in (0, 7, 150):
+        query = stub_embeddings.vector(f'질의 {i}')
+        assert top_texts(store, query, 5) == top_texts(reference, query, 5)
+    doc = store.similarity_search_by_vector(stub_embeddings.vector('청크 3 충전기 점검 기록'), k=1)[0]
+    assert doc.metadata == {'source': 'a.pdf', 'page': 3}
+
+def test_ivfpq_export(tmp_path, source, stub_embeddings):
+    src, reference = source
+    dst = str(tmp_path / 'ann')
+    meta = export_store(src, dst, index_type='ivfpq', pq_m=4, refine=4)
+    assert meta['nlist'] >= 1 and meta['refine'] == 4
+    store = load_store(stub_embeddings, dst, nprobe=meta['nlist'])
+    # refine 재순위로 정확한 1위를 찾음
+    query = stub_embeddings.vector('청크 42 충전기 점검 기록')
+    assert top_texts(store, query, 1) == top_texts(reference, query, 1) == ['청크 42 충전기 점검 기록']
+
+    with pytest.raises(ValueError):
+        export_store(src, dst, index_type='ivfpq', pq_m=5)
+
+def test_stale_source_warning(tmp_path, source, stub_embeddings, capsys):
+    src, _ = source
+    dst = str(tmp_path / 'ann')
+    export_store(src, dst, index_type='flat')
+    load_store(stub_embeddings, dst)
+    assert '경고' not in capsys.readouterr().out
+
+    with open(os.path.join(src, 'manifest.json'), 'w', encoding='utf-8') as f:
+        f.write('{"files": {}}')
+    load_store(stub_embeddings, dst)
+    assert '경고' in capsys.readouterr().out
+
+def test_sqlite_docstore(tmp_path):
+    path = tmp_path / 'docstore.sqlite'
+    writer = SQLiteDocstore(path, readonly=False)
+    writer.add({'a': Document(page_content='가', metadata={'page': 1}), 'b': Document(page_content='나')})
+    writer.add({'c': Document(page_content='다')})
+    writer.close()
+
+    store = SQLiteDocstore(path)
+    assert len(store) == 3
+    assert store.search('c') == Document(page_content='다')
+    assert isinstance(store.search('missing'), str)
+    id_map = PositionIdMap(store)
+    assert list(id_map) == [0, 1, 2] and [id_map[pos] for pos in id_map] == ['a', 'b', 'c']
+    assert id_map[np.int64(1)] == 'b'
+    with pytest.raises(KeyError):
+        id_map[3]
+    with pytest.raises(Exception):
+        store.add({'d': Document(page_content='라')})  # 읽기 전용 연결
@@ -0,0 +1,103 @@
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import ingest
+
+def fake_load_and_split(pdf_path):
+    """PDF 대신 텍스트 파일: 줄 1개 = 청크 1개, 'BROKEN'으로 시작하면 로드 오류"""
+    with open(pdf_path, encoding='utf-8') as f:
+        text = f.read()
+    if text.startswith('BROKEN'):
+        return pdf_path, [], 0, 'cannot open'
+    lines = [line for line in text.splitlines() if line]
+    return pdf_path, [Document(page_content=line, metadata={'source': pdf_path, 'page': 0}) for line in lines], 1, None
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch, stub_embeddings):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('docs')
+    monkeypatch.setattr(ingest, 'load_and_split', fake_load_and_split)
+    monkeypatch.setattr(ingest, 'get_embeddings', lambda *args, **kwargs: stub_embeddings)
+    return tmp_path
+
+def write_doc(name, *lines):
+    with open(os.path.join('docs', name), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+def run():
+    ingest.create_vector_db(batch_size=4, workers=1, cache=False)
+
+def manifest_files():
+    with open(ingest.MANIFEST_PATH, encoding='utf-8') as f:
+        return json.load(f)['files']
+
+def stored_texts():
+    with open(os.path.join(ingest.DB_PATH, 'index.pkl'), 'rb') as f:
+        docstore, index_to_id = pickle.load(f)
+    return sorted(docstore.search(i).page_content for i in index_to_id.values())
+
+def test_incremental_ingest(workspace, stub_embeddings):
+    write_doc('a.pdf', '충전기 설치 기준', '접지 저항 측정')
+    write_doc('b.pdf', '변압기 점검 주기')
+    run()
+    assert set(manifest_files()) == {'a.pdf', 'b.pdf'}
+    assert stored_texts() == ['변압기 점검 주기', '접지 저항 측정', '충전기 설치 기준']
+    assert stub_embeddings.documents == 3
+
+    # 변경 없음 -> 임베딩 없음
+    run()
+    assert stub_embeddings.documents == 3
+
+    # 변경된 파일은 새 청크만 임베딩하고 사라진 청크는 삭제
+    write_doc('a.pdf', '충전기 설치 기준', '절연 저항 측정')
+    run()
+    assert stub_embeddings.documents == 4
+    assert stored_texts() == ['변압기 점검 주기', '절연 저항 측정', '충전기 설치 기준']
+
+    # 삭제된 파일의 청크 제거
+    os.remove(os.path.join('docs', 'b.pdf'))
+    write_doc('c.pdf', '케이블 규격')
+    run()
+    assert set(manifest_files()) == {'a.pdf', 'c.pdf'}
+    assert stored_texts() == ['절연 저항 측정', '충전기 설치 기준', '케이블 규격']
+
+def test_failed_file_keeps_previous_entry(workspace):
+    write_doc('a.pdf', '충전기 설치 기준')
+    write_doc('b.pdf', '변압기 점검 주기')
+    run()
+    before = manifest_files()['b.pdf']
+
+    write_doc('b.pdf', 'BROKEN')
+    write_doc('a.pdf', '충전기 설치 기준', '케이블 규격')
+    run()
+    files = manifest_files()
+    assert files['b.pdf'] == before  # 이전 해시/청크 유지 -> 다음 실행에서 다시 시도
+    assert stored_texts() == ['변압기 점검 주기', '충전기 설치 기준', '케이블 규격']
+
+    # 읽지 못한 새 파일은 manifest에 기록하지 않음
+    write_doc('c.pdf', 'BROKEN')
+    write_doc('a.pdf', '충전기 설치 기준')
+    run()
+    assert 'c.pdf' not in manifest_files()
+
+def test_embed_texts_keeps_input_order(stub_embeddings):
+    texts = ['충전기', '변압기 점검 주기와 절연 저항', 'a', '케이블 규격 및 허용 전류', '접지']
+    vectors = ingest.embed_texts(stub_embeddings, texts, batch_size=2)
+    assert vectors.dtype == np.float32 and vectors.shape == (5, 16)
+    np.testing.assert_allclose(vectors, np.asarray([stub_embeddings.vector(t) for t in texts]), rtol=1e-6)
+
+def test_faiss_store_matches_from_texts(stub_embeddings):
+    docs = [Document(page_content=text) for text in ['충전기 설치 기준', '접지 저항 측정', '변압기 점검 주기']]
+    ids = ['c0', 'c1', 'c2']
+    vectors = ingest.embed_texts(stub_embeddings, [doc.page_content for doc in docs])
+    store = ingest.build_faiss_store(stub_embeddings, docs, vectors, ids)
+    reference = ingest.FAISS.from_documents(docs, stub_embeddings, ids=ids)
+    assert store.index_to_docstore_id == reference.index_to_docstore_id
+    query = stub_embeddings.vector('접지 저항')
+    assert ([d.page_content for d in store.similarity_search_by_vector(query, k=3)]
+            == [d.page_content for d in reference.similarity_search_by_vector(query, k=3)])
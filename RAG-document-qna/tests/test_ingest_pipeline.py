@@ -0,0 +1,82 @@
+import itertools
+import time
+
+import pytest
+
+from ingest_pipeline import QUEUE_SIZE, parallel_map, rebatch, run_pipeline
+
+def square(x):
+    return x * x
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parallel_map_keeps_order(workers):
+    assert list(parallel_map(square, range(10), workers)) == [x * x for x in range(10)]
+
+def test_parallel_map_bounds_prefetch():
+    pulled = []
+
+    def items():
+        for x in range(20):
+            pulled.append(x)
+            yield x
+
+    results = parallel_map(square, items(), workers=2, prefetch=3)
+    assert next(results) == 0
+    assert len(pulled) <= 4  # prefetch개 + 첫 결과 뒤 새로 맡긴 1개
+    assert list(results) == [x * x for x in range(1, 20)]
+
+def test_rebatch():
+    assert list(rebatch([[1, 2, 3], [], [4], [5, 6, 7, 8, 9]], 4)) == [[1, 2, 3, 4], [5, 6, 7, 8], [9]]
+    assert list(rebatch([], 4)) == []
+
+def test_run_pipeline_order_and_stats():
+    output = []
+
+    def double(batches):
+        for batch in batches:
+            yield [x * 2 for x in batch]
+
+    def collect(batches):
+        for batch in batches:
+            output.extend(batch)
+            yield batch
+
+    source = ([i, i + 1] for i in range(0, 100, 2))
+    stats = run_pipeline(source, [('parse', lambda items: items), ('double', double), ('write', collect)])
+    assert output == [x * 2 for x in range(100)]
+    assert [(s.name, s.items, s.chunks) for s in stats] == [('parse', 50, 100), ('double', 50, 100),
+                                                           ('write', 50, 100)]
+    assert all(s.depth_max <= QUEUE_SIZE for s in stats[:-1])
+
+def test_run_pipeline_bounds_items_in_flight():
+    queue_size = 2
+    produced, consumed, in_flight = [0], [0], []
+
+    def source():
+        for i in range(50):
+            produced[0] += 1
+            yield [i]
+
+    def slow(batches):
+        for batch in batches:
+            in_flight.append(produced[0] - consumed[0])
+            time.sleep(0.002)
+            consumed[0] += 1
+            yield batch
+
+    run_pipeline(source(), [('parse', lambda items: items), ('copy', lambda items: items), ('write', slow)],
+                 queue_size)
+    # 단계마다 최대 1개, 큐마다 최대 queue_size개
+    assert max(in_flight) <= 2 * queue_size + 3
+
+def test_run_pipeline_propagates_errors():
+    def fail(batches):
+        for i, batch in enumerate(batches):
+            if i == 3:
+                raise RuntimeError('임베딩 실패')
+            yield batch
+
+    # 실패 후에는 끝없는 입력이라도 나머지 단계가 멈춰야 함
+    source = ([i] for i in itertools.count())
+    with pytest.raises(RuntimeError, match='임베딩 실패'):
+        run_pipeline(source, [('parse', lambda items: items), ('embed', fail), ('write', lambda items: items)])
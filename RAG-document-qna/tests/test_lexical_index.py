@@ -0,0 +1,101 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import ingest
+from lexical_index import HybridRetriever, LexicalIndex, is_decisive, rrf_fuse, tokenize
+
+TEXTS = [
+    'EV charger installation guide for 7kW slow chargers',
+    'Transformer inspection schedule and insulation resistance',
+    '충전기 설치 기준과 접지 저항 측정 방법',
+    '변압기 점검 주기 및 절연 저항 기준',
+    'Cable sizing for 50kW fast chargers 충전기 케이블',
+]
+IDS = [f'c{i}' for i in range(len(TEXTS))]
+
+def naive_bm25(query, texts, k1=1.2, b=0.75):
+    """같은 토큰화로 문서마다 직접 계산한 BM25 (비교 기준)"""
+    docs = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg = sum(lengths) / len(lengths)
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term, qtf in Counter(tokenize(query)).items():
+            df = sum(term in d for d in docs)
+            if not df:
+                continue
+            idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5)) * qtf
+            tf = doc[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg))
+        scores.append(score)
+    return scores
+
+def test_tokenize():
+    assert tokenize('충전기 설치') == ['충전', '전기', '설치']
+    assert tokenize('EV-Charger 7kW 가') == ['ev', 'charger', '7kw', '가']
+    assert tokenize('ＡＢＣ') == ['abc']  # NFKC로 전각 문자 정규화
+
+@pytest.mark.parametrize('query', ['충전기 접지', 'transformer insulation', 'chargers 충전기 케이블', 'unknown'])
+def test_scores_match_reference(query, tmp_path):
+    index = LexicalIndex.build(IDS, TEXTS)
+    expected = naive_bm25(query, TEXTS)
+    hits, _ = index.search(query, len(TEXTS))
+    assert {doc_id: pytest.approx(expected[IDS.index(doc_id)], rel=1e-5) for doc_id, _ in hits} == dict(hits)
+    assert [doc_id for doc_id, _ in hits] == [IDS[i] for i in sorted(range(len(IDS)), key=lambda i: -expected[i])
+                                              if expected[i] > 0]
+
+    index.save(tmp_path / 'lexical')
+    assert LexicalIndex.exists(tmp_path / 'lexical')
+    assert LexicalIndex.load(tmp_path / 'lexical').search(query, 3) == index.search(query, 3)
+
+def test_is_decisive():
+    assert not is_decisive([], 1.0)
+    assert not is_decisive([('a', 0.5)], 1.0)  # 질의 포함 정도 부족
+    assert is_decisive([('a', 0.9)], 1.0)
+    assert is_decisive([('a', 0.9), ('b', 0.5)], 1.0)
+    assert not is_decisive([('a', 0.9), ('b', 0.8)], 1.0)  # 2위와 차이 부족
+
+def test_rrf_fuse():
+    assert rrf_fuse([['a', 'b', 'c'], ['c', 'a']]) == ['a', 'c', 'b']
+    assert rrf_fuse([['a'], []]) == ['a']
+
+@pytest.fixture
+def retriever(stub_embeddings):
+    docs = [Document(page_content=text, metadata={'source': 'a.pdf'}) for text in TEXTS]
+    store = ingest.build_faiss_store(stub_embeddings, docs, ingest.embed_texts(stub_embeddings, TEXTS), IDS)
+    return HybridRetriever(vectorstore=store, lexical=LexicalIndex.build(IDS, TEXTS), k=2)
+
+def contents(docs):
+    return [doc.page_content for doc in docs]
+
+def test_lexical_first_skips_embedding(retriever, stub_embeddings):
+    docs, timings = retriever.search('transformer inspection schedule')
+    assert contents(docs)[0] == TEXTS[1]
+    assert 'embed' not in timings and stub_embeddings.queries == 0
+
+def test_hybrid_fuses_both_rankings(retriever, stub_embeddings):
+    retriever.mode = 'hybrid'
+    query = '충전기 기준'
+    docs, timings = retriever.search(query)
+    lexical_ids = [doc_id for doc_id, _ in retriever.lexical.search(query, retriever.fetch_k)[0]]
+    dense_ids = [retriever.vectorstore.index_to_docstore_id[i] for i in
+                 retriever.vectorstore.index.search(np.asarray([stub_embeddings.vector(query)], dtype=np.float32), 5)[1][0]]
+    assert contents(docs) == [TEXTS[IDS.index(doc_id)] for doc_id in rrf_fuse([dense_ids, lexical_ids])[:2]]
+    assert 'embed' in timings and 'bm25' in timings
+
+@pytest.mark.parametrize('mode', ['dense', 'lexical', 'hybrid', 'lexical_first'])
+def test_search_batch_matches_search(retriever, mode):
+    retriever.mode = mode
+    queries = ['transformer inspection schedule', '충전기 기준', 'cable', 'unknown words']
+    expected = [contents(retriever.search(query)[0]) for query in queries]
+    assert [contents(docs) for docs, _ in retriever.search_batch(queries)] == expected
+
+def test_invalid_mode(retriever):
+    retriever.mode = 'bm25'
+    with pytest.raises(ValueError):
+        retriever.search('cable')
@@ -0,0 +1,268 @@
+"""
+Batch question answering over a JSONL file of questions (regression evaluation).
+
+Input lines look like {"id": ..., "question": ...}; "id" defaults to the line number.
+Questions are processed in windows of --embed-batch. Each window runs BM25 for
+every question and embeds all questions that still need a dense search in a
+single call. The window's LLM calls then run concurrently, with at most
+--concurrency in flight, behind a token bucket of --rpm requests per minute.
+A 429 / RESOURCE_EXHAUSTED error pauses the bucket for the delay the server
+suggests, and the call is retried.
+
+Every result is appended to the output JSONL as soon as it finishes, so lines
+are in completion order, not input order; match them by id. Each record has:
+- timings_ms: retrieval stages (embed is the window's shared batch call)
+- queue_ms: time waiting for a concurrency slot after the window's retrieval
+- latency_ms: time from getting a slot to the answer, including token bucket
+  waits and retries
+--resume skips ids already in the output, so an interrupted overnight run can
+be continued.
+
+Usage:
+    python batch_qa.py questions.jsonl -o answers.jsonl --concurrency 8 --rpm 15
+    python batch_qa.py questions.jsonl --stub-llm --stub-latency 0.5   # no Gemini LLM calls
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import numpy as np
+from langchain_core.language_models import FakeListChatModel
+
+from chat import initialize_chatbot, format_docs
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RPM = 15  # Gemini free-tier requests per minute for flash-lite models
+DEFAULT_EMBED_BATCH = 64
+MAX_RETRIES = 5
+STUB_ANSWER = "(stub answer)"
+
+
+class TokenBucket:
+    """Async token bucket: `rate_per_minute` tokens per minute, bursts of up to `burst`."""
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` (after a rate-limit error) and drop the saved burst."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class StubChatModel(FakeListChatModel):
+    """Local stand-in for Gemini: fixed answer after `latency` seconds, optionally failing with 429s."""
+
+    latency: float = 0.5
+    error_rate: float = 0.0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (stub). Please retry in 0.2s.")
+        return self._generate(messages, stop=stop, **kwargs)
+
+
+def is_rate_limited(error):
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "429" in message
+
+
+def retry_delay(error, attempt):
+    """Seconds to wait after a rate-limit error: the server's hint if present, else exponential backoff."""
+    match = re.search(r"retry in ([\d.]+)\s*s|retryDelay['\"]?:\s*['\"]?([\d.]+)s", str(error))
+    if match:
+        return float(match.group(1) or match.group(2))
+    return min(60.0, 2.0 ** attempt)
+
+
+async def call_with_retry(bucket, func, max_retries=MAX_RETRIES):
+    """Await func() behind the token bucket, retrying rate-limit errors. Returns (result, attempts)."""
+    for attempt in range(1, max_retries + 2):
+        if bucket is not None:
+            await bucket.acquire()
+        try:
+            return await func(), attempt
+        except Exception as e:
+            if not is_rate_limited(e) or attempt > max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            if bucket is not None:
+                bucket.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+
+def read_questions(path, skip_ids=()):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", line_no)
+            if item["id"] not in skip_ids:
+                yield item
+
+
+def completed_ids(path):
+    """IDs already answered without error in an output file (for --resume)."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return {record["id"] for record in records if not record.get("error")}
+
+
+def windows(items, size):
+    window = []
+    for item in items:
+        window.append(item)
+        if len(window) == size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def source_info(doc):
+    return {key: doc.metadata[key] for key in ("source", "page") if key in doc.metadata}
+
+
+async def run_batch(questions_path, output_path, retriever, answer_fn, concurrency=DEFAULT_CONCURRENCY,
+                    rpm=DEFAULT_RPM, embed_batch=DEFAULT_EMBED_BATCH, embed_rpm=None, resume=False):
+    """Answer every question in questions_path and stream results to output_path. Returns a summary dict.
+
+    Results are written in completion order. Throughput and the latency percentiles
+    cover successfully answered questions only (their latency_ms).
+    answer_fn(question, docs) is a coroutine returning the answer text.
+    """
+    llm_bucket = TokenBucket(rpm) if rpm else None
+    embed_bucket = TokenBucket(embed_rpm) if embed_rpm else None
+    slots = asyncio.Semaphore(concurrency)
+    skip = completed_ids(output_path) if resume else set()
+    latencies, errors = [], 0
+    started = time.perf_counter()
+
+    def write(record):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    async def answer(item, docs, timings, queue_wait):
+        nonlocal errors
+        record = {"id": item["id"], "question": item["question"]}
+        queued = time.perf_counter()
+        try:
+            text, attempts = await call_with_retry(llm_bucket, lambda: answer_fn(item["question"], docs))
+            timings["llm"] = time.perf_counter() - queued
+            record.update(answer=text, attempts=attempts)
+        except Exception as e:
+            errors += 1
+            record.update(answer=None, error=f"{type(e).__name__}: {e}")
+        finally:
+            slots.release()
+        latency = time.perf_counter() - queued
+        if "error" not in record:  # failed questions stay out of the throughput and latency figures
+            latencies.append(latency)
+        record.update(
+            sources=[source_info(doc) for doc in docs],
+            timings_ms={stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+            queue_ms=round(queue_wait * 1000, 2),
+            latency_ms=round(latency * 1000, 2),
+        )
+        write(record)
+
+    tasks = []
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        for window in windows(read_questions(questions_path, skip), embed_batch):
+            questions = [item["question"] for item in window]
+            # One batched retrieval (BM25 + one embedding call) per window, off the event loop
+            try:
+                results, _ = await call_with_retry(
+                    embed_bucket, lambda: asyncio.to_thread(retriever.search_batch, questions)
+                )
+            except Exception as e:
+                errors += len(window)
+                for item in window:
+                    write({"id": item["id"], "question": item["question"], "answer": None,
+                           "error": f"retrieval failed: {type(e).__name__}: {e}"})
+                continue
+            retrieved = time.perf_counter()
+            for item, (docs, timings) in zip(window, results):
+                await slots.acquire()
+                queue_wait = time.perf_counter() - retrieved
+                tasks.append(asyncio.create_task(answer(item, docs, timings, queue_wait)))
+            tasks = [task for task in tasks if not task.done()]
+        await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "answered": len(latencies),
+        "errors": errors,
+        "skipped": len(skip),
+        "elapsed_sec": elapsed,
+        "questions_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_latency_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+        "p95_latency_ms": float(np.percentile(latencies, 95) * 1000) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions concurrently")
+    parser.add_argument("questions", help='JSONL input, one {"id": ..., "question": ...} per line')
+    parser.add_argument("-o", "--output", default="batch_answers.jsonl")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="max LLM calls in flight")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_RPM, help="LLM requests per minute (0 = unlimited)")
+    parser.add_argument("--embed-rpm", type=float, default=None, help="embedding requests per minute")
+    parser.add_argument("--embed-batch", type=int, default=DEFAULT_EMBED_BATCH, help="questions embedded per call")
+    parser.add_argument("--resume", action="store_true", help="append to --output and skip ids already answered")
+    parser.add_argument("--stub-llm", action="store_true", help="use a local stub instead of Gemini for answers")
+    parser.add_argument("--stub-latency", type=float, default=0.5)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="fraction of stub calls failing with 429")
+    args = parser.parse_args()
+
+    llm = None
+    if args.stub_llm:
+        llm = StubChatModel(responses=[STUB_ANSWER], latency=args.stub_latency, error_rate=args.stub_error_rate)
+    answer_chain, retriever = initialize_chatbot(llm)
+
+    async def answer_fn(question, docs):
+        return await answer_chain.ainvoke({"context": format_docs(docs), "question": question})
+
+    print(f"🚀 Answering {args.questions} -> {args.output} "
+          f"(concurrency {args.concurrency}, {args.rpm or 'unlimited'} rpm, embed batch {args.embed_batch})")
+    summary = asyncio.run(run_batch(args.questions, args.output, retriever, answer_fn, args.concurrency,
+                                    args.rpm, args.embed_batch, args.embed_rpm, args.resume))
+    print(f"✅ {summary['answered']} answered ({summary['errors']} errors, {summary['skipped']} skipped) "
+          f"in {summary['elapsed_sec']:.1f}s, {summary['questions_per_sec']:.2f} questions/s")
+    if summary["answered"]:
+        print(f"⏱️  latency p50 {summary['p50_latency_ms']:,.0f}ms | p95 {summary['p95_latency_ms']:,.0f}ms")
+    embeddings = retriever.vectorstore.embeddings
+    if hasattr(embeddings, "report"):
+        print(f"✓ {embeddings.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,31 @@
 """
 Simple RAG chatbot using ChromaDB + Google Gemini.
+
+Each question is retrieved exactly once and the same documents feed the prompt,
+the source listing and the rate-limit fallback. Retrieval fuses BM25 over the
+lexical index built by ingest.py with Chroma vector search; when BM25 alone is
+decisive the query embedding is skipped (see lexical_index.py). Per-stage latency
+(bm25, embed, search, fuse, LLM) is printed per turn.
 """
 import os
+import time
+from functools import partial
 from dotenv import load_dotenv
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+
+from embedding_cache import CachedEmbeddings
+from lexical_index import HybridRetriever, LexicalIndex
+
+RETRIEVAL_K = 2  # smaller k to reduce token usage
+RETRIEVAL_MODE = "lexical_first"  # dense | lexical | hybrid | lexical_first
+LEXICAL_PATH = "./chroma_db/lexical"
 
 
-def initialize_chatbot():
-    """Initialize the RAG chatbot with ChromaDB and Gemini."""
+def initialize_chatbot(llm=None):
+    """Initialize the RAG chatbot with ChromaDB and Gemini (or the given chat model, e.g. a stub)."""
     # Load environment variables
     load_dotenv()
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -20,8 +34,11 @@ def initialize_chatbot():
     
     print("🔧 Initializing chatbot...")
     
-    # Load embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+    # Load embeddings (batched query embeddings use the same RETRIEVAL_QUERY task type as embed_query)
+    model = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+    embeddings = CachedEmbeddings(
+        model, "models/text-embedding-004", query_batch=partial(model.embed_documents, task_type="RETRIEVAL_QUERY")
+    )
     
     # Load existing ChromaDB
     vectorstore = Chroma(
@@ -31,15 +48,23 @@ def initialize_chatbot():
     )
     print(f"✅ Loaded ChromaDB from ./chroma_db")
     
-    # Initialize Gemini LLM (use lite model for better availability)
-    llm = ChatGoogleGenerativeAI(
-        model="models/gemini-flash-lite-latest",
-        temperature=0.7,
-    )
-    print(f"✅ Initialized Gemini LLM (models/gemini-flash-lite-latest)")
+    # Load BM25 lexical index (dense-only retrieval if ingest.py has not built it yet)
+    lexical = LexicalIndex.load(LEXICAL_PATH) if LexicalIndex.exists(LEXICAL_PATH) else None
+    if lexical is None:
+        print(f"⚠️  No lexical index at {LEXICAL_PATH}, using dense retrieval only (run ingest.py to build it)")
+    else:
+        print(f"✅ Loaded BM25 lexical index ({len(lexical)} chunks, mode: {RETRIEVAL_MODE})")
+    retriever = HybridRetriever(vectorstore=vectorstore, lexical=lexical, k=RETRIEVAL_K, mode=RETRIEVAL_MODE)
     
-    # Create retriever (smaller k to reduce token usage)
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
+    # Initialize Gemini LLM (use lite model for better availability)
+    if llm is None:
+        llm = ChatGoogleGenerativeAI(
+            model="models/gemini-flash-lite-latest",
+            temperature=0.7,
+        )
+        print(f"✅ Initialized Gemini LLM (models/gemini-flash-lite-latest)")
+    else:
+        print(f"✅ Using provided chat model ({type(llm).__name__})")
     
     # Create RAG prompt template
     template = """다음 문서를 참고하여 질문에 답변하세요. 문서에 없는 내용은 "문서에서 해당 정보를 찾을 수 없습니다"라고 답하세요.
@@ -53,22 +78,30 @@ def initialize_chatbot():
     
     prompt = ChatPromptTemplate.from_template(template)
     
-    # Create RAG chain
-    def format_docs(docs):
-        return "\n\n".join([f"[문서 {i+1}]\n{doc.page_content}" for i, doc in enumerate(docs)])
-    
-    rag_chain = (
-        {"context": retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    # Create answer chain (context is retrieved once per question outside the chain)
+    answer_chain = prompt | llm | StrOutputParser()
     
     print("✅ Chatbot ready!\n")
-    return rag_chain, retriever
+    return answer_chain, retriever
 
 
-def chat_loop(rag_chain, retriever):
+def format_docs(docs):
+    return "\n\n".join([f"[문서 {i+1}]\n{doc.page_content}" for i, doc in enumerate(docs)])
+
+
+def print_sources(source_docs):
+    print(f"\n📚 참고한 문서 ({len(source_docs)}개):")
+    for i, doc in enumerate(source_docs, 1):
+        preview = doc.page_content[:150].replace("\n", " ")
+        print(f"  [{i}] {preview}...")
+
+
+def print_timings(timings):
+    stages = " | ".join(f"{stage} {seconds * 1000:,.0f}ms" for stage, seconds in timings.items())
+    print(f"⏱️  {stages} | total {sum(timings.values()) * 1000:,.0f}ms")
+
+
+def chat_loop(answer_chain, retriever):
     """Run interactive chat loop."""
     print("=" * 70)
     print("💬 RAG Chatbot (문서 기반 질문답변)")
@@ -91,12 +124,15 @@ def chat_loop(rag_chain, retriever):
         
         # Get response from chatbot
         print("\n🤖 답변 생성 중...\n")
+        source_docs, timings = None, {}
         try:
-            # Get answer
-            answer = rag_chain.invoke(user_input)
+            # Retrieve once: the same documents are used for the answer, sources and fallback
+            source_docs, timings = retriever.search(user_input)
             
-            # Get source documents
-            source_docs = retriever.invoke(user_input)
+            # Get answer
+            start = time.perf_counter()
+            answer = answer_chain.invoke({"context": format_docs(source_docs), "question": user_input})
+            timings["llm"] = time.perf_counter() - start
             
             # Print answer
             print("=" * 70)
@@ -105,10 +141,8 @@ def chat_loop(rag_chain, retriever):
             
             # Print sources (optional)
             if source_docs:
-                print(f"\n📚 참고한 문서 ({len(source_docs)}개):")
-                for i, doc in enumerate(source_docs, 1):
-                    preview = doc.page_content[:150].replace("\n", " ")
-                    print(f"  [{i}] {preview}...")
+                print_sources(source_docs)
+            print_timings(timings)
             
             print("\n")
             
@@ -117,30 +151,26 @@ def chat_loop(rag_chain, retriever):
             err_msg = str(e)
             print(f"❌ 오류 발생: {err_msg}\n")
             if "RESOURCE_EXHAUSTED" in err_msg or "429" in err_msg:
-                try:
-                    source_docs = retriever.invoke(user_input)
-                    if source_docs:
-                        joined = "\n\n".join([doc.page_content for doc in source_docs])
-                        print("=" * 70)
-                        print("💡 LLM 사용 제한으로 검색 결과를 직접 반환합니다:")
-                        print(joined[:1500])
-                        print("=" * 70)
-                        print(f"\n📚 참고한 문서 ({len(source_docs)}개):")
-                        for i, doc in enumerate(source_docs, 1):
-                            preview = doc.page_content[:150].replace("\n", " ")
-                            print(f"  [{i}] {preview}...")
-                        print("\n")
-                    else:
-                        print("⚠️ 검색 결과가 없습니다. 질문을 더 구체적으로 입력해보세요.\n")
-                except Exception as e2:
-                    print(f"❌ 대체 경로도 실패: {e2}\n")
+                if source_docs is None:
+                    print("❌ 대체 경로도 실패: 질문 임베딩/검색 단계에서 사용 제한에 걸렸습니다.\n")
+                elif source_docs:
+                    joined = "\n\n".join([doc.page_content for doc in source_docs])
+                    print("=" * 70)
+                    print("💡 LLM 사용 제한으로 검색 결과를 직접 반환합니다:")
+                    print(joined[:1500])
+                    print("=" * 70)
+                    print_sources(source_docs)
+                    print_timings(timings)
+                    print("\n")
+                else:
+                    print("⚠️ 검색 결과가 없습니다. 질문을 더 구체적으로 입력해보세요.\n")
 
 
 def main():
     """Main entry point."""
     try:
-        rag_chain, retriever = initialize_chatbot()
-        chat_loop(rag_chain, retriever)
+        answer_chain, retriever = initialize_chatbot()
+        chat_loop(answer_chain, retriever)
     except Exception as e:
         print(f"\n❌ 초기화 실패: {e}")
         print("💡 Tip: ./chroma_db가 존재하는지, GOOGLE_API_KEY가 설정되어 있는지 확인하세요.")
@@ -6,13 +6,17 @@ from dotenv import load_dotenv
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
 
+from embedding_cache import CachedEmbeddings
+
 load_dotenv()
 api_key = os.getenv("GOOGLE_API_KEY")
 if not api_key:
     raise ValueError("GOOGLE_API_KEY not set")
 
 # Load existing ChromaDB
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+embeddings = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(model="models/text-embedding-004"), "models/text-embedding-004"
+)
 vectorstore = Chroma(
     collection_name="my_rag_db",
     embedding_function=embeddings,
@@ -0,0 +1,161 @@
+"""
+Persistent embedding cache shared by ingestion and query paths.
+
+CachedEmbeddings wraps any LangChain Embeddings object and stores every vector in
+a SQLite file (memory-mapped reads, WAL journal) keyed by
+sha256(model name, query/document, text). Vectors are stored as raw float32 or
+float16 bytes. Least-recently-used entries are evicted when the cache exceeds
+max_entries or max_bytes, and hit/miss counts are kept for reporting.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = "./embedding_cache.sqlite"
+SQLITE_MAX_VARIABLES = 900  # stay below SQLite's bound-parameter limit per statement
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from a disk cache."""
+
+    def __init__(self, embeddings, model_name, path=DEFAULT_CACHE_PATH, dtype="float32",
+                 max_entries=None, max_bytes=None, query_batch=None):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"dtype must be 'float32' or 'float16', got {dtype!r}")
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = str(path)
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.query_batch = query_batch
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA mmap_size=268435456;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+        """)
+
+    def _key(self, kind, text):
+        raw = f"{self.model_name}\0{kind}\0{text}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _lookup(self, keys):
+        """Fetch cached vectors for keys and refresh their LRU timestamp."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), SQLITE_MAX_VARIABLES):
+                batch = unique[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+        return found
+
+    def _store(self, items):
+        """Insert (key, vector) pairs and evict if the cache is over its limits."""
+        now = time.time()
+        rows = [(key, self.model_name, self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes(), now)
+                for key, vector in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        """Delete least-recently-used rows beyond max_entries / max_bytes (caller holds the lock)."""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        excess = 0
+        if self.max_entries is not None:
+            excess = max(excess, count - self.max_entries)
+        if self.max_bytes is not None and size > self.max_bytes and count:
+            excess = max(excess, int(np.ceil((size - self.max_bytes) / (size / count))))
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+
+    def _embed(self, kind, texts, compute):
+        keys = [self._key(kind, text) for text in texts]
+        cached = self._lookup(keys)
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        n_missed = sum(key not in cached for key in keys)
+        self.hits += len(keys) - n_missed
+        self.misses += n_missed
+
+        if missing:
+            vectors = compute(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self._store(computed.items())
+            cached.update({key: np.asarray(vector, dtype=np.float32) for key, vector in computed.items()})
+        return [cached[key].tolist() for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed("document", list(texts), self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed("query", [text], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    def embed_queries(self, texts):
+        """Embed several queries; misses go to query_batch in one call when given, else to embed_query one by one."""
+        compute = self.query_batch or (lambda texts: [self.embeddings.embed_query(text) for text in texts])
+        return self._embed("query", list(texts), compute)
+
+    def stats(self):
+        """Hit/miss counters for this session plus the cache's current size."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": count,
+            "vector_bytes": size,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"embedding cache: {stats['hits']} hits / {stats['misses']} misses "
+                f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries, "
+                f"{stats['vector_bytes'] / 1024**2:.1f} MB")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
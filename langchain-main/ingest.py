@@ -1,17 +1,58 @@
 """
 Document ingestion pipeline for RAG system.
 Loads .txt files from ./data, splits into chunks, embeds, and stores in ChromaDB.
+
+Files stream through parse -> embed -> write stages (see ingest_pipeline.py).
+Parse loads and splits each file in a worker process. Embed sends fixed-size
+batches to the embedding model. Write upserts each batch into Chroma. The
+stages are connected by bounded queues, so memory stays flat however many
+files are ingested, and a per-stage throughput / queue depth report is printed
+at the end.
+
+By default ingestion is incremental: a manifest of each file's content hash and
+chunk IDs is kept next to the database, and only chunks of new or changed files
+are embedded and upserted. Chunks of removed files are deleted.
+Use --rebuild to recreate the database from scratch.
+
+After every change the BM25 lexical index (see lexical_index.py) is rebuilt from
+all stored chunks; this only tokenizes text and needs no embedding calls.
 """
 
 import os
+import json
 import shutil
+import hashlib
+import argparse
+from collections import Counter
 from dotenv import load_dotenv
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
 
+from embedding_cache import CachedEmbeddings
+from ingest_pipeline import QUEUE_SIZE, parallel_map, rebatch, run_pipeline
+from lexical_index import LexicalIndex
+
+
+DATA_PATH = "./data"
+PERSIST_DIRECTORY = "./chroma_db"
+COLLECTION_NAME = "my_rag_db"
+EMBEDDING_MODEL = "models/text-embedding-004"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+MANIFEST_PATH = os.path.join(PERSIST_DIRECTORY, "ingest_manifest.json")
+LEXICAL_PATH = os.path.join(PERSIST_DIRECTORY, "lexical")
+LEXICAL_PAGE_SIZE = 5000  # chunks read from Chroma per request when building the lexical index
+EMBED_BATCH_SIZE = 100  # chunks per embedding request
+PARSE_WORKERS = min(4, os.cpu_count() or 1)  # processes loading and splitting files
+
+
+def get_embeddings():
+    """Gemini embeddings wrapped in the persistent embedding cache."""
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
+
 
 def validate_env():
     """Validate that GOOGLE_API_KEY is set in environment."""
@@ -24,86 +65,197 @@ def validate_env():
     print("✓ GOOGLE_API_KEY loaded successfully")
 
 
-def load_documents():
-    """Load all .txt files from ./data directory."""
-    data_path = "./data"
-    
-    if not os.path.exists(data_path):
+def load_and_split(path):
+    """Load and chunk one .txt file (runs in a parse worker process). Returns (manifest key, chunks)."""
+    documents = TextLoader(path, autodetect_encoding=True).load()
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    return source_key(path), text_splitter.split_documents(documents)
+
+
+def remove_database():
+    """Delete the persisted ChromaDB directory (with retry on read-only files)."""
+    persist_directory = PERSIST_DIRECTORY
+    if not os.path.exists(persist_directory):
+        return
+    print(f"⚠ Removing existing database at {persist_directory}")
+    import time
+    import stat
+
+    def handle_remove_error(func, path, exc_info):
+        os.chmod(path, stat.S_IWRITE)
+        time.sleep(0.1)
+        func(path)
+
+    try:
+        shutil.rmtree(persist_directory, onerror=handle_remove_error)
+    except Exception as e:
+        print(f"⚠ Failed to remove DB (may be in use): {e}")
+        print("💡 Tip: Close Jupyter kernel and try again, or manually delete ./chroma_db")
+        raise
+
+
+def build_lexical_index(vectorstore):
+    """Rebuild the BM25 index over every chunk in the collection (IDs match the Chroma IDs)."""
+    ids, texts = [], []
+    while True:
+        page = vectorstore.get(include=["documents"], limit=LEXICAL_PAGE_SIZE, offset=len(ids))
+        ids.extend(page["ids"])
+        texts.extend(page["documents"])
+        if len(page["ids"]) < LEXICAL_PAGE_SIZE:
+            break
+    index = LexicalIndex.build(ids, texts)
+    index.save(LEXICAL_PATH)
+    print(f"✓ Built BM25 lexical index over {len(index)} chunks ({len(index.vocab)} terms) at {LEXICAL_PATH}")
+    return index
+
+
+def source_key(path):
+    """Manifest key for a document: its path relative to the data directory."""
+    return os.path.relpath(path, DATA_PATH).replace(os.sep, "/")
+
+
+def file_sha256(path):
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_hashes():
+    """Content hash of every .txt file under ./data, keyed by relative path."""
+    hashes = {}
+    for root, _, names in os.walk(DATA_PATH):
+        for name in names:
+            if name.endswith(".txt"):
+                path = os.path.join(root, name)
+                hashes[source_key(path)] = file_sha256(path)
+    return hashes
+
+
+def assign_chunk_ids(chunks):
+    """Deterministic chunk IDs from (source, content, occurrence) so unchanged chunks keep their ID."""
+    seen = Counter()
+    ids = []
+    for chunk in chunks:
+        key = (source_key(chunk.metadata["source"]), chunk.page_content)
+        seen[key] += 1
+        raw = "\0".join(map(str, key + (seen[key],)))
+        ids.append(hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32])
+    return ids
+
+
+def manifest_config():
+    """Settings that invalidate every stored chunk when changed."""
+    return {"embedding_model": EMBEDDING_MODEL, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+
+
+def build_manifest_files(chunks, hashes):
+    """Map each file to its content hash and the IDs of its chunks."""
+    files = {key: {"sha256": digest, "chunk_ids": []} for key, digest in hashes.items()}
+    for chunk, chunk_id in zip(chunks, assign_chunk_ids(chunks)):
+        files[source_key(chunk.metadata["source"])]["chunk_ids"].append(chunk_id)
+    return files
+
+
+def load_manifest():
+    """Return the previous manifest, or None if missing or built with different settings."""
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("config") == manifest_config() else None
+
+
+def save_manifest(files):
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump({"config": manifest_config(), "files": files}, f, ensure_ascii=False, indent=2)
+
+
+def ingest(manifest, workers=PARSE_WORKERS, batch_size=EMBED_BATCH_SIZE, queue_size=QUEUE_SIZE):
+    """Stream new/changed files into ChromaDB and delete chunks of removed or edited-away text.
+
+    With manifest=None the database is recreated and every file is ingested.
+    Returns (number of files reprocessed, chunks added, chunks deleted).
+    """
+    if not os.path.exists(DATA_PATH):
         raise FileNotFoundError(
-            f"Data directory '{data_path}' does not exist. Please create it and add .txt files."
+            f"Data directory '{DATA_PATH}' does not exist. Please create it and add .txt files."
         )
-    
-    # Load documents with auto-detection for Korean encoding
-    loader = DirectoryLoader(
-        path=data_path,
-        glob="**/*.txt",
-        loader_cls=TextLoader,
-        loader_kwargs={"autodetect_encoding": True}
-    )
-    
-    documents = loader.load()
-    
-    if not documents:
+    hashes = file_hashes()
+    if not hashes:
         raise ValueError(
-            f"No .txt files found in '{data_path}'. Please add documents to ingest."
+            f"No .txt files found in '{DATA_PATH}'. Please add documents to ingest."
         )
-    
-    print(f"✓ Loaded {len(documents)} documents from {data_path}")
-    return documents
 
+    old_files = manifest["files"] if manifest else {}
+    changed = sorted(key for key, digest in hashes.items() if old_files.get(key, {}).get("sha256") != digest)
+    removed = [key for key in old_files if key not in hashes]
+    if manifest and not changed and not removed:
+        print("✓ No changes detected, ChromaDB is up to date")
+        if not LexicalIndex.exists(LEXICAL_PATH):
+            build_lexical_index(Chroma(collection_name=COLLECTION_NAME, persist_directory=PERSIST_DIRECTORY))
+        return 0, 0, 0
+    if manifest is None:
+        remove_database()
+    print(f"✓ {len(changed)} new/changed and {len(removed)} removed files")
 
-def split_documents(documents):
-    """Split documents into chunks for embedding."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
+    embeddings = get_embeddings()
+    vectorstore = Chroma(
+        collection_name=COLLECTION_NAME,
+        embedding_function=embeddings,
+        persist_directory=PERSIST_DIRECTORY
     )
-    
-    chunks = text_splitter.split_documents(documents)
-    print(f"✓ Split into {len(chunks)} chunks")
-    return chunks
+    old_ids = {chunk_id for key in changed + removed for chunk_id in old_files.get(key, {}).get("chunk_ids", [])}
+    files = {key: entry for key, entry in old_files.items() if key in hashes and key not in changed}
+    new_ids = set()
 
+    def parse(keys):
+        paths = [os.path.join(DATA_PATH, key) for key in keys]
+        for key, chunks in parallel_map(load_and_split, paths, workers):
+            files.update(build_manifest_files(chunks, {key: hashes[key]}))
+            ids = files[key]["chunk_ids"]
+            new_ids.update(ids)
+            # Chunks whose ID already exists are unchanged text and are not re-embedded
+            yield [(chunk, chunk_id) for chunk, chunk_id in zip(chunks, ids) if chunk_id not in old_ids]
 
-def rebuild_vector_db(chunks):
-    """Create and persist ChromaDB vector store."""
-    persist_directory = "./chroma_db"
-    collection_name = "my_rag_db"
-    
-    # Delete existing DB if it exists (with retry)
-    if os.path.exists(persist_directory):
-        print(f"⚠ Removing existing database at {persist_directory}")
-        import time
-        import stat
-        
-        def handle_remove_error(func, path, exc_info):
-            os.chmod(path, stat.S_IWRITE)
-            time.sleep(0.1)
-            func(path)
-        
-        try:
-            shutil.rmtree(persist_directory, onerror=handle_remove_error)
-        except Exception as e:
-            print(f"⚠ Failed to remove DB (may be in use): {e}")
-            print("💡 Tip: Close Jupyter kernel and try again, or manually delete ./chroma_db")
-            raise
-    
-    # Initialize embeddings (Gemini via Google AI Studio)
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
-    print("✓ Initialized Google Generative AI embeddings")
-    
-    # Create and persist vector store
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        collection_name=collection_name,
-        persist_directory=persist_directory
-    )
-    
-    print(f"✓ Created ChromaDB at {persist_directory} (collection: {collection_name})")
-    return vectorstore
+    def embed(batches):
+        for batch in rebatch(batches, batch_size):
+            vectors = embeddings.embed_documents([chunk.page_content for chunk, _ in batch])
+            yield list(zip(batch, vectors))
+
+    def write(batches):
+        for batch in batches:
+            vectorstore._collection.upsert(
+                ids=[chunk_id for (_, chunk_id), _ in batch],
+                embeddings=[vector for _, vector in batch],
+                documents=[chunk.page_content for (chunk, _), _ in batch],
+                metadatas=[chunk.metadata for (chunk, _), _ in batch],
+            )
+            yield batch
+
+    stats = run_pipeline(changed, [("parse", parse), ("embed", embed), ("write", write)], queue_size)
+    stale_ids = sorted(old_ids - new_ids)
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+    save_manifest(files)
+
+    n_chunks = sum(len(files[key]["chunk_ids"]) for key in changed)
+    n_added = stats[-1].chunks
+    print(f"✓ Split {len(changed)} files into {n_chunks} chunks; upserted {n_added} chunks, "
+          f"deleted {len(stale_ids)} chunks (collection now holds {vectorstore._collection.count()} chunks)")
+    for stage in stats:
+        print(f"  {stage.report()}")
+    print(f"✓ {embeddings.report()}")
+    build_lexical_index(vectorstore)
+    return len(changed), n_added, len(stale_ids)
 
 
-def main():
+def main(rebuild=False, workers=PARSE_WORKERS, batch_size=EMBED_BATCH_SIZE, queue_size=QUEUE_SIZE):
     """Main ingestion pipeline."""
     print("=" * 70)
     print("Starting document ingestion pipeline...")
@@ -112,21 +264,17 @@ def main():
     try:
         # Step 1: Validate environment
         validate_env()
-        
-        # Step 2: Load documents
-        documents = load_documents()
-        
-        # Step 3: Split into chunks
-        chunks = split_documents(documents)
-        
-        # Step 4 & 5: Embed and store in ChromaDB
-        rebuild_vector_db(chunks)
-        
-        # Step 6: Summary
+
+        # Incremental path: reuse the existing DB when its manifest matches current settings
+        manifest = None if rebuild or not os.path.exists(PERSIST_DIRECTORY) else load_manifest()
+
+        # Step 2: Stream files through parse -> embed -> write
+        n_files, n_added, n_deleted = ingest(manifest, workers, batch_size, queue_size)
+
+        # Step 3: Summary
         print("=" * 70)
-        print(f"✅ SUCCESS: Loaded {len(documents)} documents, "
-              f"split into {len(chunks)} chunks, "
-              f"and saved to ChromaDB at ./chroma_db (collection: my_rag_db)")
+        print(f"✅ SUCCESS: Reprocessed {n_files} files, upserted {n_added} chunks, "
+              f"deleted {n_deleted} chunks in {PERSIST_DIRECTORY} (collection: {COLLECTION_NAME})")
         print("=" * 70)
         
     except Exception as e:
@@ -137,4 +285,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Ingest ./data into ChromaDB")
+    parser.add_argument("--rebuild", action="store_true", help="Delete the database and re-embed every file")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS, help="processes loading and splitting files")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="chunks per embedding request")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="max batches waiting between stages")
+    args = parser.parse_args()
+    main(args.rebuild, args.workers, args.batch_size, args.queue_size)
@@ -0,0 +1,163 @@
+"""
+Streaming ingestion pipeline with bounded memory.
+
+A pipeline is a list of stages. Each stage is a generator function that takes an
+iterator of input items and yields output items. Every stage runs in its own
+thread. Neighbouring stages are connected by a queue holding at most
+`queue_size` items. When a downstream stage falls behind, the upstream put()
+blocks, so only a fixed number of batches is ever held in memory, whatever the
+corpus size.
+
+parallel_map() is the parse/split worker pool. It keeps at most `prefetch`
+files in flight in a process pool and yields their results in input order.
+
+Every stage records its busy time, its time blocked waiting on neighbours, and
+the depth of its output queue. From these the report shows which stage is the
+bottleneck: the queues before a slow stage fill up, and the stages after it
+sit waiting for input.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+QUEUE_SIZE = 8  # max batches waiting between two stages
+_DONE = object()
+_POLL = 0.1  # seconds between stop checks while blocked on a queue
+
+
+class StageStats:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0  # output items (files, batches)
+        self.chunks = 0  # chunks in those items
+        self.busy = 0.0  # seconds spent working
+        self.wait_in = 0.0  # seconds blocked on an empty input queue
+        self.wait_out = 0.0  # seconds blocked on a full output queue
+        self.depth_max = 0
+        self.depth_total = 0
+
+    @property
+    def depth_avg(self):
+        return self.depth_total / self.items if self.items else 0.0
+
+    def report(self):
+        rate = self.chunks / self.busy if self.busy > 0 else 0.0
+        return (f"{self.name:<6} {self.items:>7,} items {self.chunks:>9,} chunks | "
+                f"busy {self.busy:8.2f}s ({rate:,.1f} chunks/s) | "
+                f"idle {self.wait_in:7.2f}s, blocked {self.wait_out:7.2f}s | "
+                f"queue avg {self.depth_avg:4.1f} max {self.depth_max}")
+
+
+def parallel_map(func, items, workers, prefetch=None):
+    """Ordered map of func over items in a process pool, with at most `prefetch` calls in flight.
+
+    With workers <= 1 the calls run inline.
+    """
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    prefetch = prefetch or 2 * workers
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(func, item) for item in islice(items, prefetch))
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(pool.submit(func, item))
+            yield result
+
+
+def rebatch(batches, size):
+    """Regroup an iterator of lists into lists of `size` items (the last one may be shorter)."""
+    batch = []
+    for items in batches:
+        batch.extend(items)
+        while len(batch) >= size:
+            yield batch[:size]
+            batch = batch[size:]
+    if batch:
+        yield batch
+
+
+def run_pipeline(source, stages, queue_size=QUEUE_SIZE):
+    """Run `source` through `stages` [(name, transform), ...] and return one StageStats per stage.
+
+    The first transform consumes `source` directly. Every output item must be a list,
+    and its length is counted as chunks. The last stage's outputs are discarded.
+    An exception in any stage stops the others and is re-raised here.
+    """
+    stats = [StageStats(name) for name, _ in stages]
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages[:-1]]
+    stop = threading.Event()
+    errors = []
+
+    def get(q, stage):
+        while True:
+            start = time.perf_counter()
+            try:
+                item = q.get(timeout=_POLL)
+            except queue.Empty:
+                stage.wait_in += time.perf_counter() - start
+                if stop.is_set():
+                    return _DONE
+                continue
+            stage.wait_in += time.perf_counter() - start
+            return item
+
+    def put(q, item, stage):
+        start = time.perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                break
+            except queue.Full:
+                pass
+        stage.wait_out += time.perf_counter() - start
+        if item is not _DONE:
+            depth = q.qsize()
+            stage.depth_max = max(stage.depth_max, depth)
+            stage.depth_total += depth
+
+    def inputs(q, stage):
+        while True:
+            item = get(q, stage)
+            if item is _DONE:
+                return
+            yield item
+
+    def worker(i, transform):
+        stage = stats[i]
+        source_iter = source if i == 0 else inputs(queues[i - 1], stage)
+        out = queues[i] if i < len(queues) else None
+        started = time.perf_counter()
+        try:
+            for item in transform(source_iter):
+                stage.items += 1
+                stage.chunks += len(item)
+                if out is not None:
+                    put(out, item, stage)
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if out is not None:
+                put(out, _DONE, stage)
+            stage.busy = time.perf_counter() - started - stage.wait_in - stage.wait_out
+
+    threads = [threading.Thread(target=worker, args=(i, transform), name=f"ingest-{name}", daemon=True)
+               for i, (name, transform) in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return stats
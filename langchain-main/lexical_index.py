@@ -0,0 +1,272 @@
+"""
+BM25 lexical index and hybrid (BM25 + dense) retrieval.
+
+LexicalIndex is built at ingest time from every stored chunk and saved as a few
+.npy arrays (CSR postings: term offsets, doc positions, term frequencies, doc
+lengths) plus a JSON vocabulary, so it loads with memory-mapped reads.
+Korean text is tokenized into character bigrams of each Hangul run, which
+matches particles and compound nouns without a morphological analyzer; Latin
+words and numbers (model names, standards, units) are kept whole.
+
+HybridRetriever fuses BM25 and vector search results with reciprocal rank fusion.
+In "lexical_first" mode the query embedding is skipped when BM25 is decisive:
+the best chunk covers most of the query's weight and clearly beats the runner-up.
+"""
+import os
+import re
+import json
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid", "lexical_first")
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[^\W_가-힣]+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60  # reciprocal rank fusion constant
+FETCH_K = 20  # candidates taken from each retriever before fusion
+DECISIVE_COVERAGE = 0.8  # best BM25 score / score of a tf=1, average-length match on every known query term
+DECISIVE_MARGIN = 1.5  # best BM25 score / second-best score
+
+
+def tokenize(text):
+    """Hangul runs -> character bigrams (a single syllable stays a unigram); other words kept whole."""
+    tokens = []
+    for word in TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class LexicalIndex:
+    """BM25 over an inverted index stored in flat numpy arrays."""
+
+    def __init__(self, doc_ids, vocab, term_offsets, postings_doc, postings_tf, doc_len, k1=BM25_K1, b=BM25_B):
+        self.doc_ids = doc_ids
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+        # Length normalization per document, shared by every query
+        self._norm = (k1 * (1 - b + b * doc_len / max(self.avg_len, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, ids, texts, k1=BM25_K1, b=BM25_B):
+        """Build from parallel lists of chunk IDs and texts."""
+        vocab = {}
+        term_ids, doc_pos, tfs, doc_len = [], [], [], []
+        for pos, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_pos.append(pos)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")  # postings grouped by term, doc positions ascending
+        term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=term_offsets[1:])
+        return cls(
+            np.asarray(list(ids), dtype=str),
+            vocab,
+            term_offsets,
+            np.asarray(doc_pos, dtype=np.int32)[order],
+            np.minimum(np.asarray(tfs, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)[order],
+            np.asarray(doc_len, dtype=np.int32),
+            k1,
+            b,
+        )
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ("doc_ids", "term_offsets", "postings_doc", "postings_tf", "doc_len"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "terms": terms}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+                  for name in ("doc_ids", "term_offsets", "postings_doc", "postings_tf", "doc_len")}
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        vocab = {term: i for i, term in enumerate(meta["terms"])}
+        return cls(vocab=vocab, k1=meta["k1"], b=meta["b"], **arrays)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "vocab.json"))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def search(self, query, k):
+        """Top-k (chunk_id, score) pairs and the query's coverage reference score.
+
+        The reference is the score of a chunk containing every known query term once at
+        average length; terms absent from the vocabulary carry no evidence and are ignored.
+        """
+        n_docs = len(self.doc_ids)
+        query_terms = Counter(self.vocab[t] for t in tokenize(query) if t in self.vocab)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        reference = 0.0
+        for term, qtf in query_terms.items():
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            df = end - start
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)) * qtf
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+            reference += float(idf)
+        if not query_terms or k <= 0:
+            return [], reference
+
+        k = min(k, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(str(self.doc_ids[i]), float(scores[i])) for i in top if scores[i] > 0], reference
+
+
+def is_decisive(hits, reference, coverage=DECISIVE_COVERAGE, margin=DECISIVE_MARGIN):
+    """True when the best BM25 hit covers the query and clearly beats the second-best."""
+    if not hits or reference <= 0 or hits[0][1] < coverage * reference:
+        return False
+    return len(hits) == 1 or hits[0][1] >= margin * hits[1][1]
+
+
+def rrf_fuse(rankings, rrf_k=RRF_K):
+    """Reciprocal rank fusion of ranked ID lists -> IDs sorted by fused score."""
+    fused = Counter()
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1.0 / (rrf_k + rank + 1)
+    return [doc_id for doc_id, _ in fused.most_common()]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever combining a LexicalIndex with a Chroma or FAISS vector store.
+
+    search() also returns per-stage latency; when no lexical index is given every
+    mode falls back to dense search.
+    """
+
+    vectorstore: Any
+    lexical: Optional[LexicalIndex] = None
+    k: int = 4
+    fetch_k: int = FETCH_K
+    mode: str = "lexical_first"
+    rrf_k: int = RRF_K
+    decisive_coverage: float = DECISIVE_COVERAGE
+    decisive_margin: float = DECISIVE_MARGIN
+
+    def _dense_search(self, vector, k):
+        """Vector search returning (ranked chunk IDs, {id: Document} for the documents already loaded)."""
+        store = self.vectorstore
+        if hasattr(store, "index_to_docstore_id"):  # FAISS: map index positions straight to chunk IDs
+            _, positions = store.index.search(np.asarray([vector], dtype=np.float32), k)
+            return [store.index_to_docstore_id[i] for i in positions[0] if i != -1], {}
+        docs = store.similarity_search_by_vector(vector, k=k)
+        return [doc.id for doc in docs], {doc.id: doc for doc in docs}
+
+    def _fetch(self, ids, loaded):
+        """Documents for ids in order, loading the ones not already returned by the vector search."""
+        missing = [doc_id for doc_id in ids if doc_id not in loaded]
+        if missing:
+            if hasattr(self.vectorstore, "docstore"):
+                loaded.update((doc_id, self.vectorstore.docstore.search(doc_id)) for doc_id in missing)
+            else:
+                loaded.update((doc.id, doc) for doc in self.vectorstore.get_by_ids(missing))
+        return [loaded[doc_id] for doc_id in ids if not isinstance(loaded.get(doc_id, ""), str)]
+
+    def _lexical_stage(self, query, timings):
+        """BM25 step. Returns (lexical IDs, documents if BM25 alone answers the query else None)."""
+        if self.mode not in RETRIEVAL_MODES:
+            raise ValueError(f"mode must be one of {RETRIEVAL_MODES}, got {self.mode!r}")
+        if self.lexical is None or self.mode == "dense":
+            return [], None
+        start = time.perf_counter()
+        hits, reference = self.lexical.search(query, self.fetch_k)
+        timings["bm25"] = time.perf_counter() - start
+        lexical_ids = [doc_id for doc_id, _ in hits]
+        if self.mode == "lexical" or (
+            self.mode == "lexical_first"
+            and is_decisive(hits, reference, self.decisive_coverage, self.decisive_margin)
+        ):
+            start = time.perf_counter()
+            docs = self._fetch(lexical_ids[:self.k], {})
+            timings["fetch"] = time.perf_counter() - start
+            return lexical_ids, docs
+        return lexical_ids, None
+
+    def _dense_stage(self, vector, lexical_ids, timings):
+        """Vector search for an embedded query, fused with the BM25 ranking when there is one."""
+        start = time.perf_counter()
+        dense_ids, loaded = self._dense_search(vector, self.fetch_k if lexical_ids else self.k)
+        timings["search"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ids = rrf_fuse([dense_ids, lexical_ids], self.rrf_k)[:self.k] if lexical_ids else dense_ids[:self.k]
+        docs = self._fetch(ids, loaded)
+        timings["fuse"] = time.perf_counter() - start
+        return docs
+
+    def search(self, query):
+        """Returns (documents, {stage: seconds})."""
+        timings = {}
+        lexical_ids, docs = self._lexical_stage(query, timings)
+        if docs is not None:
+            return docs, timings
+
+        start = time.perf_counter()
+        vector = self.vectorstore.embeddings.embed_query(query)
+        timings["embed"] = time.perf_counter() - start
+        return self._dense_stage(vector, lexical_ids, timings), timings
+
+    def search_batch(self, queries):
+        """search() for many queries, embedding every query BM25 cannot answer in one batched call.
+
+        Uses the embeddings' embed_queries() when available (CachedEmbeddings); each query's
+        "embed" timing is the duration of that shared call.
+        """
+        queries = list(queries)
+        results = []
+        pending = []
+        for query in queries:
+            timings = {}
+            lexical_ids, docs = self._lexical_stage(query, timings)
+            results.append((docs, timings))
+            if docs is None:
+                pending.append((len(results) - 1, lexical_ids))
+        if not pending:
+            return results
+
+        embeddings = self.vectorstore.embeddings
+        texts = [queries[i] for i, _ in pending]
+        start = time.perf_counter()
+        if hasattr(embeddings, "embed_queries"):
+            vectors = embeddings.embed_queries(texts)
+        else:
+            vectors = [embeddings.embed_query(text) for text in texts]
+        elapsed = time.perf_counter() - start
+
+        for (i, lexical_ids), vector in zip(pending, vectors):
+            timings = results[i][1]
+            timings["embed"] = elapsed
+            results[i] = (self._dense_stage(vector, lexical_ids, timings), timings)
+        return results
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.search(query)[0]
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+from langchain_core.documents import Document
+
+from batch_qa import run_batch
+
+
+class StubRetriever:
+    def __init__(self):
+        self.calls = 0
+
+    def search_batch(self, questions):
+        self.calls += 1
+        return [([Document(page_content=q, metadata={"source": "doc.pdf"})], {"bm25": 0.001}) for q in questions]
+
+
+def write_questions(path, questions):
+    path.write_text("".join(json.dumps({"id": i, "question": q}) + "\n" for i, q in enumerate(questions)),
+                    encoding="utf-8")
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_queue_wait_is_separate_from_latency(tmp_path):
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "a.jsonl"
+    write_questions(questions_path, ["q0", "q1", "q2"])
+    retriever = StubRetriever()
+
+    async def answer_fn(question, docs):
+        await asyncio.sleep(0.05)
+        return question.upper()
+
+    summary = asyncio.run(run_batch(questions_path, output_path, retriever, answer_fn, concurrency=1, rpm=0,
+                                    embed_batch=8))
+    assert summary["answered"] == 3 and summary["errors"] == 0
+    assert retriever.calls == 1
+
+    records = {record["id"]: record for record in read_records(output_path)}
+    assert [records[i]["answer"] for i in range(3)] == ["Q0", "Q1", "Q2"]
+    # With one slot each question waits for the previous answers, but its own latency does not include that wait
+    assert records[0]["queue_ms"] < 20
+    assert records[2]["queue_ms"] >= 90
+    assert all(40 <= records[i]["latency_ms"] < 90 for i in range(3))
+
+
+def test_results_are_written_in_completion_order(tmp_path):
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "a.jsonl"
+    write_questions(questions_path, ["slow", "fast"])
+
+    async def answer_fn(question, docs):
+        await asyncio.sleep(0.1 if question == "slow" else 0.0)
+        return question
+
+    asyncio.run(run_batch(questions_path, output_path, StubRetriever(), answer_fn, concurrency=2, rpm=0))
+    assert [record["id"] for record in read_records(output_path)] == [1, 0]
+
+    # --resume skips answered ids
+    summary = asyncio.run(run_batch(questions_path, output_path, StubRetriever(), answer_fn, rpm=0, resume=True))
+    assert summary["skipped"] == 2 and summary["answered"] == 0
+
+
+def test_failed_answers_are_not_counted_as_answered(tmp_path):
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "a.jsonl"
+    write_questions(questions_path, ["ok", "bad", "bad"])
+
+    async def answer_fn(question, docs):
+        await asyncio.sleep(0.02)
+        if question == "bad":
+            raise ValueError("model error")
+        return question
+
+    summary = asyncio.run(run_batch(questions_path, output_path, StubRetriever(), answer_fn, rpm=0))
+    assert summary["answered"] == 1 and summary["errors"] == 2
+    assert summary["p50_latency_ms"] == summary["p95_latency_ms"] >= 15
+    assert sum(record.get("error") is not None for record in read_records(output_path)) == 2
+
+    async def always_fail(question, docs):
+        raise ValueError("model error")
+
+    summary = asyncio.run(run_batch(questions_path, output_path, StubRetriever(), always_fail, rpm=0))
+    assert summary["answered"] == 0 and summary["errors"] == 3
+    assert summary["questions_per_sec"] == 0.0 and summary["p50_latency_ms"] is None
@@ -0,0 +1,49 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+import chat
+
+
+class CountingRetriever:
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query):
+        self.queries.append(query)
+        return [Document(page_content=f"chunk for {query}")], {"bm25": 0.001}
+
+
+@pytest.fixture
+def ask(monkeypatch):
+    def run(answer, *questions):
+        replies = iter([*questions, "exit"])
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(replies))
+        retriever = CountingRetriever()
+        contexts = []
+
+        def answer_fn(inputs):
+            contexts.append(inputs["context"])
+            return answer(inputs)
+
+        chat.chat_loop(RunnableLambda(answer_fn), retriever)
+        return retriever, contexts
+
+    return run
+
+
+def test_retrieves_once_per_question(ask, capsys):
+    retriever, contexts = ask(lambda inputs: "answer", "first question", "", "second question")
+    assert retriever.queries == ["first question", "second question"]
+    # The answer is generated from the same documents that are shown as sources
+    assert contexts == [chat.format_docs([Document(page_content=f"chunk for {q}")]) for q in retriever.queries]
+    assert "chunk for second question" in capsys.readouterr().out
+
+
+def test_quota_fallback_reuses_retrieved_documents(ask, capsys):
+    def exhausted(inputs):
+        raise RuntimeError("429 RESOURCE_EXHAUSTED")
+
+    retriever, _ = ask(exhausted, "question")
+    assert retriever.queries == ["question"]
+    assert "chunk for question" in capsys.readouterr().out
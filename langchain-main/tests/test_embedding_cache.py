@@ -0,0 +1,79 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import embedding_cache
+from embedding_cache import CachedEmbeddings
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # Strictly increasing timestamps so LRU order does not depend on timer resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_round_trip_across_instances(tmp_path, stub_embeddings):
+    path = tmp_path / "cache.sqlite"
+    texts = ["charger", "transformer", "charger"]
+    cache = CachedEmbeddings(stub_embeddings, "stub", path=path)
+    first = cache.embed_documents(texts)
+    assert stub_embeddings.documents == 2  # duplicates are embedded once
+    assert cache.stats()["misses"] == 3 and cache.stats()["entries"] == 2
+    cache.close()
+
+    reopened = CachedEmbeddings(stub_embeddings, "stub", path=path)
+    assert reopened.embed_documents(texts) == first
+    assert stub_embeddings.documents == 2
+    assert reopened.stats()["hit_rate"] == 1.0
+
+    # Queries and documents, and different models, use separate keys
+    reopened.embed_query("charger")
+    CachedEmbeddings(stub_embeddings, "other", path=path).embed_documents(["charger"])
+    assert stub_embeddings.queries == 1 and stub_embeddings.documents == 3
+
+
+def test_float16_storage(tmp_path, stub_embeddings):
+    cache = CachedEmbeddings(stub_embeddings, "stub", path=tmp_path / "cache.sqlite", dtype="float16")
+    cache.embed_documents(["charger"])
+    cached = cache.embed_documents(["charger"])[0]
+    np.testing.assert_allclose(cached, stub_embeddings.vector("charger"), atol=1e-3)
+    assert cache.stats()["vector_bytes"] == 2 * stub_embeddings.dim
+
+    with pytest.raises(ValueError):
+        CachedEmbeddings(stub_embeddings, "stub", path=tmp_path / "other.sqlite", dtype="int8")
+
+
+def test_lru_eviction(tmp_path, stub_embeddings):
+    cache = CachedEmbeddings(stub_embeddings, "stub", path=tmp_path / "cache.sqlite", max_entries=2)
+    cache.embed_documents(["a"])
+    cache.embed_documents(["b"])
+    cache.embed_documents(["a"])  # refresh "a" so "b" is the least recently used
+    cache.embed_documents(["c"])
+    assert cache.stats()["entries"] == 2
+
+    calls = stub_embeddings.documents
+    cache.embed_documents(["a", "c"])
+    assert stub_embeddings.documents == calls
+    cache.embed_documents(["b"])
+    assert stub_embeddings.documents == calls + 1
+
+    by_size = CachedEmbeddings(stub_embeddings, "stub", path=tmp_path / "sized.sqlite",
+                               max_bytes=3 * 4 * stub_embeddings.dim)
+    by_size.embed_documents(["a", "b", "c", "d", "e"])
+    assert by_size.stats()["entries"] == 3
+
+
+def test_query_batch(tmp_path, stub_embeddings):
+    batches = []
+
+    def query_batch(texts):
+        batches.append(list(texts))
+        return [stub_embeddings.vector(text) for text in texts]
+
+    cache = CachedEmbeddings(stub_embeddings, "stub", path=tmp_path / "cache.sqlite", query_batch=query_batch)
+    cache.embed_query("a")
+    vectors = cache.embed_queries(["a", "b", "c", "b"])
+    assert batches == [["b", "c"]] and stub_embeddings.queries == 1
+    assert vectors[1] == vectors[3] == pytest.approx(stub_embeddings.vector("b"), rel=1e-6)
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+import ingest
+from embedding_cache import CachedEmbeddings
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch, stub_embeddings):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(ingest.DATA_PATH)
+    # Chroma caches clients by path, so every test gets its own absolute database directory
+    persist = str(tmp_path / "chroma_db")
+    monkeypatch.setattr(ingest, "PERSIST_DIRECTORY", persist)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", os.path.join(persist, "ingest_manifest.json"))
+    monkeypatch.setattr(ingest, "LEXICAL_PATH", os.path.join(persist, "lexical"))
+    monkeypatch.setattr(ingest, "get_embeddings",
+                        lambda: CachedEmbeddings(stub_embeddings, "stub", path=tmp_path / "cache.sqlite"))
+    return tmp_path
+
+
+def write_doc(name, text):
+    with open(os.path.join(ingest.DATA_PATH, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def run():
+    return ingest.ingest(ingest.load_manifest(), workers=1, batch_size=4)
+
+
+def stored_texts():
+    store = ingest.Chroma(collection_name=ingest.COLLECTION_NAME, persist_directory=ingest.PERSIST_DIRECTORY)
+    return sorted(store.get(include=["documents"])["documents"])
+
+
+def test_incremental_ingest(workspace, stub_embeddings):
+    write_doc("a.txt", "charger installation guide")
+    write_doc("b.txt", "transformer inspection schedule")
+    assert ingest.ingest(None, workers=1, batch_size=4) == (2, 2, 0)
+    assert stored_texts() == ["charger installation guide", "transformer inspection schedule"]
+    assert stub_embeddings.documents == 2
+
+    # Unchanged files are skipped entirely
+    assert run() == (0, 0, 0)
+    assert stub_embeddings.documents == 2
+
+    # An edited file replaces its chunk; a removed file drops its chunks
+    write_doc("a.txt", "charger grounding guide")
+    os.remove(os.path.join(ingest.DATA_PATH, "b.txt"))
+    assert run() == (1, 1, 2)
+    assert stored_texts() == ["charger grounding guide"]
+    assert stub_embeddings.documents == 3
+
+    with open(ingest.MANIFEST_PATH, encoding="utf-8") as f:
+        files = json.load(f)["files"]
+    assert list(files) == ["a.txt"] and len(files["a.txt"]["chunk_ids"]) == 1
+    assert ingest.LexicalIndex.load(ingest.LEXICAL_PATH).search("grounding", 1)[0][0][0] == files["a.txt"]["chunk_ids"][0]
+
+
+def test_changed_settings_invalidate_manifest(workspace, monkeypatch):
+    write_doc("a.txt", "charger installation guide")
+    ingest.ingest(None, workers=1, batch_size=4)
+    assert ingest.load_manifest() is not None
+    monkeypatch.setattr(ingest, "CHUNK_SIZE", 500)
+    assert ingest.load_manifest() is None
@@ -0,0 +1,106 @@
+import math
+import uuid
+from collections import Counter
+
+import pytest
+from langchain_chroma import Chroma
+
+from lexical_index import HybridRetriever, LexicalIndex, is_decisive, rrf_fuse, tokenize
+
+TEXTS = [
+    "EV charger installation guide for 7kW slow chargers",
+    "Transformer inspection schedule and insulation resistance",
+    "충전기 설치 기준과 접지 저항 측정 방법",
+    "변압기 점검 주기 및 절연 저항 기준",
+    "Cable sizing for 50kW fast chargers 충전기 케이블",
+]
+IDS = [f"c{i}" for i in range(len(TEXTS))]
+
+
+def naive_bm25(query, texts, k1=1.2, b=0.75):
+    """Textbook BM25 over the same tokenizer, one document at a time."""
+    docs = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg = sum(lengths) / len(lengths)
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term, qtf in Counter(tokenize(query)).items():
+            df = sum(term in d for d in docs)
+            if not df:
+                continue
+            idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5)) * qtf
+            tf = doc[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg))
+        scores.append(score)
+    return scores
+
+
+def test_tokenize():
+    assert tokenize("충전기 설치") == ["충전", "전기", "설치"]
+    assert tokenize("EV-Charger 7kW 가") == ["ev", "charger", "7kw", "가"]
+    assert tokenize("ＡＢＣ") == ["abc"]  # NFKC folds full-width letters
+
+
+@pytest.mark.parametrize("query", ["충전기 접지", "transformer insulation", "chargers 충전기 케이블", "unknown"])
+def test_scores_match_reference(query, tmp_path):
+    index = LexicalIndex.build(IDS, TEXTS)
+    expected = naive_bm25(query, TEXTS)
+    hits, _ = index.search(query, len(TEXTS))
+    assert {doc_id: pytest.approx(expected[IDS.index(doc_id)], rel=1e-5) for doc_id, _ in hits} == dict(hits)
+    assert [doc_id for doc_id, _ in hits] == [IDS[i] for i in sorted(range(len(IDS)), key=lambda i: -expected[i])
+                                              if expected[i] > 0]
+
+    index.save(tmp_path / "lexical")
+    assert LexicalIndex.exists(tmp_path / "lexical")
+    assert LexicalIndex.load(tmp_path / "lexical").search(query, 3) == index.search(query, 3)
+
+
+def test_is_decisive():
+    assert not is_decisive([], 1.0)
+    assert not is_decisive([("a", 0.5)], 1.0)  # covers too little of the query
+    assert is_decisive([("a", 0.9)], 1.0)
+    assert is_decisive([("a", 0.9), ("b", 0.5)], 1.0)
+    assert not is_decisive([("a", 0.9), ("b", 0.8)], 1.0)  # runner-up too close
+
+
+def test_rrf_fuse():
+    assert rrf_fuse([["a", "b", "c"], ["c", "a"]]) == ["a", "c", "b"]
+    assert rrf_fuse([["a"], []]) == ["a"]
+
+
+@pytest.fixture
+def retriever(stub_embeddings):
+    store = Chroma(collection_name=f"test-{uuid.uuid4().hex}", embedding_function=stub_embeddings)
+    store.add_texts(TEXTS, metadatas=[{"source": "guide.txt"} for _ in TEXTS], ids=IDS)
+    return HybridRetriever(vectorstore=store, lexical=LexicalIndex.build(IDS, TEXTS), k=2)
+
+
+def test_lexical_first_skips_embedding(retriever, stub_embeddings):
+    docs, timings = retriever.search("transformer inspection schedule")
+    assert [doc.id for doc in docs][0] == "c1"
+    assert "embed" not in timings and stub_embeddings.queries == 0
+
+
+def test_hybrid_fuses_both_rankings(retriever, stub_embeddings):
+    retriever.mode = "hybrid"
+    query = "충전기 기준"
+    docs, timings = retriever.search(query)
+    lexical_ids = [doc_id for doc_id, _ in retriever.lexical.search(query, retriever.fetch_k)[0]]
+    dense_ids = [doc.id for doc in retriever.vectorstore.similarity_search(query, k=retriever.fetch_k)]
+    assert [doc.id for doc in docs] == rrf_fuse([dense_ids, lexical_ids])[:2]
+    assert "embed" in timings and "bm25" in timings
+
+
+@pytest.mark.parametrize("mode", ["dense", "lexical", "hybrid", "lexical_first"])
+def test_search_batch_matches_search(retriever, mode):
+    retriever.mode = mode
+    queries = ["transformer inspection schedule", "충전기 기준", "cable", "unknown words"]
+    expected = [[doc.id for doc in retriever.search(query)[0]] for query in queries]
+    assert [[doc.id for doc in docs] for docs, _ in retriever.search_batch(queries)] == expected
+
+
+def test_invalid_mode(retriever):
+    retriever.mode = "bm25"
+    with pytest.raises(ValueError):
+        retriever.search("cable")